@@ -1,63 +1,373 @@
 ﻿import os
-from openai import OpenAI
-from dotenv import load_dotenv
-from typing import List
-from schemas import AppSessionState, Message
+import json
+import time
+import asyncio
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from schemas import AppSessionState, Message, AgentRole, Poem, UserLevel, FusedReply
 from framework import COMPETENCY_TABLE
+from llm import get_sync_client, get_async_client
+from llm_scheduler import scheduler, LLM_DEADLINE_SECONDS
+from services.response_cache import open_cache
+from services.history_window import HistoryWindow
+from services.passages import passage_index
+from services.tokenizer import count_message_tokens
+from metrics import (PROMPT_TOKENS, HISTORY_MESSAGES, STAGE_SECONDS, LLM_SECONDS, LLM_TTFB_SECONDS,
+                     LLM_USAGE_TOKENS, timed, observe)
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
-load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env"))
+
+
+COMMON_INSTRUCTIONS = """당신은 소크라테스식 문학 교사입니다.
+
+        ### [공통 지침]
+        - 목표 비공개: 당신이 특정 역량을 훈련시키고 있다는 사실을 절대 노출하지 마십시오.
+        - 당신의 의견을 최대한 제시하지 말되, 어쩔 수 없이 제시하는 경우에는 '~한 것 같습니다' 와 같이 단정적 어조를 사용하지 마십시오.
+        - 한 번에 단 하나의 질문만 던지십시오.
+        - 독자의 답변이 짧거나 막막해 보인다면 이전 답변을 긍정적으로 수용한 뒤 더 구체적인 상황을 제시하십시오.
+        - 지적인 자극을 주면서도 친절하고 격려하는 '유능한 멘토'의 어조를 유지하되, 독자의 수준을 고려하여 어휘와 문장 구조를 조절하십시오.
+        """
+
+# 응답 캐시: 동일한 메시지 목록(예: 같은 시·같은 수준의 첫 질문)은 다시 호출하지 않습니다.
+# RESPONSE_CACHE_SIZE=0 으로 끌 수 있고, CACHE_BACKEND=sqlite 이면 워커 프로세스끼리 공유합니다.
+response_cache = open_cache(
+    "llm",
+    maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+)
+
+PREFIX_CACHE_SIZE = 2048
+# 긴 시의 관련 단락을 고를 때 학생 입력과 함께 질의로 쓰는 최근 메시지 수
+PASSAGE_QUERY_MESSAGES = int(os.getenv("PASSAGE_QUERY_MESSAGES", "4"))
+
+# 히스토리가 없는 첫 턴의 입력입니다. 첫 질문은 (시, 에이전트, 수준)만으로 결정되므로 입력을 고정합니다.
+OPENING_INPUT = "시를 선택했어. 각 교사의 관점과 학생의 수준을 고려한 첫 질문을 만들어 줘."
+
+
+# 히스토리 토큰 예산 (에이전트별로 HISTORY_TOKEN_BUDGET_EMPATHY 등으로 덮어쓸 수 있습니다. 0이면 자르지 않습니다.)
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "3000"))
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "gpt-4o-mini")
+
+SUMMARY_PROMPT = """다음은 시 감상 대화에서 오래된 부분입니다. 이후 대화를 이어가는 교사가 참고할 수 있도록 요약하십시오.
+- 독자가 밝힌 감정, 생각, 해석과 교사가 던진 질문의 흐름을 중심으로 정리하십시오.
+- 이전 요약이 있다면 그 내용을 유지하면서 새 내용을 덧붙이십시오.
+- 5문장 이내로 쓰십시오."""
+
+
+def observe_usage(agent: str, usage):
+    """API 응답의 usage(프롬프트·생성 토큰 수)를 기록합니다. usage 가 없는 응답(캐시 적중 등)은 건너뜁니다."""
+    if usage is None:
+        return
+    LLM_USAGE_TOKENS.observe(usage.prompt_tokens, agent=agent, kind="prompt")
+    LLM_USAGE_TOKENS.observe(usage.completion_tokens, agent=agent, kind="completion")
+
+
+class ErrorReply(str):
+    """
+    호출이 실패했을 때 답변 자리에 대신 보내는 문구입니다. 응답 JSON 에는 보통 문자열로 나가지만,
+    서버 안에서는 내용(접두어)이 아니라 이 타입으로 실패한 답변을 구분합니다.
+    """
+
+
+async def summarize_history(previous: str, messages: List[dict]) -> str:
+    """롤링 요약: 이전 요약 + 새로 밀려난 메시지만 입력으로 받아 요약을 갱신합니다."""
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    prompt = [
+        {"role": "system", "content": SUMMARY_PROMPT},
+        {"role": "user", "content": f"[이전 요약]\n{previous or '없음'}\n\n[새 대화]\n{transcript}"},
+    ]
+    with timed(LLM_SECONDS, agent="summary", call="complete"):
+        response = await scheduler.complete(
+            lambda: get_async_client().chat.completions.create(
+                model=SUMMARY_MODEL,
+                messages=prompt,
+                temperature=0.2,
+                max_tokens=400
+            ),
+            cost=count_message_tokens(prompt),
+        )
+    observe_usage("summary", response.usage)
+    return response.choices[0].message.content
+
+
+history_window = HistoryWindow(summarize_history)
 
 
 # 부모 클래스
 class BaseAgent:
+    role: AgentRole
+    level_field: str
+
     def __init__(self, role_name: str):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        # 동기/비동기 클라이언트 모두 프로세스 전역에서 공유되는 커넥션 풀을 사용합니다.
+        # 처음 호출할 때 만들므로 에이전트를 만드는 것만으로는 openai SDK 를 불러오지 않습니다.
+        self._client = None
+        self._async_client = None
         self.model = "gpt-4o"
         self.role_name = role_name
+        self.history_token_budget = int(os.getenv(f"HISTORY_TOKEN_BUDGET_{self.label.upper()}", HISTORY_TOKEN_BUDGET))
+        # 에이전트별 제한 시간 (LLM_DEADLINE_EMPATHY 등으로 덮어쓸 수 있습니다). 넘기면 다른 튜터의 답변만 먼저 돌려줍니다.
+        self.deadline = float(os.getenv(f"LLM_DEADLINE_{self.label.upper()}", LLM_DEADLINE_SECONDS))
+        self._prefix_cache: "OrderedDict[tuple, str]" = OrderedDict()
+
+    @property
+    def label(self) -> str:
+        """환경 변수 접미사와 지표 레이블에 쓰는 이름입니다."""
+        return self.role.value
+
+    @property
+    def timeout_message(self) -> str:
+        return f"[{self.role_name}] 답변이 늦어지고 있습니다. 잠시 후 다시 시도해 주세요."
+
+    def error_message(self, error: Exception) -> "ErrorReply":
+        """호출이 실패했을 때 답변 자리에 대신 보내는 문구입니다."""
+        return ErrorReply(f"[{self.role_name}] 에러 발생: {str(error)}")
+
+    @staticmethod
+    def is_error(reply: str) -> bool:
+        """error_message 로 만든 문구인지 확인합니다. 세션에는 이런 답변을 질문으로 남기지 않습니다."""
+        return isinstance(reply, ErrorReply)
+
+    @property
+    def client(self):
+        return self._client or get_sync_client()
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    @property
+    def async_client(self):
+        # 직접 지정하지 않았다면 현재 이벤트 루프의 공유 클라이언트를 사용합니다.
+        return self._async_client or get_async_client()
+
+    @async_client.setter
+    def async_client(self, client):
+        self._async_client = client
+
+    def _cache_key(self, messages: List[dict], temperature: float) -> str:
+        return response_cache.make_key(self.model, messages, temperature)
 
     def _call_llm(self, messages: List[dict], temperature: float = 0.7) -> str:
+        key = self._cache_key(messages, temperature)
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature
+            with timed(LLM_SECONDS, agent=self.label, call="complete"):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    timeout=self.deadline
+                )
+            observe_usage(self.label, response.usage)
+            content = response.choices[0].message.content
+            response_cache.set(key, content)
+            return content
+        except Exception as e:
+            return self.error_message(e)
+
+    async def _acomplete(self, messages: List[dict], temperature: float = 0.7, deadline: Optional[float] = None) -> str:
+        """
+        비동기 LLM 호출 본체입니다. 스케줄러가 제한 시간(기본값 self.deadline) 안에서 재시도·헤지를 처리합니다.
+        실패 시 예외를(제한 시간 초과는 TimeoutError) 그대로 올립니다.
+        """
+        key = self._cache_key(messages, temperature)
+        cached = await response_cache.aget(key)
+        if cached is not None:
+            return cached
+        with timed(LLM_SECONDS, agent=self.label, call="complete"):
+            response = await scheduler.complete(
+                lambda: self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature
+                ),
+                cost=count_message_tokens(messages),
+                deadline=self.deadline if deadline is None else deadline,
             )
-            return response.choices[0].message.content
+        observe_usage(self.label, response.usage)
+        content = response.choices[0].message.content
+        await response_cache.aset(key, content)
+        return content
+
+    async def _acall_llm(self, messages: List[dict], temperature: float = 0.7, deadline: Optional[float] = None) -> str:
+        """
+        _call_llm의 비동기 버전입니다. 스레드 없이 공유 클라이언트를 직접 await 합니다.
+        제한 시간 초과(TimeoutError)는 호출한 쪽이 부분 결과를 만들 수 있도록 그대로 올립니다.
+        """
+        try:
+            return await self._acomplete(messages, temperature, deadline)
+        except asyncio.TimeoutError:
+            raise
         except Exception as e:
-            return f"[{self.role_name}] 에러 발생: {str(e)}"
-        
+            return self.error_message(e)
+
+    async def _astream_llm(self, messages: List[dict], temperature: float = 0.7, deadline: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        _acall_llm 의 스트리밍 버전입니다. 실패하면 오류 문구를 보내지 않고 예외를 그대로 올립니다.
+        이미 보낸 조각 뒤에 오류 문구가 붙으면 답변과 구분할 수 없기 때문입니다. 이미 보낸 조각은 그대로 두고,
+        호출한 쪽(main 의 pump)이 시간 초과는 "timed_out": true, 그 밖의 오류는 "error": true 로 끝냅니다.
+        불완전한 답변은 캐시하지 않습니다.
+        """
+        key = self._cache_key(messages, temperature)
+        cached = await response_cache.aget(key)
+        if cached is not None:
+            yield cached
+            return
+        with timed(LLM_SECONDS, agent=self.label, call="stream"):
+            stream = scheduler.stream(
+                lambda: self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                ),
+                cost=count_message_tokens(messages),
+                deadline=self.deadline if deadline is None else deadline,
+            )
+            started = time.perf_counter()
+            parts = []
+            async for chunk in stream:
+                # 마지막 조각에는 choices 없이 usage 만 들어 있습니다.
+                if chunk.usage is not None:
+                    observe_usage(self.label, chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not parts:
+                        observe(LLM_TTFB_SECONDS, time.perf_counter() - started, started, agent=self.label)
+                    parts.append(delta)
+                    yield delta
+        await response_cache.aset(key, "".join(parts))
+
     def get_response(self, state: AppSessionState, user_input: str) -> str:
-        """자식의 agent의 지침 + 부모의 공통 지침을 결합합니다."""
-        
-        # 1. 자식 클래스에서 정의한 '자기 전공' 정보만 가져옵니다.
-        specialized_prompt = self.get_specialized_instructions(state)
-        
-        # 2. 모든 에이전트가 지켜야 할 공통 매너만 정의합니다.
-        common_system_prompt = f"""당신은 소크라테스식 문학 교사입니다.
-        독자 {state.user_name}와 '{state.selected_poem.title}'에 대해 대화 중입니다.
-        
-        ### [분석 대상 시 본문]
-        {state.selected_poem.content}
+        return self._call_llm(self.build_messages(state, user_input))
 
-        ### [공통 지침]
-        - 목표 비공개: 당신이 특정 역량을 훈련시키고 있다는 사실을 절대 노출하지 마십시오.
-        - 당신의 의견을 최대한 제시하지 말되, 어쩔 수 없이 제시하는 경우에는 '~한 것 같습니다' 와 같이 단정적 어조를 사용하지 마십시오.
-        - 한 번에 단 하나의 질문만 던지십시오.
-        - 독자의 답변이 짧거나 막막해 보인다면 이전 답변을 긍정적으로 수용한 뒤 더 구체적인 상황을 제시하십시오.
-        - 지적인 자극을 주면서도 친절하고 격려하는 '유능한 멘토'의 어조를 유지하되, 독자의 수준을 고려하여 어휘와 문장 구조를 조절하십시오.
+    async def aget_response(self, state: AppSessionState, user_input: str) -> str:
+        messages, remaining = await self.abuild_messages_within(state, user_input)
+        return await self._acall_llm(messages, deadline=remaining)
+
+    async def astream_response(self, state: AppSessionState, user_input: str) -> AsyncIterator[str]:
+        messages, remaining = await self.abuild_messages_within(state, user_input)
+        async for delta in self._astream_llm(messages, deadline=remaining):
+            yield delta
+
+    def level_of(self, state: AppSessionState) -> int:
+        """이 에이전트가 담당하는 역량의 현재 수준을 반환합니다."""
+        return getattr(state.user_level, self.level_field)
+
+    def opening_state(self, poem: Poem, level: int) -> AppSessionState:
+        """첫 질문 생성에 필요한 최소 상태입니다. 첫 질문은 (시, 에이전트, 수준)만으로 결정됩니다."""
+        return AppSessionState(selected_poem=poem, user_level=UserLevel(**{self.level_field: level}))
+
+    def system_prefix(self, state: AppSessionState) -> str:
         """
-        messages = [{"role": "system", "content": common_system_prompt + specialized_prompt}]
-        
-        # 3. 공유 히스토리 주입
-        for msg in state.shared_chat_history:
-            messages.append({"role": msg.role, "content": msg.content})
+        (에이전트, 시, 수준)마다 고정되는 시스템 프롬프트입니다. 한 번 만들면 재사용합니다.
+        공통 지침 → 시 본문 → 전공 지침 순서로 배치하여, 사용자가 달라도 접두부가 바이트 단위로 같게 유지됩니다.
+        (제공자 측 프롬프트 캐싱이 적용되려면 접두부가 동일해야 합니다.)
+        """
+        poem = state.selected_poem
+        key = (poem.id, poem.title, poem.content, self.level_of(state))
+        prefix = self._prefix_cache.get(key)
+        if prefix is not None:
+            self._prefix_cache.move_to_end(key)
+            return prefix
+
+        # 1. 모든 에이전트가 지켜야 할 공통 매너 + 분석 대상 시
+        common_system_prompt = COMMON_INSTRUCTIONS + self.poem_block(poem)
+        # 2. 자식 클래스에서 정의한 '자기 전공' 정보
+        prefix = common_system_prompt + self.get_specialized_instructions(state)
+
+        self._prefix_cache[key] = prefix
+        if len(self._prefix_cache) > PREFIX_CACHE_SIZE:
+            self._prefix_cache.popitem(last=False)
+        return prefix
+
+    @staticmethod
+    def poem_block(poem: Poem) -> str:
+        """
+        접두부에 들어갈 시 부분입니다. 짧은 시는 전문을 넣고, 긴 시는 제목과 안내만 넣습니다.
+        긴 시의 본문은 턴마다 관련 단락만 골라 build_messages 가 뒤쪽에 붙이므로 접두부는 (시, 수준)마다 그대로 유지됩니다.
+        """
+        if passage_index.is_whole(poem):
+            return f"""
+        ### [분석 대상 시: '{poem.title}']
+        {poem.content}
+        """
+        return f"""
+        ### [분석 대상 시: '{poem.title}']
+        긴 시이므로 본문 전체 대신 지금 대화와 관련된 단락을 [관련 단락]으로 함께 제공합니다. (…)은 생략된 단락입니다.
+        """
+
+    @staticmethod
+    def passage_message(poem: Poem, user_input: str, history: List[dict]) -> Optional[dict]:
+        """긴 시에서 학생 입력과 최근 대화에 관련된 단락을 담은 시스템 메시지입니다. 전문을 보낸 시는 None 입니다."""
+        # 첫 턴의 고정 입력은 시와 무관하므로 질의에서 뺍니다. (첫 턴은 앞쪽 단락을 고르게 됩니다)
+        recent = [m["content"] for m in history[-PASSAGE_QUERY_MESSAGES:]] if PASSAGE_QUERY_MESSAGES > 0 else []
+        query = " ".join(recent + ([] if user_input == OPENING_INPUT else [user_input]))
+        context = passage_index.context(poem, query)
+        if context is None:
+            return None
+        return {"role": "system", "content": f"### [관련 단락: '{poem.title}']\n{context}"}
+
+    async def abuild_messages(self, state: AppSessionState, user_input: str) -> List[dict]:
+        """build_messages + 토큰 예산 적용: 예산 밖의 오래된 턴은 롤링 요약으로 대체합니다."""
+        history = [{"role": msg.role, "content": msg.content} for msg in state.shared_chat_history]
+        key = history_window.conversation_key(state.session_id, state.user_name, state.selected_poem.id, history)
+        # 요약이 필요한 턴에는 요약 호출을 기다리는 시간이 이 단계에 들어갑니다.
+        with timed(STAGE_SECONDS, stage="history_window", agent=self.label):
+            summary, window = await history_window.fit(key, history, self.history_token_budget)
+
+        with timed(STAGE_SECONDS, stage="prompt_build", agent=self.label):
+            messages = self.build_messages(state, user_input, history=window, summary=summary)
+        PROMPT_TOKENS.observe(count_message_tokens(messages), agent=self.label)
+        HISTORY_MESSAGES.observe(len(window), agent=self.label)
+        return messages
+
+    async def abuild_messages_within(self, state: AppSessionState, user_input: str) -> Tuple[List[dict], float]:
+        """
+        self.deadline 안에서 abuild_messages 를 실행하고, (메시지, LLM 호출에 남은 시간)을 돌려줍니다.
+        롤링 요약 호출과 다른 튜터의 요약 잠금을 기다리는 시간도 튜터의 제한 시간에 들어가며,
+        넘기면 TimeoutError 를 올립니다.
+        """
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + self.deadline
+        messages = await asyncio.wait_for(self.abuild_messages(state, user_input), timeout=self.deadline)
+        return messages, max(0.0, deadline_at - loop.time())
+
+    def build_messages(self, state: AppSessionState, user_input: str, history: List[dict] = None, summary: str = None) -> List[dict]:
+        """자식의 agent의 지침 + 부모의 공통 지침을 결합합니다. 사용자·턴마다 달라지는 부분은 맨 뒤에 둡니다."""
+        messages = [{"role": "system", "content": self.system_prefix(state)}]
+
+        # 3. 공유 히스토리 주입 (예산 밖으로 밀려난 부분은 요약으로 대신합니다)
+        if summary:
+            messages.append({"role": "system", "content": f"### [이전 대화 요약]\n{summary}"})
+        if history is None:
+            history = [{"role": msg.role, "content": msg.content} for msg in state.shared_chat_history]
+        messages.extend(history)
+
+        # 4. 독자 정보는 대화가 시작된 뒤에만 덧붙입니다.
+        # 첫 턴(히스토리 없음)은 같은 시·같은 수준의 모든 학생에게 동일하므로 응답 캐시를 공유할 수 있습니다.
+        if state.shared_chat_history and state.user_name:
+            messages.append({"role": "system", "content": f"지금 대화 중인 독자의 이름은 {state.user_name}입니다."})
+        # 5. 긴 시는 이번 턴과 관련된 단락만 보냅니다. 턴마다 달라지므로 히스토리 뒤에 둡니다.
+        passages = self.passage_message(state.selected_poem, user_input, history)
+        if passages is not None:
+            messages.append(passages)
         messages.append({"role": "user", "content": user_input})
-        
-        return self._call_llm(messages)
+
+        return messages
 
 # 1. 공감 전문 튜터 (EmpathyAgent)
 class EmpathyAgent(BaseAgent):
+    role = AgentRole.EMPATHY
+    level_field = "emp_state"
+
     def __init__(self):
         super().__init__(role_name="공감 튜터")
 
@@ -91,6 +401,9 @@ class EmpathyAgent(BaseAgent):
 
 # 2. 미학 전문 튜터 (AestheticAgent)
 class AestheticAgent(BaseAgent):
+    role = AgentRole.AESTHETIC
+    level_field = "ase_state"
+
     def __init__(self):
         super().__init__(role_name="미학 튜터")
 
@@ -124,6 +437,9 @@ class AestheticAgent(BaseAgent):
 
 # 3. 해석 전문 튜터 (InterpretiveAgent)
 class InterpretiveAgent(BaseAgent):
+    role = AgentRole.INTERPRETIVE
+    level_field = "int_state"
+
     def __init__(self):
         super().__init__(role_name="해석 튜터")
 
@@ -153,4 +469,96 @@ class InterpretiveAgent(BaseAgent):
         당신은 당신의 특정 전공 분야에 집중하여 대화를 이어갑니다.
         
         **이제 목표로 나아가기 위한 첫 번째 질문을 시작하십시오.**
-        """
\ No newline at end of file
+        """
+
+
+FUSED_FORMAT_INSTRUCTIONS = """
+        ### [출력 형식]
+        - 위 세 튜터가 각자 자기 전공 지침과 영역 경계선에 따라 독자에게 던질 질문을 하나씩 만드십시오.
+        - 세 질문은 서로 독립적이어야 하며, 한 튜터의 질문이 다른 튜터의 영역을 침범하지 않아야 합니다.
+        - 반드시 {"empathy": 공감 튜터의 질문, "aesthetic": 미학 튜터의 질문, "interpretive": 해석 튜터의 질문} 형태의 JSON 객체 하나만 출력하십시오.
+        """
+
+# 구조화된 출력(strict JSON schema): 세 키가 모두 문자열로 들어 있어야 합니다.
+FUSED_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "tutor_questions",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {role.value: {"type": "string"} for role in AgentRole},
+            "required": [role.value for role in AgentRole],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+# 4. 통합 호출 (FusedTutor)
+class FusedTutor(BaseAgent):
+    """
+    세 튜터의 질문을 한 번의 호출로 함께 만듭니다. (fused 모드)
+    공통 지침·시 본문·히스토리를 한 번만 보내므로 입력 토큰과 연결 수가 1/3로 줄어듭니다.
+    프롬프트는 공통 지침 → 시 본문 → 세 튜터의 전공 지침 → 출력 형식 순서이며, 응답은 FusedReply 로 검증합니다.
+    """
+    label = "fused"
+
+    def __init__(self, agents: List[BaseAgent]):
+        self.agents = agents
+        super().__init__(role_name="통합 튜터")
+
+    def system_prefix(self, state: AppSessionState) -> str:
+        poem = state.selected_poem
+        key = (poem.id, poem.title, poem.content) + tuple(agent.level_of(state) for agent in self.agents)
+        prefix = self._prefix_cache.get(key)
+        if prefix is not None:
+            self._prefix_cache.move_to_end(key)
+            return prefix
+
+        common_system_prompt = COMMON_INSTRUCTIONS + self.poem_block(poem)
+        blocks = [
+            f"\n        ## [{agent.role.value}] {agent.role_name}의 지침\n{agent.get_specialized_instructions(state)}"
+            for agent in self.agents
+        ]
+        prefix = common_system_prompt + "".join(blocks) + FUSED_FORMAT_INSTRUCTIONS
+
+        self._prefix_cache[key] = prefix
+        if len(self._prefix_cache) > PREFIX_CACHE_SIZE:
+            self._prefix_cache.popitem(last=False)
+        return prefix
+
+    @staticmethod
+    def parse(content: str) -> Dict[str, str]:
+        """모델 출력을 FusedReply 로 검증해 {역할: 질문} dict 로 바꿉니다. 형식이 틀리면 ValueError 를 올립니다."""
+        try:
+            return FusedReply.model_validate(json.loads(content)).model_dump()
+        except (TypeError, json.JSONDecodeError, ValidationError) as e:
+            raise ValueError(f"통합 응답 형식 오류: {e}") from e
+
+    async def areplies(self, state: AppSessionState, user_input: str, temperature: float = 0.7) -> Dict[str, str]:
+        """
+        세 튜터의 질문을 {"empathy": ..., "aesthetic": ..., "interpretive": ...} 로 반환합니다.
+        검증을 통과한 응답만 캐시합니다. 제한 시간 초과는 TimeoutError, 형식 오류는 ValueError 로 올립니다.
+        """
+        messages, remaining = await self.abuild_messages_within(state, user_input)
+        key = self._cache_key(messages, temperature)
+        cached = await response_cache.aget(key)
+        if cached is not None:
+            return self.parse(cached)
+        with timed(LLM_SECONDS, agent=self.label, call="complete"):
+            response = await scheduler.complete(
+                lambda: self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    response_format=FUSED_RESPONSE_FORMAT
+                ),
+                cost=count_message_tokens(messages),
+                deadline=remaining,
+            )
+        observe_usage(self.label, response.usage)
+        content = response.choices[0].message.content
+        replies = self.parse(content)
+        await response_cache.aset(key, content)
+        return replies
@@ -0,0 +1,62 @@
+﻿"""
+사전 검색 계층별 지연과 single-flight 효과를 로컬 대역 서버로 확인합니다.
+  - 원격(콜드) / 디스크 캐시 / 메모리 캐시 조회 지연
+  - 같은 단어를 동시에 N번 요청했을 때의 원격 호출 수
+
+실행: cd backend && python -m benchmarks.bench_dictionary --latency 0.2
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from benchmarks.fake_dictionary import FakeDictionaryServer
+
+
+async def _timed(coro):
+    started = time.perf_counter()
+    result = await coro
+    return result, (time.perf_counter() - started) * 1000
+
+
+async def run(latency: float, fanout: int, tmp: str):
+    from services.dictionary import DictionaryService
+
+    db = os.path.join(tmp, "dict.db")
+    service = DictionaryService(cache_db=db)
+    senses, cold = await _timed(service.asearch_word("나무"))
+    _, memory = await _timed(service.asearch_word("나무"))
+    await service.aclose()
+
+    # 새 프로세스를 흉내 내어 메모리 캐시 없이 디스크만 남깁니다.
+    service = DictionaryService(cache_db=db)
+    _, disk = await _timed(service.asearch_word("나무"))
+    print(f"원격 {cold:7.1f}ms   디스크 {disk:6.2f}ms   메모리 {memory:6.3f}ms   (뜻풀이 {len(senses)}개)")
+
+    before = service.remote_calls
+    results, elapsed = await _timed(asyncio.gather(*(service.asearch_word("바람") for _ in range(fanout))))
+    print(f"동시 요청 {fanout}회 -> 원격 호출 {service.remote_calls - before}회, {elapsed:.1f}ms")
+    await service.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--fanout", type=int, default=50)
+    args = parser.parse_args()
+
+    server = FakeDictionaryServer(latency=args.latency)
+    os.environ["OPENDICT_BASE_URL"] = server.start()
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(args.latency, args.fanout, tmp))
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+﻿"""
+사전 응답 XML 파싱 방식 비교: 본문 전체를 받아 ET.fromstring 으로 파싱(이전 방식) vs SenseParser 증분 파싱.
+큰 응답 픽스처(render_xml)로 파싱 시간과 tracemalloc 최대 메모리를 재고,
+로컬 대역 서버로 원격 조회 한 번의 지연도 비교합니다.
+
+실행: cd backend && python -m benchmarks.bench_dictionary_parse --items 100 2000 20000
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from benchmarks.fake_dictionary import FakeDictionaryServer, render_xml
+from services.dictionary import DictionaryService, SenseParser
+
+CHUNK = 16384
+
+
+def parse_buffered(content: bytes, limit: int):
+    """이전 DictionaryService._parse 와 같은 방식입니다."""
+    root = ET.fromstring(content)
+    results = []
+    for item in root.findall(".//item"):
+        word_text = item.find("word").text
+        for sense in item.findall("sense"):
+            results.append({
+                "word": word_text,
+                "definition": sense.find("definition").text,
+                "pos": sense.find("pos").text if sense.find("pos") is not None else "N/A",
+                "category": sense.find("cat").text if sense.find("cat") is not None else ""
+            })
+            if len(results) >= limit:
+                return results
+    return results
+
+
+def parse_streaming(content: bytes, limit: int):
+    parser = SenseParser(limit)
+    for start in range(0, len(content), CHUNK):
+        if parser.feed(content[start:start + CHUNK]):
+            break
+    return parser.close()
+
+
+def measure(fn, content: bytes, limit: int, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(content, limit)
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+
+    tracemalloc.start()
+    result = fn(content, limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(result), elapsed, peak / 1024
+
+
+async def remote(items: int, senses: int, limit: int):
+    server = FakeDictionaryServer(latency=0, items=items, senses=senses)
+    base_url = server.start()
+    service = DictionaryService(cache_db=None)
+    service.base_url = base_url
+    async with httpx.AsyncClient() as client:
+        for name, fetch in (
+            ("전체 수신", lambda: client.get(base_url, params={"q": "나무"})),
+            ("증분 파싱", lambda: service._fetch("나무", limit)),
+        ):
+            await fetch()  # 연결 준비
+            started = time.perf_counter()
+            for _ in range(5):
+                result = await fetch()
+                if isinstance(result, httpx.Response):
+                    parse_buffered(result.content, limit)
+            print(f"  원격 {name}: {(time.perf_counter() - started) / 5 * 1000:8.1f}ms")
+    await service.aclose()
+    server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, nargs="+", default=[100, 2000, 20000])
+    parser.add_argument("--senses", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for items in args.items:
+        content = render_xml("나무", items, args.senses)
+        print(f"[item {items}개, 본문 {len(content) / 1024:,.0f}KB]")
+        for limit in (args.limit, items * args.senses):
+            for name, fn in (("fromstring", parse_buffered), ("SenseParser", parse_streaming)):
+                count, elapsed, peak = measure(fn, content, limit, args.repeat)
+                print(f"  limit={limit:<7} {name:<12} 뜻풀이 {count:6}개  {elapsed:8.2f}ms  최대 메모리 {peak:10,.0f}KB")
+        asyncio.run(remote(items, args.senses, args.limit))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+﻿"""
+한 턴의 세 질문을 만드는 두 방식을 비교합니다.
+  - multi: 튜터마다 따로 호출 (3회, 공통 지침·시 본문·히스토리를 세 번 보냄)
+  - fused: FusedTutor 한 번 호출로 JSON 에 세 질문을 함께 받음
+가짜 모델은 프롬프트 토큰과 생성 토큰 수에 비례해 느려지도록 설정합니다.
+
+실행: cd backend && python -m benchmarks.bench_fused --turns 100 --history 12
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.bench_llm_client import _state
+
+
+def _with_history(turns: int):
+    from schemas import Message
+    state = _state()
+    state.user_name = "학생"
+    state.shared_chat_history = [
+        Message(role="assistant" if i % 2 == 0 else "user",
+                content=f"{i}번째 발화입니다. 시의 화자가 하늘을 우러러보는 장면에서 느낀 감정을 이야기합니다.")
+        for i in range(turns)
+    ]
+    return state
+
+
+async def _run(turn, turns: int, concurrency: int):
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(n: int):
+        async with gate:
+            started = time.perf_counter()
+            await turn(n)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(n) for n in range(turns)))
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--history", type=int, default=12, help="공유 히스토리 메시지 수")
+    parser.add_argument("--tokens", type=int, default=60, help="질문 하나의 생성 토큰 수")
+    parser.add_argument("--latency", type=float, default=0.15, help="호출당 고정 지연(초)")
+    parser.add_argument("--per-prompt-token", type=float, default=0.00005)
+    parser.add_argument("--per-completion-token", type=float, default=0.01)
+    args = parser.parse_args()
+
+    os.environ["RESPONSE_CACHE_SIZE"] = "0"
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    server = FakeOpenAIServer(latency=args.latency, tokens=args.tokens, per_prompt_token=args.per_prompt_token,
+                              per_completion_token=args.per_completion_token)
+    os.environ["OPENAI_BASE_URL"] = server.start()
+
+    from agents import EmpathyAgent, AestheticAgent, InterpretiveAgent, FusedTutor
+
+    agents = [EmpathyAgent(), AestheticAgent(), InterpretiveAgent()]
+    fused = FusedTutor(agents)
+    state = _with_history(args.history)
+
+    async def multi_turn(n: int):
+        await asyncio.gather(*(agent.aget_response(state, f"{n}번째 입력") for agent in agents))
+
+    async def fused_turn(n: int):
+        await fused.areplies(state, f"{n}번째 입력")
+
+    print(f"turns={args.turns} concurrency={args.concurrency} history={args.history} "
+          f"질문당 {args.tokens}토큰, 생성 토큰당 {args.per_completion_token * 1000:.0f}ms")
+    for name, turn in (("multi", multi_turn), ("fused", fused_turn)):
+        requests, prompt, completion = server.request_count, server.prompt_tokens, server.completion_tokens
+        latencies = asyncio.run(_run(turn, args.turns, args.concurrency))
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"{name:<6} 턴당 요청 {(server.request_count - requests) / args.turns:3.1f}회  "
+              f"입력 {(server.prompt_tokens - prompt) / args.turns:7.0f}토큰  출력 {(server.completion_tokens - completion) / args.turns:5.0f}토큰   "
+              f"p50={statistics.median(latencies) * 1000:7.1f}ms  p95={p95 * 1000:7.1f}ms")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+﻿"""
+긴 대화(기본 50턴)에서 히스토리 토큰 예산 적용 전/후의 프롬프트 토큰 수와 턴 지연을 비교합니다.
+가짜 LLM은 프롬프트 토큰 수에 비례해 느려지도록 설정됩니다.
+
+실행: cd backend && python -m benchmarks.bench_history_window --turns 50 --budget 1500
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from benchmarks.fake_openai import FakeOpenAIServer
+
+ANSWER = "화자가 별을 노래하는 마음으로 모든 죽어가는 것을 사랑하겠다고 말하는 부분에서 저도 누군가를 아끼던 기억이 떠올랐어요. "
+
+
+async def run_session(agent, turns: int, budget: int, session_id: str):
+    from schemas import AppSessionState, Poem, Message
+    from services.tokenizer import count_message_tokens
+
+    agent.history_token_budget = budget
+    poem = Poem(id=1, title="서시", author="윤동주", content="죽는 날까지 하늘을 우러러 한 점 부끄럼이 없기를")
+    state = AppSessionState(user_name="학생", selected_poem=poem, session_id=session_id)
+    rows = []
+    for turn in range(1, turns + 1):
+        started = time.perf_counter()
+        messages = await agent.abuild_messages(state, ANSWER)
+        reply = await agent._acall_llm(messages)
+        elapsed = time.perf_counter() - started
+        rows.append((turn, count_message_tokens(messages), elapsed))
+        state.shared_chat_history.extend([Message(role="assistant", content=reply), Message(role="user", content=ANSWER)])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--budget", type=int, default=1500)
+    parser.add_argument("--per-token", type=float, default=0.0002, help="프롬프트 토큰당 가짜 LLM 추가 지연(초)")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(latency=0.05, tokens=60, per_prompt_token=args.per_token)
+    os.environ["OPENAI_BASE_URL"] = server.start()
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ["RESPONSE_CACHE_SIZE"] = "0"
+
+    from agents import EmpathyAgent
+    agent = EmpathyAgent()
+
+    full = asyncio.run(run_session(agent, args.turns, 0, "bench-full"))
+    windowed = asyncio.run(run_session(agent, args.turns, args.budget, "bench-windowed"))
+
+    print(f"{'turn':>4} | {'full tokens':>11} {'full ms':>8} | {'window tokens':>13} {'window ms':>9}")
+    for (turn, f_tokens, f_time), (_, w_tokens, w_time) in zip(full, windowed):
+        if turn == 1 or turn % 10 == 0:
+            print(f"{turn:>4} | {f_tokens:>11} {f_time * 1000:>8.1f} | {w_tokens:>13} {w_time * 1000:>9.1f}")
+    print(f"LLM 호출 수(요약 포함): {server.request_count}")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+﻿"""
+스레드 기반 경로(에이전트마다 동기 OpenAI 클라이언트 + asyncio.to_thread)와
+공유 비동기 클라이언트 경로(BaseAgent.aget_response)의 처리량을 비교합니다.
+
+실행: cd backend && python -m benchmarks.bench_llm_client --turns 300 --latency 0.3
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from benchmarks.fake_openai import FakeOpenAIServer
+
+
+def _state():
+    from schemas import AppSessionState, Poem
+    poem = Poem(id=1, title="서시", author="윤동주", content="죽는 날까지 하늘을 우러러 한 점 부끄럼이 없기를")
+    return AppSessionState(user_name="학생", selected_poem=poem)
+
+
+async def _run(turn, turns: int, concurrency: int):
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with gate:
+            started = time.perf_counter()
+            await turn()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(turns)))
+    elapsed = time.perf_counter() - started
+    return elapsed, latencies
+
+
+def _report(name: str, turns: int, elapsed: float, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<8} {turns / elapsed:8.1f} turns/s   p50={statistics.median(latencies) * 1000:7.1f}ms   p95={p95 * 1000:7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=100, help="동시에 진행 중인 대화 턴 수")
+    parser.add_argument("--latency", type=float, default=0.3, help="가짜 LLM 응답 지연(초)")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(latency=args.latency)
+    os.environ["OPENAI_BASE_URL"] = server.start()
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+    from openai import OpenAI
+    from agents import EmpathyAgent, AestheticAgent, InterpretiveAgent
+
+    state = _state()
+    user_input = "시를 선택했어."
+    agents = [EmpathyAgent(), AestheticAgent(), InterpretiveAgent()]
+
+    # 기존 방식: 에이전트마다 자기 동기 클라이언트를 두고 기본 스레드 풀에서 실행합니다.
+    threaded = [EmpathyAgent(), AestheticAgent(), InterpretiveAgent()]
+    for agent in threaded:
+        agent.client = OpenAI()
+
+    async def threaded_turn():
+        await asyncio.gather(*(asyncio.to_thread(a.get_response, state, user_input) for a in threaded))
+
+    async def async_turn():
+        await asyncio.gather(*(a.aget_response(state, user_input) for a in agents))
+
+    print(f"turns={args.turns} concurrency={args.concurrency} latency={args.latency}s")
+    for name, turn in [("thread", threaded_turn), ("async", async_turn)]:
+        elapsed, latencies = asyncio.run(_run(turn, args.turns, args.concurrency))
+        _report(name, args.turns, elapsed, latencies)
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
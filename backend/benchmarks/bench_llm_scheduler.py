@@ -0,0 +1,95 @@
+﻿"""
+LLM 스케줄러(재시도·헤지·제한 시간)를 429와 꼬리 지연을 섞어 내는 가짜 서버로 확인합니다.
+설정별로 대화 턴(세 튜터 동시 호출)의 성공률, 시간 초과 수, p50/p95/p99 지연, 서버가 받은 요청 수를 비교합니다.
+
+실행: cd backend && python -m benchmarks.bench_llm_scheduler --turns 200 --error-rate 0.2 --slow-rate 0.05
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.bench_llm_client import _state
+
+
+def _percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def _run(agents, turns: int, concurrency: int):
+    state = _state()
+    gate = asyncio.Semaphore(concurrency)
+    latencies, outcomes = [], {"ok": 0, "error": 0, "timeout": 0}
+
+    async def reply(agent, n: int):
+        try:
+            # 턴마다 입력이 달라 응답 캐시에 걸리지 않습니다.
+            text = await agent.aget_response(state, f"{n}번째 턴의 답변입니다.")
+            outcomes["error" if agent.is_error(text) else "ok"] += 1
+        except asyncio.TimeoutError:
+            outcomes["timeout"] += 1
+
+    async def turn(n: int):
+        async with gate:
+            started = time.perf_counter()
+            await asyncio.gather(*(reply(agent, n) for agent in agents))
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(turn(n) for n in range(turns)))
+    return latencies, outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="가짜 LLM 기본 응답 지연(초)")
+    parser.add_argument("--error-rate", type=float, default=0.2, help="429 로 거절할 요청 비율")
+    parser.add_argument("--retry-after", type=float, default=0.2)
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="아주 느리게 답할 요청 비율")
+    parser.add_argument("--slow-latency", type=float, default=3.0)
+    args = parser.parse_args()
+
+    os.environ["RESPONSE_CACHE_SIZE"] = "0"
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    server = FakeOpenAIServer(latency=args.latency, error_rate=args.error_rate, retry_after=args.retry_after,
+                              slow_rate=args.slow_rate, slow_latency=args.slow_latency, seed=7)
+    os.environ["OPENAI_BASE_URL"] = server.start()
+
+    import agents as agents_module
+    from llm_scheduler import LLMScheduler
+    from agents import EmpathyAgent, AestheticAgent, InterpretiveAgent
+
+    configs = [
+        ("재시도 없음", dict(max_attempts=1), 30.0),
+        ("재시도", dict(max_attempts=4), 30.0),
+        ("재시도+헤지", dict(max_attempts=4, hedge_after=args.latency * 3), 30.0),
+        ("재시도+헤지+1.5s", dict(max_attempts=4, hedge_after=args.latency * 3), 1.5),
+    ]
+    print(f"turns={args.turns} concurrency={args.concurrency} 429={args.error_rate:.0%} "
+          f"느린 응답={args.slow_rate:.0%}(+{args.slow_latency}s)")
+    for name, options, deadline in configs:
+        agents_module.scheduler = LLMScheduler(seed=0, **options)
+        agents = [EmpathyAgent(), AestheticAgent(), InterpretiveAgent()]
+        for agent in agents:
+            agent.deadline = deadline
+        before = server.request_count
+        latencies, outcomes = asyncio.run(_run(agents, args.turns, args.concurrency))
+        total = sum(outcomes.values())
+        stats = agents_module.scheduler.stats()
+        print(f"{name:<14} 성공 {outcomes['ok'] / total:6.1%}  오류 {outcomes['error']:4}  시간초과 {outcomes['timeout']:4}   "
+              f"p50={_percentile(latencies, 0.5) * 1000:7.0f}ms  p95={_percentile(latencies, 0.95) * 1000:7.0f}ms  "
+              f"p99={_percentile(latencies, 0.99) * 1000:7.0f}ms   요청 {server.request_count - before:5} "
+              f"(재시도 {stats['retries']}, 헤지 {stats['hedges']})")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+﻿"""
+긴 시에서 전문 대신 관련 단락만 보낼 때의 프롬프트 크기와 단락 선택 비용을 잽니다.
+데이터셋의 긴 시마다 (첫 턴, 학생이 임의의 단락 한 구절을 인용한 턴)의 세 튜터 입력 토큰 합을
+전문 방식과 비교하고, 인용한 단락이 선택되었는지(적중률)도 셉니다. LLM 은 호출하지 않습니다.
+
+실행: python backend/benchmarks/bench_passages.py  (저장소 루트에서; 데이터셋 경로가 상대 경로입니다)
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+import agents as agents_module
+from agents import EmpathyAgent, AestheticAgent, InterpretiveAgent, OPENING_INPUT
+from preload import load_dataset
+from schemas import AppSessionState, Message
+from services.passages import PassageIndex, passage_index
+from services.tokenizer import count_message_tokens
+
+
+def turn_tokens(agents, state: AppSessionState, user_input: str) -> int:
+    return sum(count_message_tokens(agent.build_messages(state, user_input)) for agent in agents)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    loader, catalog, _ = load_dataset()
+    segments = loader.load_segments()
+    started = time.perf_counter()
+    PassageIndex().build(segments)
+    print(f"단락 색인 구축: {(time.perf_counter() - started) * 1000:.1f}ms, {passage_index.stats()}")
+
+    long_poems = [poem for poem in catalog.poems if not passage_index.is_whole(poem)]
+    whole_index = PassageIndex(whole_tokens=10 ** 9).build(segments)
+    cases = []
+    for poem in long_poems:
+        passages = passage_index.get(poem)
+        target = rng.randrange(len(passages.texts))
+        text = passages.texts[target]
+        start = rng.randrange(max(1, len(text) - 40))
+        cases.append((poem, target, f"'{text[start:start + 40]}' 이 부분이 마음에 남아요."))
+
+    history = [Message(role="assistant", content="어떤 구절이 가장 마음에 남았나요?")]
+    for name, index in (("전문", whole_index), ("관련 단락", passage_index)):
+        agents_module.passage_index = index
+        agents = [EmpathyAgent(), AestheticAgent(), InterpretiveAgent()]
+        opening = quoted = 0
+        for poem, _, answer in cases:
+            opening += turn_tokens(agents, AppSessionState(selected_poem=poem), OPENING_INPUT)
+            quoted += turn_tokens(agents, AppSessionState(selected_poem=poem, shared_chat_history=history), answer)
+        print(f"{name:<8} 긴 시 {len(cases)}편 평균 입력 토큰(세 튜터 합): 첫 턴 {opening / len(cases):7.0f}  "
+              f"인용 턴 {quoted / len(cases):7.0f}")
+    agents_module.passage_index = passage_index
+
+    hits = 0
+    started = time.perf_counter()
+    for poem, target, answer in cases:
+        passages = passage_index.get(poem)
+        hits += target in passages.select(answer, passage_index.budget)
+    elapsed = (time.perf_counter() - started) / len(cases) * 1000
+    print(f"인용한 단락 선택 적중률 {hits / len(cases):.0%}, 선택 1회 {elapsed:.3f}ms "
+          f"(예산 {passage_index.budget} 토큰, 전문 기준 {passage_index.whole_tokens} 토큰)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+﻿"""
+PoemLoader 의 콜드 스타트 시간을 캐시 없음(pandas 파싱) / 캐시 있음 두 경우로 측정합니다.
+각 측정은 새 파이썬 프로세스에서 실행하므로 import 비용까지 포함됩니다.
+
+실행: cd backend && python -m benchmarks.bench_poem_cache --runs 5
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(os.path.dirname(BACKEND_DIR), "data", "KPoEM_poem_dataset_v4.tsv")
+
+CHILD = r"""
+import sys, time, json
+started = time.perf_counter()
+from services.poem_loader import PoemLoader
+imported = time.perf_counter()
+poems = PoemLoader(sys.argv[1], cache_path=sys.argv[2] or None).load()
+loaded = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "load_ms": (loaded - imported) * 1000,
+    "pandas": "pandas" in sys.modules,
+}))
+"""
+
+
+def _run(cache_path: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, DATA_PATH, cache_path],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, "poems.cache.pkl")
+        _run(cache_path)  # 캐시 생성
+
+        for name, path in [("캐시 없음", ""), ("캐시 사용", cache_path)]:
+            results = [_run(path) for _ in range(args.runs)]
+            import_ms = statistics.median(r["import_ms"] for r in results)
+            load_ms = statistics.median(r["load_ms"] for r in results)
+            print(f"{name}: import {import_ms:7.1f}ms  load {load_ms:7.1f}ms  합계 {import_ms + load_ms:7.1f}ms  pandas 로드={results[0]['pandas']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+﻿"""
+동시 프로필 저장/조회 요청에서 기존 방식(요청마다 sqlite3.connect, 이벤트 루프에서 블로킹 호출)과
+ProfileRepository(연결 풀 + WAL + 스레드 실행 + 쓰기 배치)를 비교합니다.
+이벤트 루프 지연(lag)은 1ms 간격 타이머가 실제로 얼마나 늦게 깨어났는지로 측정합니다.
+
+실행: cd backend && python -m benchmarks.bench_profile_store --requests 2000 --users 300
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import asyncio
+import argparse
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from services.profile_repository import ProfileRepository
+
+
+class LegacyProfiles:
+    """main.py 에 있던 기존 구현을 그대로 옮긴 것입니다."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        conn = sqlite3.connect(db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS user_profiles (
+                user_name TEXT PRIMARY KEY,
+                emp_state INTEGER DEFAULT 1,
+                ase_state INTEGER DEFAULT 1,
+                int_state INTEGER DEFAULT 1,
+                last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    async def save(self, user_name, emp_state, ase_state, int_state):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            INSERT INTO user_profiles (user_name, emp_state, ase_state, int_state, last_updated)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(user_name) DO UPDATE SET
+                emp_state=excluded.emp_state,
+                ase_state=excluded.ase_state,
+                int_state=excluded.int_state,
+                last_updated=CURRENT_TIMESTAMP
+        """, (user_name, emp_state, ase_state, int_state))
+        conn.commit()
+        conn.close()
+
+    async def get(self, user_name):
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            "SELECT emp_state, ase_state, int_state FROM user_profiles WHERE user_name = ?", (user_name,)
+        ).fetchone()
+        conn.close()
+        return row
+
+
+async def _drive(store, requests: int, users: int, seed: int = 0):
+    rng = random.Random(seed)
+    lags = []
+    running = True
+
+    async def ticker():
+        while running:
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - started - 0.001)
+
+    async def one(i):
+        name = f"student{rng.randrange(users)}"
+        if i % 2 == 0:
+            await store.save(name, rng.randint(1, 6), rng.randint(1, 6), rng.randint(1, 6))
+        else:
+            await store.get(name)
+
+    tick = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    running = False
+    await tick
+    return elapsed, max(lags) if lags else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = LegacyProfiles(os.path.join(tmp, "legacy.db"))
+        repo = ProfileRepository(os.path.join(tmp, "repo.db"))
+        repo.init_db()
+
+        for name, store in [("legacy", legacy), ("repository", repo)]:
+            elapsed, max_lag = asyncio.run(_drive(store, args.requests, args.users))
+            print(f"{name:<10} {args.requests / elapsed:9.0f} req/s   총 {elapsed * 1000:8.1f}ms   최대 루프 지연 {max_lag * 1000:7.1f}ms")
+        repo.close()
+
+
+if __name__ == "__main__":
+    main()
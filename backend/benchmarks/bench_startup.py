@@ -0,0 +1,122 @@
+﻿"""
+백엔드 시작 시간을 잽니다.
+  1) python -X importtime 으로 main 을 불러오는 시간을 재고, 최상위 패키지별(자체 시간 합)과
+     main 이 직접 불러오는 모듈별(누적 시간)로 나눠 보여줍니다.
+  2) 백엔드를 실제로 띄워 /healthz 가 처음 응답하기까지(연결 수락), /readyz 가 200 이 되기까지(워밍업 완료),
+     그 뒤 첫 /api/poems 응답까지의 시간을 잽니다.
+--runs 번 반복해 중앙값을 냅니다.
+
+실행: cd backend && python -m benchmarks.bench_startup --runs 5 --top 15
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from collections import defaultdict
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from benchmarks.loadtest import DATA_DIR, _free_port
+
+
+def import_profile(workdir: str, env: dict):
+    """main 을 import 하는 동안의 -X importtime 출력을 (모듈, 깊이, 자체 μs, 누적 μs) 목록으로 돌려줍니다."""
+    code = f"import sys; sys.path.insert(0, {BACKEND_DIR!r}); import main"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def time_to_ready(workdir: str, env: dict, timeout: float = 120.0):
+    """(healthz 첫 응답, readyz 200, 첫 /api/poems 응답)까지 걸린 시간(초)을 돌려줍니다."""
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", BACKEND_DIR, "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL,
+    )
+    marks = {}
+    try:
+        with httpx.Client(base_url=base_url, timeout=timeout) as client:
+            for path, key in (("/healthz", "healthz"), ("/readyz", "readyz")):
+                while True:
+                    if process.poll() is not None:
+                        raise RuntimeError("백엔드가 시작 중에 종료되었습니다.")
+                    if time.perf_counter() - started > timeout:
+                        raise RuntimeError(f"{timeout:.0f}초 안에 {path} 가 응답하지 않았습니다.")
+                    try:
+                        if client.get(path).status_code == 200:
+                            marks[key] = time.perf_counter() - started
+                            break
+                    except httpx.TransportError:
+                        pass
+                    time.sleep(0.005)
+            client.get("/api/poems", params={"limit": 1})
+            marks["first_request"] = time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return marks
+
+
+def _median(values):
+    return statistics.median(values) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="출력할 모듈 수")
+    args = parser.parse_args()
+
+    env = {**os.environ, "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "bench")}
+    totals, packages, direct = [], defaultdict(list), defaultdict(list)
+    readiness = defaultdict(list)
+    for _ in range(args.runs):
+        # SQLite 파일이 저장소에 생기지 않도록 임시 폴더에서 실행합니다.
+        with tempfile.TemporaryDirectory() as workdir:
+            os.symlink(DATA_DIR, os.path.join(workdir, "data"))
+            rows = import_profile(workdir, env)
+            by_package = defaultdict(int)
+            for name, depth, self_us, cumulative_us in rows:
+                by_package[name.split(".")[0]] += self_us
+                if depth == 1:
+                    direct[name].append(cumulative_us)
+                if depth == 0 and name == "main":
+                    totals.append(cumulative_us)
+            for name, value in by_package.items():
+                packages[name].append(value)
+            for key, value in time_to_ready(workdir, env).items():
+                readiness[key].append(value)
+
+    print(f"import main: {_median(totals) / 1000:8.1f}ms (중앙값, {args.runs}회)")
+    print(f"\n[최상위 패키지별 자체 시간 합 상위 {args.top}]")
+    for name, values in sorted(packages.items(), key=lambda item: -_median(item[1]))[:args.top]:
+        print(f"  {name:<28} {_median(values) / 1000:8.1f}ms")
+    print(f"\n[main 이 직접 불러오는 모듈별 누적 시간 상위 {args.top}]")
+    for name, values in sorted(direct.items(), key=lambda item: -_median(item[1]))[:args.top]:
+        print(f"  {name:<28} {_median(values) / 1000:8.1f}ms")
+    print("\n[프로세스 시작부터]")
+    for key, label in (("healthz", "/healthz 첫 응답"), ("readyz", "/readyz 200 (워밍업 완료)"),
+                       ("first_request", "첫 /api/poems 응답")):
+        print(f"  {label:<24} {_median(readiness[key]) * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+﻿"""
+우리말샘 검색 API(XML)의 로컬 대역입니다. 단어마다 뜻풀이 senses 개를 돌려줍니다.
+fail 을 지정하면 그 방식으로 실패합니다. (테스트용)
+  - "api_error": HTTP 200 + <error> 본문 (잘못된 인증키 등, 실제 API와 같은 형태)
+  - "http_error": HTTP 500
+  - "malformed": 중간에 끊긴 XML
+missing 에 든 단어는 검색 결과가 없는(item 0개) 응답을 돌려줍니다.
+known 을 주면 실제 사전처럼 그 단어들만 결과가 있고 나머지는 결과가 없습니다.
+"""
+import time
+import random
+import socket
+import asyncio
+import threading
+from typing import Iterable, List, Optional
+from xml.sax.saxutils import escape
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+
+def render_xml(word: str, items: int = 1, senses: int = 3) -> bytes:
+    """opendict 응답과 같은 구조의 XML을 만듭니다."""
+    parts = [f'<?xml version="1.0" encoding="UTF-8"?><channel><title>우리말샘</title><total>{items}</total>']
+    for i in range(items):
+        parts.append(f"<item><target_code>{1000 + i}</target_code><word>{escape(word)}</word>")
+        for j in range(senses):
+            parts.append(
+                f"<sense><definition>{escape(word)}의 {i + 1}-{j + 1}번째 뜻풀이입니다. 시에서 쓰인 의미를 설명합니다.</definition>"
+                f"<pos>명사</pos><cat>문학</cat><type>일반어</type></sense>"
+            )
+        parts.append("</item>")
+    parts.append("</channel>")
+    return "".join(parts).encode("utf-8")
+
+
+def render_error(code: str = "020", message: str = "등록되지 않은 인증키입니다.") -> bytes:
+    return (f'<?xml version="1.0" encoding="UTF-8"?><error><error_code>{code}</error_code>'
+            f"<message>{escape(message)}</message></error>").encode("utf-8")
+
+
+class FakeDictionaryServer:
+    def __init__(self, latency: float = 0.1, items: int = 1, senses: int = 3, sigma: float = 0.0, seed: int = 0,
+                 fail: Optional[str] = None, missing: Iterable[str] = (), known: Optional[Iterable[str]] = None):
+        self.latency = latency
+        # sigma > 0 이면 지연에 평균이 1인 로그정규 분포 배수를 곱합니다.
+        self.sigma = sigma
+        self.random = random.Random(seed)
+        self.items = items
+        self.senses = senses
+        self.fail = fail
+        self.missing = set(missing)
+        self.known = set(known) if known is not None else None
+        self.request_count = 0
+        self.queries: List[str] = []
+        self.base_url = None
+        self._server = None
+        self._thread = None
+
+    async def _search(self, request: Request):
+        self.request_count += 1
+        delay = self.latency
+        if self.sigma:
+            delay *= self.random.lognormvariate(-self.sigma ** 2 / 2, self.sigma)
+        await asyncio.sleep(delay)
+        word = request.query_params.get("q", "")
+        self.queries.append(word)
+        if self.fail == "api_error":
+            return Response(render_error(), media_type="application/xml")
+        if self.fail == "http_error":
+            return Response(b"internal error", status_code=500)
+        found = word not in self.missing and (self.known is None or word in self.known)
+        body = render_xml(word, self.items if found else 0, self.senses)
+        if self.fail == "malformed":
+            body = body[:len(body) // 2]
+        return Response(body, media_type="application/xml")
+
+    def start(self) -> str:
+        app = Starlette(routes=[Route("/api/search", self._search)])
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+        self._server = uvicorn.Server(uvicorn.Config(app, log_level="warning", backlog=4096))
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [sock]}, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        self.base_url = f"http://127.0.0.1:{port}/api/search"
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=5)
@@ -0,0 +1,176 @@
+﻿"""
+벤치마크용 OpenAI 호환 가짜 서버입니다.
+/v1/chat/completions 만 구현하며, 지연 시간과 응답 길이를 설정할 수 있습니다.
+오류율(429/5xx, Retry-After)과 가끔 아주 느린 응답(꼬리 지연)도 흉내 낼 수 있습니다.
+테스트에서는 fail_first/slow_first 로 처음 몇 요청만 거절하거나 늦게 답하게 해 결과를 고정합니다.
+response_format 으로 JSON 출력을 요청하면 schema 의 속성마다 tokens 개 토큰짜리 문자열을 채운 JSON 을 돌려줍니다.
+실제 gpt-4o 비용 없이 클라이언트/서버 경로의 처리량을 측정하는 데 사용합니다.
+"""
+import json
+import time
+import random
+import socket
+import asyncio
+import threading
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+
+class FakeOpenAIServer:
+    def __init__(self, latency: float = 0.2, jitter: float = 0.0, sigma: float = 0.0, tokens: int = 20, seed: int = 0,
+                 per_prompt_token: float = 0.0, per_completion_token: float = 0.0, error_rate: float = 0.0, error_status: int = 429,
+                 retry_after: float = None, slow_rate: float = 0.0, slow_latency: float = 5.0,
+                 fail_first: int = 0, slow_first: int = 0):
+        self.latency = latency
+        # 프롬프트가 길수록 느려지는 실제 모델을 흉내 냅니다. (프롬프트 토큰당 추가 지연, 초)
+        self.per_prompt_token = per_prompt_token
+        # 출력이 길수록 느려지는 디코딩 시간을 흉내 냅니다. (생성 토큰당 추가 지연, 초)
+        self.per_completion_token = per_completion_token
+        self.jitter = jitter
+        # sigma > 0 이면 기본 지연에 평균이 1인 로그정규 분포 배수를 곱합니다. (실제 API처럼 오른쪽 꼬리가 긴 분포)
+        self.sigma = sigma
+        self.tokens = tokens
+        self.random = random.Random(seed)
+        # 요청의 error_rate 비율은 error_status 로 거절하고, slow_rate 비율은 slow_latency 초 더 늦게 답합니다.
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        # 처음 fail_first 개 요청은 항상 error_status 로 거절하고, 처음 slow_first 개 요청은 항상 slow_latency 초 늦게 답합니다.
+        self.fail_first = fail_first
+        self.slow_first = slow_first
+        self.request_count = 0
+        # 요청이 도착한 시각(time.monotonic)입니다. 재시도 간격을 확인하는 데 씁니다.
+        self.request_times = []
+        self.error_count = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.base_url = None
+        self._server = None
+        self._thread = None
+
+    # --- 응답 생성 ---
+    def _delay(self, body: dict, number: int) -> float:
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if self.sigma:
+            delay *= self.random.lognormvariate(-self.sigma ** 2 / 2, self.sigma)
+        usage = self._usage(body)
+        delay += self.per_prompt_token * usage["prompt_tokens"]
+        delay += self.per_completion_token * usage["completion_tokens"]
+        if number <= self.slow_first or (self.slow_rate and self.random.random() < self.slow_rate):
+            delay += self.slow_latency
+        return max(0.0, delay)
+
+    @staticmethod
+    def _json_keys(body: dict):
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            return list(response_format["json_schema"]["schema"]["properties"])
+        if response_format.get("type") == "json_object":
+            return ["content"]
+        return None
+
+    def _usage(self, body: dict) -> dict:
+        prompt_chars = sum(len(m.get("content") or "") for m in body.get("messages", []))
+        completion_tokens = self.tokens * len(self._json_keys(body) or [None])
+        return {
+            "prompt_tokens": prompt_chars // 2,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_chars // 2 + completion_tokens,
+        }
+
+    def _content(self, body: dict) -> str:
+        text = "".join(f"토큰{i} " for i in range(self.tokens))
+        keys = self._json_keys(body)
+        if keys is None:
+            return text
+        return json.dumps({key: text for key in keys}, ensure_ascii=False)
+
+    async def _completions(self, request: Request):
+        body = await request.json()
+        self.request_count += 1
+        number = self.request_count
+        self.request_times.append(time.monotonic())
+        if number <= self.fail_first or (self.error_rate and self.random.random() < self.error_rate):
+            self.error_count += 1
+            headers = {"retry-after": str(self.retry_after)} if self.retry_after is not None else {}
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached (fake)", "type": "rate_limit_error", "code": None}},
+                status_code=self.error_status, headers=headers,
+            )
+        words = [f"토큰{i} " for i in range(self.tokens)]
+        created = int(time.time())
+        usage = self._usage(body)
+        self.prompt_tokens += usage["prompt_tokens"]
+        self.completion_tokens += usage["completion_tokens"]
+
+        if not body.get("stream"):
+            await asyncio.sleep(self._delay(body, number))
+            return JSONResponse({
+                "id": f"chatcmpl-fake-{self.request_count}",
+                "object": "chat.completion",
+                "created": created,
+                "model": body.get("model", "fake"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": self._content(body)},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+        async def events():
+            # 첫 토큰까지 전체 지연의 절반, 나머지는 토큰마다 고르게 나눠 보냅니다.
+            delay = self._delay(body, number)
+            await asyncio.sleep(delay / 2)
+            step = (delay / 2) / max(1, len(words))
+            for word in words:
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                await asyncio.sleep(step)
+            if (body.get("stream_options") or {}).get("include_usage"):
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": body.get("model", "fake"),
+                    "choices": [],
+                    "usage": usage,
+                }
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    # --- 서버 수명 ---
+    def start(self) -> str:
+        app = Starlette(routes=[Route("/v1/chat/completions", self._completions, methods=["POST"])])
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+        config = uvicorn.Config(app, log_level="warning", backlog=4096)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [sock]}, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        self.base_url = f"http://127.0.0.1:{port}/v1"
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=5)
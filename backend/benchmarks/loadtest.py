@@ -0,0 +1,285 @@
+﻿"""
+교실 규모 부하 테스트입니다. 실제 gpt-4o·우리말샘 대신 로컬 가짜 서버를 띄우고,
+백엔드(main:app)를 별도 프로세스로 실행한 뒤 학생 N명이 M턴씩 대화하는 흐름을 HTTP로 재현합니다.
+
+학생 한 명의 흐름
+  프로필 조회 → 시 목록 → 시 상세 → (턴마다) 세 튜터 질문 받기 + 낱말 1~2개 사전 검색 → 프로필 저장
+  대화 히스토리는 프론트엔드처럼 턴마다 (고른 질문, 학생 답변) 두 메시지씩 늘어납니다.
+
+엔드포인트별 처리량과 p50/p95/p99, 턴 번호별 대화 지연을 출력합니다.
+--save 로 결과를 JSON 으로 남기고, --compare 로 이전 결과와 비교해 p95 가 tolerance 이상 나빠지면 종료 코드 1을 돌려줍니다.
+
+실행: cd backend && python -m benchmarks.loadtest --students 30 --turns 8
+      python -m benchmarks.loadtest --students 30 --turns 8 --sessions        # 서버 측 세션 API
+      python -m benchmarks.loadtest --save baseline.json / --compare baseline.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict
+from typing import Tuple
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.fake_dictionary import FakeDictionaryServer
+from services.dictionary import extract_words
+
+DATA_DIR = os.path.join(os.path.dirname(BACKEND_DIR), "data")
+ANSWERS = [
+    "화자가 부끄러움을 느끼는 것 같아요.",
+    "바람이라는 말이 반복되는 게 인상적이에요.",
+    "잘 모르겠어요. 조금 더 설명해 주세요.",
+    "시인이 살던 시대와 관련이 있을 것 같아요.",
+]
+
+
+class Recorder:
+    """엔드포인트 이름별 (지연, 성공 여부)와 대화 턴 번호별 지연을 모읍니다."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.turns = defaultdict(list)
+
+    async def call(self, name: str, request):
+        started = time.perf_counter()
+        try:
+            response = await request
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.samples[name].append(time.perf_counter() - started)
+        if not ok:
+            self.errors[name] += 1
+        return response if ok else None
+
+
+def _percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+async def student(client: httpx.AsyncClient, recorder: Recorder, n: int, args, rng: random.Random):
+    name = f"student{n:03d}"
+    await asyncio.sleep(rng.uniform(0, args.ramp_up))
+
+    profile = await recorder.call("profile_get", client.get(f"/api/profile/{name}"))
+    level = profile.json()["states"] if profile is not None else {"emp_state": 1, "ase_state": 1, "int_state": 1}
+
+    listing = await recorder.call("poems_list", client.get("/api/poems"))
+    if listing is None:
+        return
+    summary = rng.choice(listing.json())
+    detail = await recorder.call("poem_detail", client.get(f"/api/poems/{summary['id']}"))
+    if detail is None:
+        return
+    poem = detail.json()
+    words = extract_words(poem["content"]) or ["나무"]
+
+    session_id = None
+    if args.sessions:
+        created = await recorder.call("session_create", client.post(
+            "/api/sessions", json={"poem_id": poem["id"], "user_name": name, "user_level": level}))
+        if created is None:
+            return
+        session_id = created.json()["session_id"]
+
+    history, answer, chosen = [], "", None
+    for turn in range(args.turns):
+        started = time.perf_counter()
+        if session_id is not None:
+            body = {"user_input": answer, "selected_agent": chosen, "mode": args.mode}
+            reply = await recorder.call("chat_turn", client.post(f"/api/sessions/{session_id}/turn", json=body))
+        else:
+            body = {
+                "user_name": name,
+                "selected_poem": poem,
+                "user_level": level,
+                "shared_chat_history": history,
+                "user_input": answer,
+                "mode": args.mode,
+            }
+            reply = await recorder.call("chat_turn", client.post("/api/chat/multi", json=body))
+        recorder.turns[turn].append(time.perf_counter() - started)
+        if reply is None:
+            continue
+
+        # 질문을 읽는 동안 낯선 낱말 몇 개를 사전에서 찾습니다.
+        for word in rng.sample(words, min(len(words), rng.randint(1, 2))):
+            await recorder.call("dictionary", client.post("/api/dictionary", json={"word": word}))
+        await asyncio.sleep(rng.uniform(0, args.think))
+
+        # 튜터 하나를 골라 답합니다. (프론트엔드와 같은 방식으로 히스토리가 두 메시지씩 늘어납니다)
+        chosen = rng.choice(["empathy", "aesthetic", "interpretive"])
+        answer = f"{rng.choice(ANSWERS)} ({turn + 1}번째 답)"
+        history = history + [
+            {"role": "assistant", "content": reply.json()[chosen]},
+            {"role": "user", "content": answer},
+        ]
+
+    level = {key: min(6, value + 1) for key, value in level.items()}
+    await recorder.call("profile_save", client.post("/api/profile/save", json={"user_name": name, **level}))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_backend(workdir: str, env: dict, workers: int) -> Tuple[subprocess.Popen, str]:
+    """
+    임시 작업 폴더(SQLite 파일이 여기에 생깁니다)에서 백엔드를 띄우고, 시 목록이 응답할 때까지 기다립니다.
+    운영과 같은 serve.py 로 띄우므로, 워커가 여럿이면 세션과 응답 캐시를 워커끼리 공유하는 설정이 함께 켜집니다.
+    """
+    os.symlink(DATA_DIR, os.path.join(workdir, "data"))
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "serve.py"), "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=workdir, env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("백엔드가 시작 중에 종료되었습니다.")
+        try:
+            if httpx.get(f"{base_url}/api/poems", params={"limit": 1}, timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("백엔드가 120초 안에 준비되지 않았습니다.")
+
+
+async def run(base_url: str, args) -> Recorder:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.students * 2, max_keepalive_connections=args.students)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        await asyncio.gather(*(
+            student(client, recorder, n, args, random.Random(args.seed * 1000 + n)) for n in range(args.students)
+        ))
+    return recorder
+
+
+def report(recorder: Recorder, elapsed: float) -> dict:
+    results = {}
+    print(f"\n{'endpoint':<16}{'count':>7}{'err':>6}{'req/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, values in sorted(recorder.samples.items()):
+        row = {
+            "count": len(values),
+            "errors": recorder.errors[name],
+            "rps": len(values) / elapsed,
+            "p50": _percentile(values, 0.50),
+            "p95": _percentile(values, 0.95),
+            "p99": _percentile(values, 0.99),
+        }
+        results[name] = row
+        print(f"{name:<16}{row['count']:>7}{row['errors']:>6}{row['rps']:>9.1f}"
+              f"{row['p50'] * 1000:>8.1f}ms{row['p95'] * 1000:>8.1f}ms{row['p99'] * 1000:>8.1f}ms")
+
+    print("\n대화 턴별 지연 (히스토리가 길어질수록)")
+    for turn, values in sorted(recorder.turns.items()):
+        print(f"  turn {turn + 1:>2}: p50={_percentile(values, 0.5) * 1000:7.1f}ms  p95={_percentile(values, 0.95) * 1000:7.1f}ms")
+    return results
+
+
+def compare(results: dict, baseline_path: str, tolerance: float, min_delta: float) -> bool:
+    """
+    p95 가 기준보다 tolerance 비율 이상 느려진 엔드포인트가 있으면 False 를 반환합니다.
+    수 ms 짜리 엔드포인트의 잡음은 무시하도록, 차이가 min_delta 초 미만이면 회귀로 보지 않습니다.
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["endpoints"]
+    ok = True
+    print(f"\n기준 결과({baseline_path})와 비교 (허용 {tolerance:.0%})")
+    for name, row in sorted(results.items()):
+        if name not in baseline or not baseline[name]["p95"]:
+            continue
+        ratio = row["p95"] / baseline[name]["p95"] - 1
+        regressed = ratio > tolerance and row["p95"] - baseline[name]["p95"] >= min_delta
+        ok = ok and not regressed
+        print(f"  {name:<16} p95 {baseline[name]['p95'] * 1000:8.1f}ms -> {row['p95'] * 1000:8.1f}ms "
+              f"({ratio:+.0%}){'  ← 회귀' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=30, help="동시에 접속하는 학생 수")
+    parser.add_argument("--turns", type=int, default=8, help="학생 한 명의 대화 턴 수")
+    parser.add_argument("--ramp-up", type=float, default=2.0, help="학생들이 접속을 시작하는 구간(초)")
+    parser.add_argument("--think", type=float, default=0.5, help="턴 사이 최대 생각 시간(초)")
+    parser.add_argument("--mode", choices=["multi", "fused"], default="multi")
+    parser.add_argument("--sessions", action="store_true", help="/api/chat/multi 대신 서버 측 세션 API 사용")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="가짜 LLM 평균 지연(초)")
+    parser.add_argument("--llm-sigma", type=float, default=0.4, help="가짜 LLM 지연의 로그정규 sigma")
+    parser.add_argument("--llm-per-prompt-token", type=float, default=0.00002)
+    parser.add_argument("--dict-latency", type=float, default=0.15)
+    parser.add_argument("--dict-sigma", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--target", help="이미 실행 중인 백엔드 주소 (지정하면 가짜 서버와 백엔드를 띄우지 않습니다)")
+    parser.add_argument("--save", help="결과를 JSON 으로 저장할 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--min-delta-ms", type=float, default=20.0, help="이보다 작은 p95 차이는 회귀로 보지 않음")
+    args = parser.parse_args()
+
+    llm = dictionary = process = None
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            if args.target:
+                base_url = args.target
+            else:
+                llm = FakeOpenAIServer(latency=args.llm_latency, sigma=args.llm_sigma,
+                                       per_prompt_token=args.llm_per_prompt_token, seed=args.seed)
+                dictionary = FakeDictionaryServer(latency=args.dict_latency, sigma=args.dict_sigma, seed=args.seed)
+                env = {
+                    "OPENAI_BASE_URL": llm.start(),
+                    "OPENAI_API_KEY": "loadtest",
+                    "OPENDICT_BASE_URL": dictionary.start(),
+                    "OPENDICT_API_KEY": "loadtest",
+                }
+                process, base_url = start_backend(workdir, env, args.workers)
+
+            print(f"students={args.students} turns={args.turns} mode={args.mode} "
+                  f"{'sessions' if args.sessions else 'chat/multi'} target={base_url}")
+            started = time.perf_counter()
+            recorder = asyncio.run(run(base_url, args))
+            elapsed = time.perf_counter() - started
+            print(f"총 {elapsed:.1f}s, 요청 {sum(len(v) for v in recorder.samples.values())}건"
+                  + (f", 가짜 LLM 호출 {llm.request_count}건" if llm else ""))
+            results = report(recorder, elapsed)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=10)
+            for server in (llm, dictionary):
+                if server is not None:
+                    server.stop()
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "elapsed": elapsed, "endpoints": results}, f, ensure_ascii=False, indent=2)
+    if args.compare and not compare(results, args.compare, args.tolerance, args.min_delta_ms / 1000):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+﻿import os
+import asyncio
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import OpenAI, AsyncOpenAI
+
+# 모든 에이전트와 모든 요청이 하나의 커넥션 풀을 공유합니다.
+# 환경 변수로 동시 호출 수와 keep-alive 설정을 조절할 수 있습니다.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "32"))
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "30"))
+
+_sync_client: Optional["OpenAI"] = None
+_async_client: Optional["AsyncOpenAI"] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_bound_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def load_sdk():
+    """
+    openai SDK 를 불러옵니다. import 에만 0.5초 가까이 걸리므로 서버 시작을 막지 않도록 처음 클라이언트를 만들 때까지 미룹니다.
+    main 의 워밍업은 이 함수를 스레드에서 미리 불러 둡니다.
+    """
+    import openai
+    return openai
+
+
+def _limits() -> "httpx.Limits":
+    import httpx
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONCURRENCY,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_KEEPALIVE_SECONDS,
+    )
+
+
+def get_sync_client() -> "OpenAI":
+    """동기 경로(스레드 기반)에서 쓰는 공유 클라이언트입니다."""
+    global _sync_client
+    if _sync_client is None:
+        import httpx
+        _sync_client = load_sdk().OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=httpx.Client(limits=_limits()),
+        )
+    return _sync_client
+
+
+def _check_loop():
+    """
+    비동기 클라이언트와 세마포어는 처음 사용된 이벤트 루프에 묶입니다.
+    루프가 바뀌면(asyncio.run 을 여러 번 호출하는 배치 스크립트 등) 새로 만듭니다.
+    """
+    global _async_client, _semaphore, _bound_loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    if _bound_loop is not loop:
+        if _bound_loop is not None:
+            _async_client = None
+            _semaphore = None
+        _bound_loop = loop
+
+
+def get_async_client() -> "AsyncOpenAI":
+    """
+    비동기 경로에서 쓰는 공유 클라이언트입니다. 이벤트 루프당 하나만 만듭니다.
+    재시도는 llm_scheduler 가 제한 시간 안에서 직접 하므로 SDK 자체 재시도는 끕니다.
+    """
+    global _async_client
+    _check_loop()
+    if _async_client is None:
+        import httpx
+        _async_client = load_sdk().AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            max_retries=0,
+            http_client=httpx.AsyncClient(limits=_limits()),
+        )
+    return _async_client
+
+
+def llm_slot() -> asyncio.Semaphore:
+    """동시에 진행 중인 LLM 호출 수를 LLM_MAX_CONCURRENCY로 제한합니다."""
+    global _semaphore
+    _check_loop()
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def aclose():
+    """공유 비동기 클라이언트를 닫습니다. (서버 종료 시 호출)"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
@@ -0,0 +1,196 @@
+﻿import os
+import time
+import random
+import asyncio
+import email.utils
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from llm import llm_slot, load_sdk
+from services.rate_limit import TokenBucket
+
+# 모든 에이전트·모든 요청의 LLM 호출이 이 스케줄러를 거칩니다. 환경 변수로 조절합니다.
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "30"))   # 호출 하나(재시도 포함)의 제한 시간
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "4"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))              # 0이면 헤지 요청을 보내지 않습니다.
+LLM_RPM = float(os.getenv("LLM_RPM", "0"))                              # 분당 요청 수 (0이면 제한 없음)
+LLM_TPM = float(os.getenv("LLM_TPM", "0"))                              # 분당 프롬프트 토큰 수 (0이면 제한 없음)
+
+
+def _retry_after(error: Exception) -> float:
+    """429/503 응답의 Retry-After(초 또는 HTTP 날짜) / retry-after-ms 헤더를 초 단위로 읽습니다."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return 0.0
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value is None:
+            return 0.0
+        try:
+            return float(value)
+        except ValueError:
+            when = email.utils.parsedate_to_datetime(value)
+            return max(0.0, when.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def is_retryable(error: Exception) -> bool:
+    """429, 5xx, 연결 오류·타임아웃만 재시도합니다. 400 같은 요청 오류는 다시 보내도 같으므로 바로 올립니다."""
+    openai = load_sdk()
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, openai.APIConnectionError)
+
+
+class LLMScheduler:
+    """
+    BaseAgent 아래에서 LLM 호출을 감싸는 스케줄러입니다.
+      - 호출마다 제한 시간(deadline)을 두고, 넘기면 TimeoutError 를 올립니다.
+      - 429/5xx 는 지터를 준 지수 백오프로 재시도하되, Retry-After 보다 일찍 다시 보내지 않습니다.
+      - hedge_after 초 안에 응답이 없으면 같은 요청을 한 번 더 보내 먼저 온 응답을 씁니다. (꼬리 지연 완화)
+      - 분당 요청 수·토큰 수 버킷을 모든 에이전트와 요청이 공유합니다.
+    동시 호출 수 제한(llm_slot)은 시도 단위로 잡으므로 백오프 중에는 자리를 차지하지 않습니다.
+    """
+
+    def __init__(self, max_attempts: int = LLM_MAX_ATTEMPTS, backoff_base: float = LLM_BACKOFF_BASE,
+                 backoff_max: float = LLM_BACKOFF_MAX, hedge_after: float = LLM_HEDGE_AFTER,
+                 rpm: float = LLM_RPM, tpm: float = LLM_TPM, seed: Optional[int] = None):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.requests = TokenBucket(rpm / 60, capacity=max(1.0, rpm / 6)) if rpm > 0 else TokenBucket(0)
+        self.tokens = TokenBucket(tpm / 60, capacity=tpm / 6) if tpm > 0 else TokenBucket(0)
+        self.random = random.Random(seed)
+        self.counts: Dict[str, int] = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "timeouts": 0, "failures": 0}
+
+    def backoff(self, attempt: int, error: Exception) -> float:
+        """full jitter 백오프: [0, min(max, base*2^attempt)] 에서 고르되 Retry-After 이상 기다립니다."""
+        jittered = self.random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        return max(jittered, _retry_after(error))
+
+    async def _admit(self, cost: int):
+        await self.requests.acquire(1)
+        await self.tokens.acquire(cost)
+
+    async def _attempt(self, create: Callable[[], Awaitable], cost: int):
+        await self._admit(cost)
+        async with llm_slot():
+            return await create()
+
+    async def _hedged(self, create: Callable[[], Awaitable], cost: int):
+        """첫 시도가 hedge_after 초 안에 끝나지 않으면 두 번째 시도를 띄우고 먼저 성공한 쪽을 씁니다."""
+        first = asyncio.ensure_future(self._attempt(create, cost))
+        if self.hedge_after <= 0:
+            return await first
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_after)
+            if done:
+                return first.result()
+            self.counts["hedges"] += 1
+            second = asyncio.ensure_future(self._attempt(create, cost))
+            pending.add(second)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.counts["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _with_retries(self, run: Callable[[], Awaitable], deadline_at: float):
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_attempts):
+            try:
+                return await run()
+            except Exception as e:
+                if not is_retryable(e) or attempt + 1 >= self.max_attempts:
+                    raise
+                delay = self.backoff(attempt, e)
+                # 기다린 뒤 다시 보내도 제한 시간을 넘긴다면 지금 실패로 돌려줍니다.
+                if loop.time() + delay >= deadline_at:
+                    raise
+                self.counts["retries"] += 1
+                await asyncio.sleep(delay)
+
+    async def complete(self, create: Callable[[], Awaitable], cost: int = 0, deadline: float = LLM_DEADLINE_SECONDS):
+        """
+        create() 로 만든 비스트리밍 호출을 실행합니다. create 는 매 시도마다 새 코루틴을 돌려주는 함수여야 합니다.
+        deadline 초 안에 끝나지 않으면 TimeoutError 를 올립니다.
+        """
+        self.counts["calls"] += 1
+        deadline_at = asyncio.get_running_loop().time() + deadline
+        try:
+            return await asyncio.wait_for(
+                self._with_retries(lambda: self._hedged(create, cost), deadline_at), timeout=deadline
+            )
+        except asyncio.TimeoutError:
+            self.counts["timeouts"] += 1
+            raise
+        except Exception:
+            self.counts["failures"] += 1
+            raise
+
+    async def stream(self, create: Callable[[], Awaitable], cost: int = 0,
+                     deadline: float = LLM_DEADLINE_SECONDS) -> AsyncIterator:
+        """
+        스트리밍 호출입니다. 스트림을 여는 단계(429 등)만 재시도하고, 조각을 보내기 시작한 뒤에는 재시도하지 않습니다.
+        헤지하지 않으며, 제한 시간을 넘기면 그때까지 보낸 조각은 그대로 두고 TimeoutError 를 올립니다.
+        """
+        self.counts["calls"] += 1
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + deadline
+        slot = llm_slot()
+
+        async def open_stream():
+            await self._admit(cost)
+            await slot.acquire()
+            try:
+                return await create()
+            except BaseException:
+                slot.release()
+                raise
+
+        try:
+            stream = await asyncio.wait_for(self._with_retries(open_stream, deadline_at), timeout=deadline)
+        except asyncio.TimeoutError:
+            self.counts["timeouts"] += 1
+            raise
+        except Exception:
+            self.counts["failures"] += 1
+            raise
+
+        iterator = stream.__aiter__()
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), timeout=max(0.0, deadline_at - loop.time()))
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    self.counts["timeouts"] += 1
+                    raise
+                yield chunk
+        finally:
+            slot.release()
+            close = getattr(stream, "close", None)
+            if close is not None:
+                await close()
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counts)
+
+
+scheduler = LLMScheduler()
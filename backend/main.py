@@ -1,9 +1,12 @@
 ﻿import os
 import sys
-import sqlite3
+import json
+import time
 import asyncio
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Query, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse, Response
 from typing import List, Dict, Optional
 from pydantic import BaseModel, Field
 
@@ -18,13 +21,51 @@ loaded = load_dotenv(dotenv_path=dotenv_path)
 print(f"load_dotenv path={dotenv_path}, returned={loaded}, exists={os.path.exists(dotenv_path)}")
 key = os.getenv("OPENAI_API_KEY")
 
-from schemas import AppSessionState, Poem, Message, UserLevel, AgentRole
-from services.poem_loader import PoemLoader
+from schemas import AppSessionState, AppStep, Poem, Message, UserLevel, AgentRole, SessionCreate, SessionTurn, PoemSearchHit, DictionaryBatchRequest, ChatMode
 from services.dictionary import DictionaryService
-from agents import EmpathyAgent, AestheticAgent, InterpretiveAgent
+from services.glossary import GlossaryService
+from services.opener_store import OpenerStore
+from services.session_store import SessionStore
+from services.profile_repository import ProfileRepository
+from services.tokenizer import count_tokens
+from agents import EmpathyAgent, AestheticAgent, InterpretiveAgent, FusedTutor, response_cache, OPENING_INPUT
+import llm
+import metrics
+from llm_scheduler import scheduler
+from preload import load_dataset
 
 
-app = FastAPI(title="Scaffolder Backend API")
+# 데이터셋이 없어도 응답할 수 있는 엔드포인트입니다. 워밍업 중에도 기다리지 않고 바로 처리합니다.
+LIGHTWEIGHT_PATHS = {"/healthz", "/readyz", "/metrics", "/api/cache/stats", "/api/dictionary", "/api/dictionary/batch"}
+
+
+async def _prepare(request: Request):
+    """
+    모든 엔드포인트의 공통 의존성: 요청 도착부터 본문 수신·JSON 파싱까지를 parse 단계로 기록하고,
+    데이터셋이나 DB가 필요한 엔드포인트는 워밍업이 끝날 때까지 기다립니다.
+    """
+    metrics.since_request_start("parse")
+    if not ready and request.url.path not in LIGHTWEIGHT_PATHS:
+        await _wait_ready()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """서버가 연결을 받기 시작하면 워밍업을 백그라운드에서 진행하고, 종료할 때 공유 클라이언트와 DB 연결을 닫습니다."""
+    global _startup
+    _startup = asyncio.create_task(_warm_up())
+    try:
+        yield
+    finally:
+        if not _startup.done():
+            _startup.cancel()
+        await llm.aclose()
+        await dict_service.aclose()
+        profile_repo.close()
+
+app = FastAPI(title="Scaffolder Backend API", lifespan=lifespan, dependencies=[Depends(_prepare)])
+# 요청별 전체 시간·첫 바이트 시간 기록 (METRICS_TRACE_PATH 를 지정하면 느린 요청의 단계별 기록도 남깁니다)
+app.add_middleware(metrics.MetricsMiddleware)
 
 # --- 초기화 섹션 ---
 app.add_middleware(
@@ -33,33 +74,70 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
-poem_loader = PoemLoader("data/KPoEM_poem_dataset_v4.tsv")
+# 시 목록·카탈로그·검색 색인과 풀이집은 워밍업(_load_state)에서 채웁니다.
+# serve.py 로 띄우면 fork 전에 만들어 둔 데이터셋을 그대로 씁니다.
+poem_loader = poem_catalog = search_index = None
+glossary_service = None
+# 사전 캐시·첫 질문·세션·프로필 저장소는 처음 쓸 때 SQLite 파일을 엽니다. (main 을 불러오기만 해서는 열지 않습니다)
 dict_service = DictionaryService()
 emp_agent = EmpathyAgent()
 ase_agent = AestheticAgent()
 int_agent = InterpretiveAgent()
+# fused 모드: 세 튜터의 질문을 한 번의 호출로 만듭니다. 요청마다 "mode" 로 고를 수 있고, 기본값은 CHAT_MODE 입니다.
+fused_tutor = FusedTutor([emp_agent, ase_agent, int_agent])
+TUTORS = {agent.role.value: agent for agent in (emp_agent, ase_agent, int_agent)}
+CHAT_MODE = ChatMode(os.getenv("CHAT_MODE", ChatMode.MULTI.value))
+
+opener_store = OpenerStore("openers.db")
+
+# 서버 측 대화 세션 (SESSION_DB 를 지정하면 SQLite에도 기록합니다)
+# 워커가 여럿이면 SESSION_SHARED=1 로 같은 세션을 어느 워커가 받아도 이어지게 합니다. (serve.py 가 설정합니다)
+session_store = SessionStore(
+    max_sessions=int(os.getenv("SESSION_MAX", "1000")),
+    db_path=os.getenv("SESSION_DB") or None,
+    shared=os.getenv("SESSION_SHARED", "0") == "1",
+)
+
+# --- [1] DB (테이블 생성은 워밍업에서 합니다) ---
+profile_repo = ProfileRepository("tutor_system.db")
 
-all_poems = poem_loader.load()
-
-# --- [1] DB 초기화 ---
-def init_db():
-    conn = sqlite3.connect("tutor_system.db")
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS user_profiles (
-            user_name TEXT PRIMARY KEY,
-            emp_state INTEGER DEFAULT 1,
-            ase_state INTEGER DEFAULT 1,
-            int_state INTEGER DEFAULT 1,
-            last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-init_db()
+# 워밍업이 끝나야 /readyz 가 200 을 돌려줍니다.
+ready = False
+_startup: Optional[asyncio.Task] = None
+
+def _load_state():
+    """데이터셋·DB·무거운 의존성을 준비합니다. 스레드에서 실행되어 그동안에도 가벼운 엔드포인트는 응답합니다."""
+    global poem_loader, poem_catalog, search_index, glossary_service
+    profile_repo.init_db()
+    poem_loader, poem_catalog, search_index = load_dataset()
+    # 시별 어려운 낱말 풀이집 (prefetch_dictionary.py --glossaries 로 미리 만들 수 있습니다)
+    glossary_service = GlossaryService(dict_service, poem_catalog.poems)
+    # 미리 생성된 첫 질문 (warm_openers.py 로 채웁니다)
+    print(f"✅ 미리 생성된 첫 질문 {opener_store.preload()}개를 불러왔습니다.")
+    count_tokens(poem_catalog.poems[0].content if len(poem_catalog) else "")
+    llm.load_sdk()
+
+async def _warm_up():
+    global ready
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(_load_state)
+        llm.get_async_client()
+    except Exception as e:
+        print(f"❌ 워밍업 실패: {e!r}")
+        raise
+    ready = True
+    print(f"✅ 워밍업 완료 ({time.perf_counter() - started:.2f}s)")
+
+async def _wait_ready():
+    """워밍업이 끝날 때까지 기다립니다. lifespan 없이 app 을 쓰는 경우에는 여기서 워밍업을 시작합니다."""
+    global _startup
+    if _startup is None:
+        _startup = asyncio.ensure_future(_warm_up())
+    await asyncio.shield(_startup)
 
 # --- [2] 데이터 모델: Pydantic 필드명 통일 ---
 class UserProfile(BaseModel):
@@ -72,19 +150,7 @@ class UserProfile(BaseModel):
 @app.post("/api/profile/save")
 async def save_profile(profile: UserProfile):
     try:
-        conn = sqlite3.connect("tutor_system.db")
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO user_profiles (user_name, emp_state, ase_state, int_state, last_updated)
-            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-            ON CONFLICT(user_name) DO UPDATE SET
-                emp_state=excluded.emp_state,
-                ase_state=excluded.ase_state,
-                int_state=excluded.int_state,
-                last_updated=CURRENT_TIMESTAMP
-        """, (profile.user_name, profile.emp_state, profile.ase_state, profile.int_state))
-        conn.commit()
-        conn.close()
+        await profile_repo.save(profile.user_name, profile.emp_state, profile.ase_state, profile.int_state)
         return {"status": "success", "user": profile.user_name}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -92,11 +158,7 @@ async def save_profile(profile: UserProfile):
 # --- [4] API: 프로필 불러오기 ---
 @app.get("/api/profile/{user_name}")
 async def get_profile(user_name: str):
-    conn = sqlite3.connect("tutor_system.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT emp_state, ase_state, int_state FROM user_profiles WHERE user_name = ?", (user_name,))
-    result = cursor.fetchone()
-    conn.close()
+    result = await profile_repo.get(user_name)
 
     if result:
         return {
@@ -113,17 +175,59 @@ async def get_profile(user_name: str):
         "is_new": True
     }
 
-@app.get("/api/poems", response_model=List[Poem])
-async def get_poems():
-    """KPoEM 데이터셋에서 전체 시 목록을 반환합니다."""
-    if not all_poems:
+@app.get("/api/poems")
+async def get_poems(
+    request: Request,
+    cursor: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+):
+    """
+    KPoEM 데이터셋의 시 목록을 요약(id, title, author)으로 반환합니다. 본문은 /api/poems/{poem_id} 로 조회합니다.
+    cursor/limit 를 주면 해당 페이지만 반환하며, 다음 페이지의 cursor 는 X-Next-Cursor 헤더로 알려줍니다.
+    응답은 미리 직렬화되어 있고, If-None-Match 가 ETag 와 같으면 304 를 반환합니다.
+    """
+    if not len(poem_catalog):
         raise HTTPException(status_code=404, detail="시 데이터를 찾을 수 없습니다.")
-    return all_poems
+
+    if cursor is None and limit is None:
+        body, etag, next_cursor = poem_catalog.list_body, poem_catalog.list_etag, None
+    else:
+        body, etag, next_cursor = poem_catalog.page(cursor, limit or 50)
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/api/poems/search", response_model=List[PoemSearchHit])
+async def search_poems(
+    q: str = "",
+    emotion: Optional[str] = None,
+    min_annotators: int = Query(1, ge=1, le=5),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    제목·시인·본문 검색과 감정 레이블 필터를 제공합니다.
+    예) /api/poems/search?q=별&emotion=슬픔&min_annotators=3  → '슬픔'을 3명 이상이 단 시 중 '별' 관련 순
+    """
+    if not q.strip() and not emotion:
+        raise HTTPException(status_code=400, detail="검색어나 감정 레이블을 입력해 주세요.")
+
+    hits = []
+    for poem_id, score in search_index.search(q, emotion=emotion, min_annotators=min_annotators, limit=limit):
+        poem = poem_catalog.get(poem_id)
+        emotions = search_index.top_emotions(poem_id)
+        if emotion:
+            emotions = {emotion: search_index.emotions[emotion][poem_id], **emotions}
+        hits.append(PoemSearchHit(id=poem.id, title=poem.title, author=poem.author, score=round(score, 4), emotions=emotions))
+    return hits
 
 @app.get("/api/poems/{poem_id}", response_model=Poem)
 async def get_poem_detail(poem_id: int):
     """특정 ID의 시 상세 정보를 반환합니다."""
-    poem = next((p for p in all_poems if p.id == poem_id), None)
+    poem = poem_catalog.get(poem_id)
     if not poem:
         raise HTTPException(status_code=404, detail="해당 시를 찾을 수 없습니다.")
     return poem
@@ -132,60 +236,368 @@ async def get_poem_detail(poem_id: int):
 async def search_word(payload: Dict[str, str]):
     """
     리액트에서 { "word": "나무" } 형태의 JSON을 보냈을 때 처리합니다.
+    활용형(예: 우러러)은 표제어(우러르다)로 바꿔 검색하며, 찾은 표제어를 lemma 로 함께 돌려줍니다.
     """
     word = payload.get("word")
     if not word:
         raise HTTPException(status_code=400, detail="검색할 단어가 없습니다.")
         
-    meanings = dict_service.search_word(word)
+    lemma, meanings = await dict_service.alookup(word)
     
     if not meanings:
-        return {"word": word, "meanings": [{"definition": "검색 결과가 없습니다."}]}
+        return {"word": word, "lemma": None, "meanings": [{"definition": "검색 결과가 없습니다."}]}
         
-    return {"word": word, "meanings": meanings}
+    return {"word": word, "lemma": lemma, "meanings": meanings}
+
+@app.post("/api/dictionary/batch")
+async def search_words(req: DictionaryBatchRequest):
+    """
+    여러 낱말을 한 번에 찾습니다. { "words": ["우러러", "바람에", ...] }
+    표제어가 같은 낱말은 한 번만 조회하고, 서로 다른 낱말은 동시에 조회합니다.
+    """
+    words = [w.strip() for w in req.words if w.strip()]
+    if not words:
+        raise HTTPException(status_code=400, detail="검색할 단어가 없습니다.")
+    return {"results": await dict_service.alookup_many(words, limit=req.limit)}
+
+def _build_session_state(payload: dict):
+    """/api/chat/multi 계열 요청 본문을 세션 상태와 사용자 입력으로 변환합니다."""
+    # 1. 데이터 파싱
+    user_name = payload.get("user_name", "학생")
+    poem_data = payload.get("selected_poem")
+    # 공유 히스토리를 가져옵니다. 없으면 빈 리스트로 시작합니다.
+    history_data = payload.get("shared_chat_history", []) 
+    user_input = payload.get("user_input", "")
+    level_data = payload.get("user_level", {"emp_state": 1, "ase_state": 1, "int_state": 1})
+
+    # 첫 접속 시(히스토리가 없을 때)는 입력을 고정합니다. 첫 질문은 (시, 에이전트, 수준)만으로 결정됩니다.
+    if not history_data:
+        user_input = OPENING_INPUT
+
+    # 2. 객체 변환 및 세션 상태 구성
+    shared_history = [Message(**m) for m in history_data]
+    state = AppSessionState(
+        user_name=user_name,
+        user_level=UserLevel(**level_data),
+        selected_poem=Poem(**poem_data),
+        shared_chat_history=shared_history  # 모든 에이전트가 이 히스토리를 공유합니다.
+    )
+    return state, user_input
+
+async def _stored_opener(agent, state: AppSessionState) -> Optional[str]:
+    """첫 턴이면 미리 생성된 첫 질문을 찾아 반환합니다. 없으면 None (실시간 생성으로 대체)."""
+    if state.shared_chat_history:
+        return None
+    return await opener_store.aget(state.selected_poem.id, agent.role.value, agent.level_of(state))
+
+async def _agent_reply(agent, state: AppSessionState, user_input: str) -> Optional[str]:
+    """튜터 한 명의 답변입니다. 제한 시간을 넘기면 None 을 반환합니다."""
+    opener = await _stored_opener(agent, state)
+    if opener is not None:
+        return opener
+    try:
+        return await agent.aget_response(state, user_input)
+    except asyncio.TimeoutError:
+        return None
+
+def _chat_mode(value: Optional[str]) -> ChatMode:
+    if value is None:
+        return CHAT_MODE
+    try:
+        return ChatMode(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 mode 입니다: {value}")
+
+async def _fused_replies(state: AppSessionState, user_input: str):
+    """
+    fused 모드: 한 번의 호출로 세 질문을 받습니다. 첫 턴에 세 튜터의 저장된 첫 질문이 모두 있으면 호출하지 않습니다.
+    시간 초과가 아닌 실패(응답 형식 오류, 재시도 후에도 남은 API 오류, 연결 오류, response_format 미지원 등)는
+    None 을 반환해 튜터별 호출로 대체하게 합니다.
+    """
+    agents = [emp_agent, ase_agent, int_agent]
+    openers = await asyncio.gather(*(_stored_opener(agent, state) for agent in agents))
+    if all(opener is not None for opener in openers):
+        return {agent.role.value: opener for agent, opener in zip(agents, openers)}, []
+    try:
+        return await fused_tutor.areplies(state, user_input), []
+    except asyncio.TimeoutError:
+        return {agent.role.value: fused_tutor.timeout_message for agent in agents}, [agent.role.value for agent in agents]
+    except ValueError as e:
+        print(f"Fused 응답 검증 실패, 튜터별 호출로 대체합니다: {e}")
+        return None
+    except Exception as e:
+        print(f"Fused 호출 실패, 튜터별 호출로 대체합니다: {e!r}")
+        return None
+
+async def _gather_replies(state: AppSessionState, user_input: str, mode: ChatMode = ChatMode.MULTI):
+    """
+    세 튜터에게 동시에 묻습니다. 각 튜터는 자기 제한 시간까지만 기다리므로, 한 명이 늦어도 나머지 답변은 돌려줍니다.
+    반환값: (튜터별 답변 dict, 시간 초과된 튜터 목록) — 시간 초과된 튜터 자리에는 안내 문구가 들어갑니다.
+    """
+    if mode == ChatMode.FUSED:
+        fused = await _fused_replies(state, user_input)
+        if fused is not None:
+            return fused
+
+    agents = [emp_agent, ase_agent, int_agent]
+    replies = await asyncio.gather(*(_agent_reply(agent, state, user_input) for agent in agents))
+    responses, timed_out = {}, []
+    for agent, reply in zip(agents, replies):
+        if reply is None:
+            timed_out.append(agent.role.value)
+            reply = agent.timeout_message
+        responses[agent.role.value] = reply
+    return responses, timed_out
 
 @app.post("/api/chat/multi")
 async def chat_multi_agents(payload: dict):
+    mode = _chat_mode(payload.get("mode"))
     try:
-        # 1. 데이터 파싱
-        user_name = payload.get("user_name", "학생")
-        poem_data = payload.get("selected_poem")
-        # 공유 히스토리를 가져옵니다. 없으면 빈 리스트로 시작합니다.
-        history_data = payload.get("shared_chat_history", []) 
-        user_input = payload.get("user_input", "")
-        level_data = payload.get("user_level", {"emp_state": 1, "ase_state": 1, "int_state": 1})
-
-        # 첫 접속 시(히스토리가 없을 때) 기본 입력 설정
-        if not history_data and not user_input:
-            user_input = "시를 선택했어. 각 교사의 관점과 학생의 수준을 고려한 첫 질문을 만들어 줘."
-
-        # 2. 객체 변환 및 세션 상태 구성
-        shared_history = [Message(**m) for m in history_data]
-        state = AppSessionState(
-            user_name=user_name,
-            user_level=UserLevel(**level_data),
-            selected_poem=Poem(**poem_data),
-            shared_chat_history=shared_history  # 모든 에이전트가 이 히스토리를 공유합니다.
-        )
+        with metrics.timed(metrics.STAGE_SECONDS, stage="state"):
+            state, user_input = _build_session_state(payload)
 
         # 3. 비동기 병렬 호출 (시니어의 기술)
-        # 세 명의 에이전트에게 동시에 질문을 던집니다.
-        responses = await asyncio.gather(
-            asyncio.to_thread(emp_agent.get_response, state, user_input),
-            asyncio.to_thread(ase_agent.get_response, state, user_input),
-            asyncio.to_thread(int_agent.get_response, state, user_input)
-        )
-
-        # 4. 결과 반환
-        return {
-            "empathy": responses[0],
-            "aesthetic": responses[1],
-            "interpretive": responses[2]
-        }
+        # 세 명의 에이전트에게 동시에 질문을 던집니다. 스레드 풀을 거치지 않고 공유 비동기 클라이언트를 직접 await 합니다.
+        # "mode": "fused" 이면 한 번의 호출로 세 질문을 함께 만듭니다.
+        responses, timed_out = await _gather_replies(state, user_input, mode)
+
+        # 4. 결과 반환 (제한 시간을 넘긴 튜터는 timed_out 에 표시됩니다)
+        return {**responses, "timed_out": timed_out}
     except Exception as e:
         print(f"Multi-Agent API Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/chat/multi/stream")
+async def chat_multi_agents_stream(payload: dict):
+    """
+    /api/chat/multi의 스트리밍 버전입니다. (NDJSON, 한 줄에 이벤트 하나)
+    각 튜터의 토큰 조각이 생성되는 즉시 아래 형태로 전송됩니다.
+      {"agent": "empathy", "type": "delta", "content": "..."}
+      {"agent": "empathy", "type": "done", "content": "<전체 답변>"}
+    제한 시간을 넘긴 튜터는 그때까지의 답변과 함께 "timed_out": true 로,
+    그 밖의 오류로 끊긴 튜터는 "error": true 로 끝납니다.
+    fused 모드는 토큰 단위로 나눠 보내지 않고, 세 질문이 완성되면 튜터별로 delta/done 을 한 번씩 보냅니다.
+    """
+    mode = _chat_mode(payload.get("mode"))
+    try:
+        with metrics.timed(metrics.STAGE_SECONDS, stage="state"):
+            state, user_input = _build_session_state(payload)
+    except Exception as e:
+        print(f"Multi-Agent Stream API Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return StreamingResponse(_stream_agents(state, user_input, mode=mode), media_type="application/x-ndjson")
+
+async def _stream_agents(state: AppSessionState, user_input: str, on_complete=None, mode: ChatMode = ChatMode.MULTI):
+    """세 튜터의 스트림을 하나의 NDJSON 스트림으로 합칩니다. 모두 끝나면 on_complete(응답 dict)를 await 합니다."""
+    if mode == ChatMode.FUSED:
+        fused = await _fused_replies(state, user_input)
+        if fused is not None:
+            responses, timed_out = fused
+            for role, reply in responses.items():
+                if role in timed_out:
+                    yield json.dumps({"agent": role, "type": "done", "content": "", "timed_out": True}, ensure_ascii=False) + "\n"
+                    continue
+                yield json.dumps({"agent": role, "type": "delta", "content": reply}, ensure_ascii=False) + "\n"
+                yield json.dumps({"agent": role, "type": "done", "content": reply}, ensure_ascii=False) + "\n"
+            if on_complete is not None:
+                await on_complete({role: reply for role, reply in responses.items() if role not in timed_out})
+            return
+
+    agents = [emp_agent, ase_agent, int_agent]
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump(agent):
+        # 각 튜터의 스트림을 소비하며 하나의 큐로 합칩니다.
+        # 어떤 경우에도 done 이벤트를 정확히 한 번 넣어야 아래 루프가 끝납니다.
+        parts = []
+        done = {"agent": agent.role.value, "type": "done"}
+        try:
+            opener = await _stored_opener(agent, state)
+            if opener is not None:
+                parts.append(opener)
+                queue.put_nowait({"agent": agent.role.value, "type": "delta", "content": opener})
+                return
+            async for delta in agent.astream_response(state, user_input):
+                parts.append(delta)
+                queue.put_nowait({"agent": agent.role.value, "type": "delta", "content": delta})
+        except asyncio.TimeoutError:
+            done["timed_out"] = True
+        except Exception as e:
+            print(f"Multi-Agent Stream Error ({agent.role.value}): {e!r}")
+            done["error"] = True
+        finally:
+            done["content"] = "".join(parts)
+            queue.put_nowait(done)
+
+    workers = [asyncio.create_task(pump(agent)) for agent in agents]
+    responses, finished = {}, 0
+    try:
+        while finished < len(agents):
+            event = await queue.get()
+            if event["type"] == "done":
+                finished += 1
+                # 시간 초과나 오류로 끊긴 답변은 세션에 남기지 않습니다.
+                if not event.get("timed_out") and not event.get("error"):
+                    responses[event["agent"]] = event["content"]
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+    finally:
+        for worker in workers:
+            worker.cancel()
+    if on_complete is not None:
+        await on_complete(responses)
+
+@app.get("/api/poems/{poem_id}/glossary")
+async def get_poem_glossary(poem_id: int):
+    """시에 나온 어려운 낱말과 뜻풀이를 한 번에 반환합니다. 한 번 만든 풀이집은 저장해 두고 재사용합니다."""
+    poem = poem_catalog.get(poem_id)
+    if not poem:
+        raise HTTPException(status_code=404, detail="해당 시를 찾을 수 없습니다.")
+    return {"poem_id": poem_id, "entries": await glossary_service.get(poem)}
+
+# --- [5] API: 서버 측 대화 세션 ---
+# 클라이언트는 세션을 한 번 만든 뒤, 매 턴 새 입력과 답한 튜터만 보냅니다.
+# 시 본문과 히스토리는 서버가 보관하므로 턴당 요청 크기와 파싱 비용이 일정합니다.
+@app.post("/api/sessions")
+async def create_session(req: SessionCreate):
+    if poem_catalog.get(req.poem_id) is None:
+        raise HTTPException(status_code=404, detail="해당 시를 찾을 수 없습니다.")
+    session = await session_store.create(req.poem_id, user_name=req.user_name, user_level=req.user_level)
+    return {"session_id": session.session_id, "poem_id": session.poem_id, "user_name": session.user_name}
+
+@app.get("/api/sessions/{session_id}")
+async def get_session(session_id: str):
+    session = await session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
+    return session
+
+# 같은 세션의 턴이 겹치면(중복 전송 등) 409 로 거절합니다. 진행 중 표시는 세션 저장소가 보관하므로
+# SESSION_SHARED=1 이면 다른 워커로 간 중복 요청도 거절됩니다.
+# 연결이 끊겨 정리되지 못한 표시는 SESSION_TURN_TIMEOUT 초가 지나면 무시합니다.
+SESSION_TURN_TIMEOUT = float(os.getenv("SESSION_TURN_TIMEOUT", "120"))
+
+async def _begin_session_turn(session_id: str, turn: SessionTurn):
+    """
+    세션 턴을 시작합니다. 반환값: (상태, 입력, finish, release)
+    고른 질문과 학생 답변은 바로 기록하지 않고, 답변이 만들어진 뒤 finish 에서 함께 기록합니다.
+    턴이 실패하거나 스트림이 끊기면 아무것도 남지 않으므로 같은 요청을 그대로 다시 보낼 수 있습니다.
+    release 는 성공·실패와 관계없이 턴이 끝나면 await 해야 합니다.
+    """
+    session = await session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
+    started = await session_store.begin_turn(session_id, SESSION_TURN_TIMEOUT)
+    if started is None:
+        raise HTTPException(status_code=409, detail="이전 턴이 아직 진행 중입니다.")
+    if session_store.shared:
+        # 턴을 잡기 직전에 다른 워커가 끝낸 턴이 있을 수 있으므로 한 번 더 맞춥니다.
+        session = await session_store.get(session_id)
+
+    async def release():
+        await session_store.end_turn(session_id, started)
+
+    # 학생이 고른 튜터의 질문을 히스토리에 넣습니다. (이름표 없이 내용만)
+    pending = []
+    if turn.selected_agent is not None:
+        question = session.latest_responses.get(turn.selected_agent.value)
+        if question:
+            pending.append(Message(role="assistant", content=question))
+
+    history = session.history + pending
+    is_opening = not history
+    user_input = OPENING_INPUT if is_opening else turn.user_input
+    if not is_opening:
+        pending.append(Message(role="user", content=user_input))
+
+    # 저장된 객체를 그대로 쓰므로 재검증하지 않습니다.
+    state = AppSessionState.model_construct(
+        current_step=AppStep.MULTI_AGENT_CHAT,
+        user_name=session.user_name,
+        user_level=session.user_level,
+        selected_poem=poem_catalog.get(session.poem_id),
+        shared_chat_history=history,
+        session_id=session.session_id,
+    )
+
+    async def finish(responses: Dict[str, str]):
+        # 오류 안내 문구는 다음 턴의 질문이 될 수 없으므로 빼고,
+        # 남은 답변이 없으면(모두 시간 초과·실패) 턴이 없었던 것으로 두어 같은 질문·답변으로 다시 시도할 수 있게 합니다.
+        responses = {role: reply for role, reply in responses.items() if not TUTORS[role].is_error(reply)}
+        if not responses:
+            return
+        if pending:
+            await session_store.append(session, pending)
+        await session_store.set_latest(session, responses)
+
+    return state, user_input, finish, release
+
+@app.post("/api/sessions/{session_id}/turn")
+async def session_turn(session_id: str, turn: SessionTurn):
+    mode = _chat_mode(turn.mode)
+    with metrics.timed(metrics.STAGE_SECONDS, stage="state"):
+        state, user_input, finish, release = await _begin_session_turn(session_id, turn)
+    try:
+        responses, timed_out = await _gather_replies(state, user_input, mode)
+        # 시간 초과된 튜터의 안내 문구는 다음 턴의 질문으로 쓰이지 않도록 저장하지 않습니다.
+        await finish({role: reply for role, reply in responses.items() if role not in timed_out})
+    except Exception as e:
+        print(f"Session Turn API Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await release()
+    return {**responses, "timed_out": timed_out}
+
+@app.post("/api/sessions/{session_id}/turn/stream")
+async def session_turn_stream(session_id: str, turn: SessionTurn):
+    mode = _chat_mode(turn.mode)
+    with metrics.timed(metrics.STAGE_SECONDS, stage="state"):
+        state, user_input, finish, release = await _begin_session_turn(session_id, turn)
+
+    async def stream():
+        # 클라이언트가 끊으면 on_complete 가 불리지 않으므로 히스토리에도 남지 않습니다.
+        try:
+            async for line in _stream_agents(state, user_input, on_complete=finish, mode=mode):
+                yield line
+        finally:
+            await release()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.get("/healthz")
+async def healthz():
+    """프로세스가 살아 있으면 항상 200 입니다."""
+    return {"status": "ok", "pid": os.getpid()}
+
+@app.get("/readyz")
+async def readyz():
+    """워밍업이 끝나 요청을 받을 수 있을 때만 200, 그 전에는 503 입니다."""
+    if not ready:
+        return Response(status_code=503, content=b'{"status":"starting"}', media_type="application/json")
+    return {"status": "ready", "pid": os.getpid(), "poems": len(poem_catalog)}
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """LLM 응답 캐시, 첫 질문 저장소, 사전 캐시의 적중/미스 횟수와 LLM 스케줄러의 재시도·헤지·시간 초과 횟수를 반환합니다."""
+    return {
+        "response_cache": response_cache.stats(),
+        "llm_scheduler": scheduler.stats(),
+        "openers": opener_store.stats(),
+        "dictionary": dict_service.stats(),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Prometheus 형식의 지표를 반환합니다.
+      - http_request_duration_seconds / http_request_ttfb_seconds: 엔드포인트(route)별 전체·첫 바이트 시간
+      - tutor_stage_duration_seconds: parse, state, history_window, prompt_build 단계
+      - tutor_llm_duration_seconds / tutor_llm_ttfb_seconds / tutor_llm_usage_tokens: 에이전트별 LLM 시간과 토큰
+      - tutor_db_duration_seconds, tutor_dictionary_lookup_seconds: 저장소·사전 계층별 시간
+    """
+    return metrics.render_all()
+
 if __name__ == "__main__":
+    # 개발용(자동 재시작) 실행입니다. 운영에서는 워커 여러 개를 띄우는 serve.py 를 씁니다.
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,236 @@
+﻿import os
+import json
+import time
+import random
+import threading
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Prometheus 텍스트 형식으로 내보낼 수 있는 최소한의 히스토그램입니다."""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = sorted(buckets)
+        self._series: Dict[LabelKey, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                labels = ",".join(f'{k}="{v}"' for k, v in key)
+                sep = "," if labels else ""
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound:g}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {count}')
+                suffix = f"{{{labels}}}" if labels else ""
+                lines.append(f"{self.name}_sum{suffix} {total:g}")
+                lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+REGISTRY: List[Histogram] = []
+
+
+def histogram(name: str, help_text: str, buckets: Sequence[float]) -> Histogram:
+    metric = Histogram(name, help_text, buckets)
+    REGISTRY.append(metric)
+    return metric
+
+
+def render_all() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+PROMPT_TOKENS = histogram(
+    "tutor_prompt_tokens",
+    "Prompt tokens sent per agent call",
+    [250, 500, 1000, 2000, 4000, 8000, 16000, 32000],
+)
+HISTORY_MESSAGES = histogram(
+    "tutor_history_messages",
+    "Verbatim history messages kept in the prompt after windowing",
+    [2, 4, 8, 16, 32, 64, 128],
+)
+
+# --- 요청·단계별 지연 ---
+LATENCY_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+TOKEN_BUCKETS = [10, 50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000]
+
+REQUEST_SECONDS = histogram(
+    "http_request_duration_seconds",
+    "Total time per request, until the last body byte is sent",
+    LATENCY_BUCKETS,
+)
+REQUEST_TTFB_SECONDS = histogram(
+    "http_request_ttfb_seconds",
+    "Time until the first response body byte is sent",
+    LATENCY_BUCKETS,
+)
+STAGE_SECONDS = histogram(
+    "tutor_stage_duration_seconds",
+    "Time spent in a request stage (parse, state, prompt_build)",
+    LATENCY_BUCKETS,
+)
+LLM_SECONDS = histogram(
+    "tutor_llm_duration_seconds",
+    "Total LLM call time per agent, including retries",
+    LATENCY_BUCKETS,
+)
+LLM_TTFB_SECONDS = histogram(
+    "tutor_llm_ttfb_seconds",
+    "Time to the first streamed token per agent (streaming calls only)",
+    LATENCY_BUCKETS,
+)
+LLM_USAGE_TOKENS = histogram(
+    "tutor_llm_usage_tokens",
+    "Prompt and completion tokens per LLM call as reported by the API",
+    TOKEN_BUCKETS,
+)
+DB_SECONDS = histogram(
+    "tutor_db_duration_seconds",
+    "SQLite call time per store and operation",
+    LATENCY_BUCKETS,
+)
+DICTIONARY_SECONDS = histogram(
+    "tutor_dictionary_lookup_seconds",
+    "Dictionary lookup time by the tier that answered (memory, disk, remote)",
+    LATENCY_BUCKETS,
+)
+
+
+# --- 요청 단위 추적 ---
+# 느린 요청의 단계별 기록을 JSON 줄로 남깁니다. METRICS_TRACE_PATH 를 지정해야 켜집니다.
+TRACE_PATH = os.getenv("METRICS_TRACE_PATH")
+TRACE_SLOW_SECONDS = float(os.getenv("METRICS_TRACE_SLOW_SECONDS", "2.0"))
+TRACE_SAMPLE_RATE = float(os.getenv("METRICS_TRACE_SAMPLE_RATE", "1.0"))   # 느린 요청 중 기록할 비율
+
+
+class RequestTrace:
+    """요청 하나에서 관측된 (지표, 레이블, 시작 시각, 소요 시간) 목록입니다."""
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.spans: List[Tuple[str, Dict[str, str], float, float]] = []
+
+    def add(self, name: str, labels: Dict[str, str], started: float, seconds: float):
+        self.spans.append((name, labels, started - self.started, seconds))
+
+    def to_json(self, route: str, status: int, total: float, ttfb: Optional[float]) -> str:
+        return json.dumps({
+            "ts": time.time(),
+            "method": self.method,
+            "path": self.path,
+            "route": route,
+            "status": status,
+            "total_ms": round(total * 1000, 2),
+            "ttfb_ms": round(ttfb * 1000, 2) if ttfb is not None else None,
+            "spans": [
+                {"name": name, **labels, "start_ms": round(start * 1000, 2), "ms": round(seconds * 1000, 2)}
+                for name, labels, start, seconds in self.spans
+            ],
+        }, ensure_ascii=False)
+
+
+_current_trace: "contextvars.ContextVar[Optional[RequestTrace]]" = contextvars.ContextVar("request_trace", default=None)
+_trace_lock = threading.Lock()
+
+
+def observe(metric: Histogram, seconds: float, started: Optional[float] = None, **labels: str):
+    """지표에 기록하고, 요청 안이라면 그 요청의 추적에도 남깁니다."""
+    metric.observe(seconds, **labels)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(metric.name, labels, started if started is not None else time.perf_counter() - seconds, seconds)
+
+
+@contextmanager
+def timed(metric: Histogram, **labels: str):
+    """with 블록의 소요 시간을 지표(와 현재 요청의 추적)에 기록합니다."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(metric, time.perf_counter() - started, started, **labels)
+
+
+def since_request_start(stage: str):
+    """요청이 도착한 시점부터 지금까지를 한 단계로 기록합니다. (본문 수신·JSON 파싱 등 핸들러 이전 구간)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        observe(STAGE_SECONDS, time.perf_counter() - trace.started, trace.started, stage=stage)
+
+
+def _write_trace(line: str):
+    with _trace_lock:
+        with open(TRACE_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class MetricsMiddleware:
+    """
+    모든 요청의 전체 시간과 첫 바이트까지의 시간을 (method, route, status)별로 기록하는 ASGI 미들웨어입니다.
+    route 는 /api/poems/{poem_id} 처럼 경로 템플릿이라 레이블 수가 늘지 않습니다.
+    스트리밍 응답은 마지막 조각을 보낼 때까지를 전체 시간으로 봅니다.
+    """
+
+    def __init__(self, app, exclude: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.exclude = set(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(scope["method"], scope["path"])
+        token = _current_trace.set(trace)
+        status = 500
+        ttfb = None
+
+        async def send_wrapper(message):
+            nonlocal status, ttfb
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and ttfb is None:
+                ttfb = time.perf_counter() - trace.started
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            total = time.perf_counter() - trace.started
+            route = getattr(scope.get("route"), "path", "unmatched")
+            labels = {"method": scope["method"], "route": route, "status": str(status)}
+            REQUEST_SECONDS.observe(total, **labels)
+            if ttfb is not None:
+                REQUEST_TTFB_SECONDS.observe(ttfb, **labels)
+            if TRACE_PATH and total >= TRACE_SLOW_SECONDS and random.random() < TRACE_SAMPLE_RATE:
+                _write_trace(trace.to_json(route, status, total, ttfb))
@@ -0,0 +1,70 @@
+﻿"""
+데이터셋의 모든 시에서 어휘를 뽑아 사전 검색 결과를 미리 디스크 캐시에 채웁니다.
+수업 중 단어 검색이 원격 API까지 가는 일이 거의 없도록 하기 위한 배치 작업입니다.
+이미 캐시된 단어는 원격 호출 없이 건너뛰므로 중간에 멈춰도 다시 실행하면 이어집니다.
+
+실행 예: cd backend && python prefetch_dictionary.py --concurrency 8 --rate 10
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+from services.poem_loader import PoemLoader
+from services.dictionary import DictionaryService, extract_words
+from services.glossary import GlossaryService
+from services.rate_limit import RateLimiter
+
+
+async def prefetch(args):
+    poems = PoemLoader(args.data).load()
+    vocabulary = list(dict.fromkeys(w for poem in poems for w in extract_words(poem.content)))
+    # 낱말 하나를 찾는 데 후보마다 원격 호출이 생길 수 있으므로 --rate 는 원격 호출마다 적용합니다.
+    service = DictionaryService(cache_db=args.db, limiter=RateLimiter(args.rate))
+
+    # 사전 조회는 표면형부터 찾으므로 표면형이 이미 디스크에 있는 낱말은 제외합니다.
+    # 여러 낱말이 같은 표제어 후보로 넘어가도 후보 검색은 캐시와 single-flight 로 한 번만 원격까지 갑니다.
+    todo = [w for w in vocabulary if service._disk_get(w, args.limit) is None]
+    print(f"어휘 {len(vocabulary)}개 중 {len(todo)}개를 새로 조회합니다.")
+
+    gate = asyncio.Semaphore(args.concurrency)
+    started = time.monotonic()
+    done = 0
+
+    async def run(word):
+        nonlocal done
+        async with gate:
+            await service.alookup(word, limit=args.limit)
+            done += 1
+            if done % 200 == 0:
+                print(f"  {done}/{len(todo)} ({done / (time.monotonic() - started):.1f}개/초)")
+
+    await asyncio.gather(*(run(w) for w in todo))
+    print(f"✅ 어휘 조회 완료: 원격 호출 {service.remote_calls}회, 오류 {service.errors}회")
+
+    if args.glossaries:
+        glossaries = GlossaryService(service, poems, db_path=args.db)
+        for poem in poems:
+            await glossaries.get(poem, rebuild=True)
+        print(f"✅ 시 {len(poems)}편의 풀이집을 만들었습니다.")
+    await service.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="시 어휘 사전 캐시 미리 채우기")
+    parser.add_argument("--data", default="data/KPoEM_poem_dataset_v4.tsv")
+    parser.add_argument("--db", default="dictionary_cache.db")
+    parser.add_argument("--limit", type=int, default=4, help="단어당 저장할 뜻풀이 수 (/api/dictionary 기본값과 같아야 합니다)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=10.0, help="초당 최대 원격 호출 수")
+    parser.add_argument("--glossaries", action="store_true", help="시별 어려운 낱말 풀이집도 함께 만듭니다")
+    asyncio.run(prefetch(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+﻿import os
+from typing import NamedTuple, Optional
+
+from services.poem_loader import PoemLoader
+from services.poem_catalog import PoemCatalog
+from services import poem_search
+from services.passages import passage_index
+
+# 읽기 전용이고 만들기 비싼 데이터셋 객체들입니다. 프로세스마다 한 번만 만듭니다.
+# serve.py 는 워커를 fork 하기 전에 load_dataset() 을 불러 두므로, 워커들은 이 객체들을 복사 없이(copy-on-write) 물려받습니다.
+POEM_DATA_PATH = os.getenv("POEM_DATA_PATH", "data/KPoEM_poem_dataset_v4.tsv")
+
+
+class Dataset(NamedTuple):
+    loader: PoemLoader
+    catalog: PoemCatalog
+    search_index: poem_search.PoemSearchIndex
+
+
+_dataset: Optional[Dataset] = None
+
+
+def load_dataset() -> Dataset:
+    """시 목록·카탈로그·검색 색인·단락 색인을 만들거나, 이미 만들었으면 그대로 돌려줍니다."""
+    global _dataset
+    if _dataset is None:
+        loader = PoemLoader(POEM_DATA_PATH)
+        catalog = PoemCatalog(loader).load()
+        # 검색 색인: SEARCH_INDEX_PATH 의 파일이 현재 데이터셋과 맞으면 불러오고, 아니면 만들어 저장합니다.
+        search_index = poem_search.load_or_build(loader, os.getenv("SEARCH_INDEX_PATH") or None)
+        # 긴 시에서 턴마다 관련 단락만 보내기 위한 시별 단락 색인
+        passage_index.build(loader.load_segments())
+        _dataset = Dataset(loader, catalog, search_index)
+    return _dataset
@@ -1,5 +1,5 @@
 ﻿from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from enum import Enum
 
 # 앱의 진행 단계 정의
@@ -16,6 +16,28 @@ class Poem(BaseModel):
     author: str
     content: str
 
+# 데이터셋의 한 행(단락). 한 편의 시는 여러 단락(seg_id)으로 나뉠 수 있습니다.
+class PoemSegment(BaseModel):
+    seg_id: int
+    poem_id: int
+    text: str
+    title: str
+    sub_title: str = ""
+    poetry_book: str = ""
+    poet: str
+    annotations: List[List[str]] = []  # 주석자별 감정 레이블 목록
+
+# 시 목록용 요약 (본문 제외)
+class PoemSummary(BaseModel):
+    id: int
+    title: str
+    author: str
+
+# 검색 결과 한 건
+class PoemSearchHit(PoemSummary):
+    score: float
+    emotions: Dict[str, int] = {}  # 감정 레이블 -> 그 레이블을 단 주석자 수
+
 # 대화 메시지 구조
 class Message(BaseModel):
     role: str
@@ -27,6 +49,17 @@ class AgentRole(str, Enum):
     AESTHETIC = "aesthetic"
     INTERPRETIVE = "interpretive"
 
+# 한 턴의 답변을 만드는 방식: 튜터마다 따로 호출(multi) / 한 번의 호출로 세 질문을 함께 생성(fused)
+class ChatMode(str, Enum):
+    MULTI = "multi"
+    FUSED = "fused"
+
+# fused 모드에서 모델이 돌려주는 JSON
+class FusedReply(BaseModel):
+    empathy: str = Field(..., min_length=1)
+    aesthetic: str = Field(..., min_length=1)
+    interpretive: str = Field(..., min_length=1)
+
 # 독자 역량 state
 class UserLevel(BaseModel):
     emp_state: int = Field(1, ge=1, le=6, description="공감 역량")
@@ -39,4 +72,31 @@ class AppSessionState(BaseModel):
     user_name: Optional[str] = None
     selected_poem: Optional[Poem] = None
     user_level: UserLevel = Field(default_factory=UserLevel)
-    shared_chat_history: List[Message] = []
\ No newline at end of file
+    shared_chat_history: List[Message] = []
+    session_id: Optional[str] = None
+
+# 서버 측 대화 세션 (히스토리를 서버가 보관합니다)
+class ChatSession(BaseModel):
+    session_id: str
+    user_name: Optional[str] = None
+    poem_id: int
+    user_level: UserLevel = Field(default_factory=UserLevel)
+    history: List[Message] = []
+    latest_responses: Dict[str, str] = {}
+
+# 세션 생성 요청
+class SessionCreate(BaseModel):
+    user_name: Optional[str] = "학생"
+    poem_id: int
+    user_level: UserLevel = Field(default_factory=UserLevel)
+
+# 세션 턴 요청: 새 입력과, 답한 튜터만 보냅니다.
+class SessionTurn(BaseModel):
+    user_input: str = ""
+    selected_agent: Optional[AgentRole] = None
+    mode: Optional[ChatMode] = None  # 없으면 서버 기본값(CHAT_MODE)을 따릅니다.
+
+# 여러 낱말 한 번에 찾기
+class DictionaryBatchRequest(BaseModel):
+    words: List[str] = Field(..., max_length=200)
+    limit: int = Field(4, ge=1, le=10)
\ No newline at end of file
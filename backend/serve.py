@@ -0,0 +1,130 @@
+﻿"""
+운영용 실행 스크립트입니다. 워커 프로세스 여러 개로 같은 포트를 나눠 받습니다.
+
+  1) 부모 프로세스가 시 데이터셋(카탈로그·검색 색인)을 한 번 읽고 gc.freeze() 로 고정한 뒤 워커를 fork 합니다.
+     워커들은 이 객체들을 복사 없이(copy-on-write) 물려받으므로, 워커 수만큼 파싱하지도 메모리를 늘리지도 않습니다.
+  2) SQLite 연결·HTTP 클라이언트는 fork 뒤 각 워커가 처음 쓸 때 엽니다.
+  3) 워커가 여럿이면 세션(SESSION_DB, SESSION_SHARED)과 LLM 응답 캐시(CACHE_BACKEND=sqlite)를
+     SQLite 파일로 공유하도록 기본값을 잡습니다. 사전 캐시와 첫 질문은 원래 SQLite 파일을 함께 씁니다.
+  4) 부모는 워커를 감시하다 죽으면 다시 띄우고, SIGTERM/SIGINT 를 받으면 워커에 넘겨 정리합니다.
+
+실행: python backend/serve.py --workers 4 --port 8000  (저장소 루트에서; 데이터셋 경로가 상대 경로입니다)
+"""
+import os
+import gc
+import sys
+import time
+import signal
+import socket
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+RESPAWN_DELAY = 1.0
+
+
+def _default_workers() -> int:
+    return int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, args):
+    """fork 된 워커에서 실행됩니다. 부모의 시그널 처리를 되돌리고 uvicorn 으로 공유 소켓을 받습니다."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    import uvicorn
+    import main
+
+    config = uvicorn.Config(main.app, log_level=args.log_level, backlog=args.backlog, timeout_keep_alive=args.keep_alive)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=_default_workers(), help="워커 프로세스 수 (기본값: WEB_CONCURRENCY 또는 CPU 수)")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--keep-alive", type=int, default=5, help="유휴 keep-alive 연결 유지 시간(초)")
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    args = parser.parse_args()
+    workers = max(1, args.workers)
+
+    if workers > 1:
+        os.environ.setdefault("SESSION_DB", "sessions.db")
+        os.environ.setdefault("SESSION_SHARED", "1")
+        os.environ.setdefault("CACHE_BACKEND", "sqlite")
+
+    from preload import load_dataset
+
+    started = time.perf_counter()
+    dataset = load_dataset()
+    print(f"✅ 시 {len(dataset.catalog)}편과 검색 색인을 fork 전에 불러왔습니다. ({time.perf_counter() - started:.2f}s)")
+    # 지금까지 만든 객체를 GC 추적 대상에서 빼서, 워커의 GC가 참조 카운트 페이지를 건드려 복사되지 않게 합니다.
+    gc.collect()
+    gc.freeze()
+
+    sock = _bind(args.host, args.port, args.backlog)
+    print(f"🚀 http://{args.host}:{args.port} 에서 워커 {workers}개로 시작합니다. (부모 pid={os.getpid()})")
+
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(sock, args)
+            except BaseException as e:
+                print(f"❌ 워커 {os.getpid()} 종료: {e!r}")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        spawned_at = children.pop(pid, None)
+        if stopping or spawned_at is None:
+            continue
+        print(f"⚠️ 워커 {pid} 가 종료되었습니다. (status={status}) 다시 띄웁니다.")
+        # 시작하자마자 죽는 워커를 끝없이 빠르게 되살리지 않도록 잠시 기다립니다.
+        if time.monotonic() - spawned_at < RESPAWN_DELAY:
+            time.sleep(RESPAWN_DELAY)
+        spawn()
+
+    sock.close()
+    print("👋 모든 워커가 종료되었습니다.")
+
+
+if __name__ == "__main__":
+    main()
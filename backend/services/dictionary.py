@@ -1,51 +1,337 @@
-﻿import requests
+﻿import os
+import re
+import time
+import json
+import sqlite3
+import asyncio
+import threading
 import xml.etree.ElementTree as ET
-from typing import List, Dict
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    # 원격 조회를 처음 할 때 불러옵니다. (서버 시작 시간 단축)
+    import httpx
+    import requests
+
+from metrics import DB_SECONDS, DICTIONARY_SECONDS, observe, timed
+from services.response_cache import ResponseCache
+from services.rate_limit import RateLimiter
+from services.lemmatizer import lemma_candidates, primary_lemma
+
+_WORD_RE = re.compile(r"[가-힣]{2,}")
+# 검색 결과가 없다는 응답을 디스크에 보관하는 시간(초). 지나면 다시 원격으로 확인합니다.
+DICTIONARY_EMPTY_TTL = float(os.getenv("DICTIONARY_EMPTY_TTL", str(24 * 3600)))
+
+
+def extract_words(text: str) -> List[str]:
+    """시 본문에서 사전 검색 대상이 될 한글 어절을 중복 없이 뽑습니다. (두 글자 이상)"""
+    return list(dict.fromkeys(_WORD_RE.findall(text)))
+
+
+class DictionaryAPIError(Exception):
+    """우리말샘이 HTTP 200 과 함께 <error> 본문(잘못된 인증키, 호출 한도 초과 등)을 돌려준 경우입니다."""
+
+    def __init__(self, code: Optional[str], message: Optional[str]):
+        super().__init__(f"우리말샘 API 오류 {code}: {message}")
+        self.code = code
+        self.message = message
+
+
+class SenseParser:
+    """
+    우리말샘 XML 응답을 조각(chunk) 단위로 받아 뜻풀이를 뽑는 증분 파서입니다.
+    <sense>가 닫힐 때마다 하나씩 꺼내고 다 쓴 요소는 지우므로, 응답이 커도 메모리가 늘지 않습니다.
+    limit 개를 모으면 done 이 되어 나머지 본문은 읽지 않아도 됩니다.
+    최상위 요소가 <error> 이면 DictionaryAPIError 를 올립니다. (빈 결과로 캐시되지 않도록)
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.senses: List[Dict] = []
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._stack: List[ET.Element] = []
+        self._word: Optional[str] = None
+        self._error: Optional[Dict[str, Optional[str]]] = None
+
+    @property
+    def done(self) -> bool:
+        return len(self.senses) >= self.limit
+
+    def feed(self, chunk: bytes) -> bool:
+        """조각을 넣고, limit 개를 다 모았으면 True 를 반환합니다."""
+        if self.done:
+            return True
+        self._parser.feed(chunk)
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                if not self._stack and elem.tag == "error":
+                    self._error = {}
+                self._stack.append(elem)
+                continue
+            self._stack.pop()
+            parent = self._stack[-1] if self._stack else None
+            tag = elem.tag
+            if self._error is not None:
+                if tag in ("error_code", "message"):
+                    self._error[tag] = elem.text
+                elif parent is None:
+                    raise DictionaryAPIError(self._error.get("error_code"), self._error.get("message"))
+            elif tag == "word" and parent is not None and parent.tag == "item":
+                self._word = elem.text
+            elif tag == "sense" and parent is not None and parent.tag == "item":
+                definition = elem.find("definition")
+                pos = elem.find("pos")
+                cat = elem.find("cat")
+                self.senses.append({
+                    "word": self._word,
+                    "definition": definition.text if definition is not None else None,
+                    "pos": pos.text if pos is not None else "N/A",
+                    "category": cat.text if cat is not None else ""
+                })
+                parent.remove(elem)
+                # 원하는 개수만큼만 담고 중단
+                if self.done:
+                    return True
+            elif tag == "item":
+                self._word = None
+                if parent is not None:
+                    parent.remove(elem)
+        return False
+
+    def close(self) -> List[Dict]:
+        """본문을 끝까지 넣었다면 문서가 온전한지 확인하고, 모은 뜻풀이를 반환합니다."""
+        if not self.done:
+            self._parser.close()
+        if self._error is not None:
+            # 루트가 닫히기 전에 본문이 끝난 <error> 응답
+            raise DictionaryAPIError(self._error.get("error_code"), self._error.get("message"))
+        return self.senses
+
 
 class DictionaryService:
-    def __init__(self):
+    """
+    우리말샘 오픈 API 검색을 3단계로 처리합니다.
+      1) 메모리 LRU  2) 디스크(SQLite)에 저장된 파싱 결과  3) 원격 API (비동기 풀 클라이언트, 타임아웃)
+    같은 단어에 대한 동시 요청은 원격 호출 하나를 함께 기다립니다. (single-flight)
+    """
+
+    def __init__(self, cache_db: Optional[str] = "dictionary_cache.db", memory_size: int = 4096,
+                 timeout: float = 5.0, limiter: Optional[RateLimiter] = None):
         # .env 파일에서 가져온 키를 사용한다고 가정합니다.
-        self.api_key = "발급받은_인증키"
-        self.base_url = "https://opendict.korean.go.kr/api/search"
+        self.api_key = os.getenv("OPENDICT_API_KEY", "발급받은_인증키")
+        self.base_url = os.getenv("OPENDICT_BASE_URL", "https://opendict.korean.go.kr/api/search")
+        self.timeout = timeout
+        # 주어지면 원격 호출마다 기다립니다. (배치 작업이 API 호출 한도를 넘지 않도록)
+        self.limiter = limiter
+        self.memory = ResponseCache(maxsize=memory_size, ttl=24 * 3600)
+        self.remote_calls = 0
+        self.errors = 0
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._session: Optional["requests.Session"] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # 디스크 캐시는 처음 쓸 때 엽니다. cache_db 가 없으면 쓰지 않습니다.
+        self.cache_db = cache_db
+        self._db_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
 
-    def search_word(self, word: str, limit: int = 4) -> List[Dict]:
-        params = {
+    def _params(self, word: str) -> Dict[str, str]:
+        return {
             "key": self.api_key,
             "q": word,
             "part": "word",
             "sort": "popular",
             "method": "exact" # 정확히 일치하는 단어만
         }
-        
+
+    @staticmethod
+    def _parse(content: bytes, limit: int) -> List[Dict]:
+        """이미 받아 둔 응답 본문 전체를 파싱합니다."""
+        parser = SenseParser(limit)
+        parser.feed(content)
+        return parser.close()
+
+    # --- 디스크 캐시 ---
+    def _connection(self) -> sqlite3.Connection:
+        """처음 쓸 때 연결하고 테이블을 만듭니다. self._db_lock 안에서 부릅니다."""
+        if self._conn is None:
+            conn = sqlite3.connect(self.cache_db, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS dictionary_cache (
+                    word TEXT NOT NULL,
+                    sense_limit INTEGER NOT NULL,
+                    senses TEXT NOT NULL,
+                    fetched_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (word, sense_limit)
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _disk_get(self, word: str, limit: int) -> Optional[List[Dict]]:
+        if not self.cache_db:
+            return None
+        with self._db_lock, timed(DB_SECONDS, store="dictionary", op="get"):
+            row = self._connection().execute(
+                "SELECT senses, fetched_at >= datetime('now', ?) FROM dictionary_cache WHERE word = ? AND sense_limit = ?",
+                (f"-{int(DICTIONARY_EMPTY_TTL)} seconds", word, limit)
+            ).fetchone()
+        if row is None:
+            return None
+        senses = json.loads(row[0])
+        # 결과가 없다는 기록은 DICTIONARY_EMPTY_TTL 이 지나면 없는 것으로 봅니다.
+        if not senses and not row[1]:
+            return None
+        return senses
+
+    def _disk_put(self, word: str, limit: int, senses: List[Dict]):
+        if not self.cache_db:
+            return
+        with self._db_lock, timed(DB_SECONDS, store="dictionary", op="put"):
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO dictionary_cache (word, sense_limit, senses) VALUES (?, ?, ?)",
+                (word, limit, json.dumps(senses, ensure_ascii=False))
+            )
+            conn.commit()
+
+    # --- 원격 API ---
+    def _get_client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            )
+        return self._client
+
+    async def _fetch(self, word: str, limit: int) -> List[Dict]:
+        """원격 API를 호출해 파싱합니다. 네트워크·파싱·API(<error>) 오류는 예외로 올립니다. (결과는 캐시하지 않음)"""
+        if self.limiter is not None:
+            await self.limiter.wait()
+        self.remote_calls += 1
+        parser = SenseParser(limit)
+        # 본문을 내려받는 대로 파싱하고, 뜻풀이를 limit 개 모으면 나머지는 읽지 않고 연결을 닫습니다.
+        async with self._get_client().stream("GET", self.base_url, params=self._params(word)) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                if parser.feed(chunk):
+                    break
+        return parser.close()
+
+    async def _resolve(self, key: str, word: str, limit: int) -> List[Dict]:
+        started = time.perf_counter()
+        senses = await asyncio.to_thread(self._disk_get, word, limit)
+        tier = "disk"
+        if senses is None:
+            tier = "remote"
+            senses = await self._fetch(word, limit)
+            # 검색 결과가 없는 단어도 저장해 두어 한동안(DICTIONARY_EMPTY_TTL) 다시 묻지 않습니다.
+            # 네트워크·파싱·API 오류는 _fetch 가 예외로 올리므로 저장되지 않습니다.
+            await asyncio.to_thread(self._disk_put, word, limit, senses)
+        self.memory.set(key, senses)
+        observe(DICTIONARY_SECONDS, time.perf_counter() - started, started, tier=tier)
+        return senses
+
+    async def asearch_word(self, word: str, limit: int = 4) -> List[Dict]:
+        key = f"{word}\x1f{limit}"
+        started = time.perf_counter()
+        senses = self.memory.get(key)
+        if senses is not None:
+            observe(DICTIONARY_SECONDS, time.perf_counter() - started, started, tier="memory")
+            return senses
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._resolve(key, word, limit))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
         try:
-            response = requests.get(self.base_url, params=params)
-            # XML 파싱 시작
-            root = ET.fromstring(response.content)
-            
-            results = []
-            # <item> 태그들을 찾아 순회합니다.
-            for item in root.findall(".//item"):
-                word_text = item.find("word").text
-                
-                # 하나의 아이템 안에 여러 <sense>가 있을 수 있습니다.
-                for sense in item.findall("sense"):
-                    definition = sense.find("definition").text
-                    pos = sense.find("pos").text if sense.find("pos") is not None else "N/A"
-                    cat = sense.find("cat").text if sense.find("cat") is not None else ""
-                    
-                    results.append({
-                        "word": word_text,
-                        "definition": definition,
-                        "pos": pos,
-                        "category": cat
-                    })
-                    
-                    # 원하는 개수만큼만 담고 중단
-                    if len(results) >= limit:
-                        return results
-            
-            return results
-            
+            return await asyncio.shield(task)
         except Exception as e:
+            self.errors += 1
             print(f"사전 검색 중 오류 발생: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    async def alookup(self, surface: str, limit: int = 4) -> Tuple[Optional[str], List[Dict]]:
+        """
+        낱말을 사전에서 찾습니다. 표면형 그대로 먼저 검색하고(나라, 사과 같은 체언이 나다, 사로 바뀌지 않도록),
+        뜻풀이가 없을 때만 활용형으로 보고 표제어 후보를 순서대로 검색해 처음으로 뜻풀이가 나온 후보를 표제어로 씁니다.
+        반환값: (표제어 또는 None, 뜻풀이 목록)
+        """
+        word = surface.strip()
+        senses = await self.asearch_word(word, limit)
+        if senses:
+            return word, senses
+        return await self._alookup_lemma(word, limit)
+
+    async def _alookup_lemma(self, word: str, limit: int) -> Tuple[Optional[str], List[Dict]]:
+        """표면형으로 찾지 못한 낱말을 규칙으로 만든 표제어 후보로 찾습니다."""
+        for candidate in lemma_candidates(word):
+            if candidate == word:
+                continue
+            senses = await self.asearch_word(candidate, limit)
+            if senses:
+                return candidate, senses
+        return None, []
+
+    async def alookup_many(self, surfaces: List[str], limit: int = 4) -> List[Dict]:
+        """
+        여러 표면형을 한 번에 찾습니다. 서로 다른 단어는 동시에 조회합니다.
+        표면형으로 찾지 못한 낱말은 대표 표제어가 같은 것(바람에, 바람을)끼리 묶어 표제어 후보를 한 번만 조회합니다.
+        입력 순서대로 {"word", "lemma", "meanings"} 목록을 반환합니다.
+        """
+        words = list(dict.fromkeys(surface.strip() for surface in surfaces))
+        exact = await asyncio.gather(*(self.asearch_word(word, limit) for word in words))
+        found = {word: (word, senses) for word, senses in zip(words, exact) if senses}
+
+        unique = {}
+        for word in words:
+            if word not in found:
+                unique.setdefault(primary_lemma(word), word)
+        resolved = await asyncio.gather(*(self._alookup_lemma(word, limit) for word in unique.values()))
+        by_lemma = dict(zip(unique.keys(), resolved))
+
+        results = []
+        for surface in surfaces:
+            word = surface.strip()
+            lemma, senses = found.get(word) or by_lemma[primary_lemma(word)]
+            results.append({"word": surface, "lemma": lemma, "meanings": senses})
+        return results
+
+    def search_word(self, word: str, limit: int = 4) -> List[Dict]:
+        """동기 버전입니다. (스크립트 등 이벤트 루프 밖에서 사용)"""
+        key = f"{word}\x1f{limit}"
+        senses = self.memory.get(key)
+        if senses is None:
+            senses = self._disk_get(word, limit)
+        if senses is None:
+            try:
+                if self._session is None:
+                    import requests
+                    self._session = requests.Session()
+                self.remote_calls += 1
+                parser = SenseParser(limit)
+                with self._session.get(self.base_url, params=self._params(word), timeout=self.timeout,
+                                       stream=True) as response:
+                    response.raise_for_status()
+                    for chunk in response.iter_content(chunk_size=16384):
+                        if parser.feed(chunk):
+                            break
+                senses = parser.close()
+            except Exception as e:
+                self.errors += 1
+                print(f"사전 검색 중 오류 발생: {e}")
+                return []
+            self._disk_put(word, limit, senses)
+        self.memory.set(key, senses)
+        return senses
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.memory.stats(), "remote_calls": self.remote_calls, "errors": self.errors}
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,85 @@
+﻿import json
+import sqlite3
+import asyncio
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+from schemas import Poem
+from metrics import DB_SECONDS, timed
+from services.dictionary import DictionaryService, extract_words
+from services.lemmatizer import primary_lemma
+
+
+class GlossaryService:
+    """
+    시마다 '어려운 낱말' 풀이집을 만들어 둡니다.
+    어려운 낱말은 데이터셋 전체에서 드물게 나오는 어휘(대표 표제어 기준 max_poems 편 이하)로 정합니다.
+    만든 풀이집은 메모리와 SQLite에 저장하여, 이후에는 한 번의 조회로 바로 반환합니다.
+    SQLite 읽기·쓰기는 이벤트 루프 밖(스레드)에서 실행합니다.
+    """
+
+    def __init__(self, dict_service: DictionaryService, poems: List[Poem], db_path: Optional[str] = "dictionary_cache.db",
+                 max_words: int = 30, max_poems: int = 3):
+        self.dict_service = dict_service
+        self.max_words = max_words
+        self.max_poems = max_poems
+        self._memo: Dict[int, List[Dict]] = {}
+        self._lock = threading.Lock()
+        # 대표 표제어별로 몇 편의 시에 등장하는지 셉니다.
+        self.poem_frequency = Counter(
+            lemma for poem in poems for lemma in {primary_lemma(w) for w in extract_words(poem.content)}
+        )
+        self._conn = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS glossaries (
+                    poem_id INTEGER PRIMARY KEY,
+                    entries TEXT NOT NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            self._conn.commit()
+
+    def hard_words(self, poem: Poem) -> List[str]:
+        words = [w for w in extract_words(poem.content) if self.poem_frequency[primary_lemma(w)] <= self.max_poems]
+        # 드문 낱말부터, 같으면 시에 나온 순서대로
+        order = {w: i for i, w in enumerate(words)}
+        words.sort(key=lambda w: (self.poem_frequency[primary_lemma(w)], order[w]))
+        return words[:self.max_words]
+
+    def _load(self, poem_id: int) -> Optional[List[Dict]]:
+        if self._conn is None:
+            return None
+        with self._lock, timed(DB_SECONDS, store="glossary", op="get"):
+            row = self._conn.execute("SELECT entries FROM glossaries WHERE poem_id = ?", (poem_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _save(self, poem_id: int, entries: List[Dict]):
+        if self._conn is None:
+            return
+        with self._lock, timed(DB_SECONDS, store="glossary", op="save"):
+            self._conn.execute(
+                "INSERT OR REPLACE INTO glossaries (poem_id, entries) VALUES (?, ?)",
+                (poem_id, json.dumps(entries, ensure_ascii=False))
+            )
+            self._conn.commit()
+
+    async def get(self, poem: Poem, rebuild: bool = False) -> List[Dict]:
+        if not rebuild:
+            entries = self._memo.get(poem.id)
+            if entries is None:
+                entries = await asyncio.to_thread(self._load, poem.id)
+            if entries is not None:
+                self._memo[poem.id] = entries
+                return entries
+
+        errors_before = self.dict_service.errors
+        looked_up = await self.dict_service.alookup_many(self.hard_words(poem))
+        entries = [entry for entry in looked_up if entry["meanings"]]
+        # 조회 중 오류가 있었다면 불완전한 풀이집이므로 저장하지 않습니다.
+        if self.dict_service.errors == errors_before:
+            self._memo[poem.id] = entries
+            await asyncio.to_thread(self._save, poem.id, entries)
+        return entries
@@ -0,0 +1,83 @@
+﻿import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from services.tokenizer import count_tokens, MESSAGE_OVERHEAD
+
+# (이전 요약, 새로 접을 메시지들) -> 새 요약
+Summarizer = Callable[[str, List[dict]], Awaitable[str]]
+
+
+class HistoryWindow:
+    """
+    히스토리를 토큰 예산 안으로 줄입니다.
+    예산을 넘는 오래된 턴은 대화별 롤링 요약으로 접고, 최근 턴만 원문 그대로 남깁니다.
+    요약은 (접힌 메시지 수, 요약문)으로 캐시되며, 더 접어야 할 때 새로 밀려난 메시지만 이어서 요약합니다.
+    """
+
+    def __init__(self, summarize: Summarizer, max_conversations: int = 1000, headroom: float = 0.6):
+        self.summarize = summarize
+        self.max_conversations = max_conversations
+        # 접을 때는 예산의 headroom 비율까지 줄여서, 매 턴마다 요약이 돌지 않게 합니다.
+        self.headroom = headroom
+        self._summaries: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def conversation_key(session_id: Optional[str], user_name: Optional[str], poem_id: int, history: List[dict]) -> str:
+        """세션 ID가 없으면 (사용자, 시, 첫 두 메시지)로 대화를 식별합니다."""
+        if session_id:
+            return session_id
+        opening = "\x1e".join(m["content"] for m in history[:2])
+        raw = f"{user_name}\x1f{poem_id}\x1f{opening}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _cutoff(self, history: List[dict], start: int, budget: int) -> int:
+        """history[start:]에서 뒤에서부터 budget 안에 들어가는 첫 인덱스를 찾습니다."""
+        used = 0
+        index = len(history)
+        while index > start:
+            cost = count_tokens(history[index - 1]["content"]) + MESSAGE_OVERHEAD
+            if used + cost > budget:
+                break
+            used += cost
+            index -= 1
+        return index
+
+    def _remember(self, key: str, folded: int, summary: str):
+        self._summaries[key] = (folded, summary)
+        self._summaries.move_to_end(key)
+        while len(self._summaries) > self.max_conversations:
+            old_key, _ = self._summaries.popitem(last=False)
+            self._locks.pop(old_key, None)
+
+    async def fit(self, key: str, history: List[dict], budget: int) -> Tuple[Optional[str], List[dict]]:
+        """(요약문 또는 None, 원문으로 남길 최근 메시지들)을 반환합니다. budget <= 0 이면 자르지 않습니다."""
+        if budget <= 0:
+            return None, history
+
+        folded, summary = self._summaries.get(key, (0, ""))
+        if folded > len(history):  # 같은 키로 다른 대화가 시작된 경우
+            folded, summary = 0, ""
+        if self._cutoff(history, folded, budget) == folded:
+            return summary or None, history[folded:]
+
+        # 같은 대화를 여러 에이전트가 동시에 접으려 하면 한 번만 요약합니다.
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            folded, summary = self._summaries.get(key, (folded, summary))
+            target = self._cutoff(history, folded, int(budget * self.headroom))
+            if target > folded:
+                try:
+                    summary = await self.summarize(summary, history[folded:target])
+                    folded = target
+                    self._remember(key, folded, summary)
+                except Exception as e:
+                    # 요약에 실패하면 이전 요약을 유지하고, 예산 밖의 메시지는 버립니다.
+                    print(f"히스토리 요약 실패: {e}")
+                    return summary or None, history[self._cutoff(history, folded, budget):]
+        return summary or None, history[folded:]
+
+    def stats(self) -> Dict[str, int]:
+        return {"conversations": len(self._summaries)}
@@ -0,0 +1,148 @@
+﻿"""
+가벼운 한국어 표제어 추정기입니다. 형태소 분석기 없이 규칙과 작은 표제어 표로
+시에 나온 활용형(우러러, 스치운다, 바람에 ...)을 사전 표제어 후보(우러르다, 스치다, 바람 ...)로 바꿉니다.
+후보는 가능성이 높은 순서대로 돌려주며, 첫 후보(primary_lemma)는 빈도 집계와 중복 제거의 키로 씁니다.
+사전 조회(DictionaryService.alookup)는 표면형을 먼저 찾고, 없을 때만 후보 중 처음 검색되는 것을 표제어로 정합니다.
+"""
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+# 규칙으로 풀기 어려운 시어·불규칙 활용형
+LEMMA_TABLE = {
+    "스치운다": "스치다",
+    "스치우는": "스치다",
+    "우러러": "우러르다",
+    "괴로워했다": "괴로워하다",
+    "가엾어집니다": "가엾다",
+    "그리워집니다": "그립다",
+    "미워져": "밉다",
+    "파아란": "파랗다",
+    "노오란": "노랗다",
+    "하이얀": "하얗다",
+    "가고파": "가다",
+    "이뇨": "이다",
+    "없노라": "없다",
+}
+
+# 체언 뒤의 조사 (긴 것부터 검사)
+PARTICLES = sorted([
+    "에게서", "으로서", "으로써", "에서는", "에게는", "한테서", "이라도", "이나마",
+    "까지", "부터", "처럼", "보다", "마저", "조차", "에서", "에게", "한테", "으로", "로서", "로써",
+    "라도", "이나", "이며", "이랑", "하고", "에는", "에도", "과는", "와는", "으론",
+    "은", "는", "이", "가", "을", "를", "에", "의", "도", "로", "와", "과", "만", "야", "여", "아", "랑",
+], key=len, reverse=True)
+
+# 용언 어미 (긴 것부터 검사). 어간 끝 음절의 받침에 붙는 어미(ㄴ다, ㅂ니다 등)는 받침 규칙에서 처리합니다.
+ENDINGS = sorted([
+    "었습니다", "았습니다", "였습니다", "습니다", "니다", "었다", "았다", "였다", "겠다", "는다",
+    "야겠다", "야지", "야만", "어야", "아야", "야",
+    "면서", "지만", "도록", "어서", "아서", "어도", "아도", "으며", "으면", "다가", "구나", "노라", "도다", "누나",
+    "는", "고", "며", "면", "지", "게", "니", "네", "던", "기", "어", "아", "다", "라", "자",
+], key=len, reverse=True)
+
+_BASE = 0xAC00
+JONG_N, JONG_L, JONG_M, JONG_B, JONG_SS = 4, 8, 16, 17, 20
+JUNG_A, JUNG_AE, JUNG_EO, JUNG_YEO, JUNG_O, JUNG_WA, JUNG_U, JUNG_WO, JUNG_EU, JUNG_I = 0, 1, 4, 6, 8, 9, 13, 14, 18, 20
+
+
+def _split(ch: str) -> Optional[Tuple[int, int, int]]:
+    code = ord(ch) - _BASE
+    if not 0 <= code < 11172:
+        return None
+    return code // 588, (code % 588) // 28, code % 28
+
+
+def _join(cho: int, jung: int, jong: int = 0) -> str:
+    return chr(_BASE + cho * 588 + jung * 28 + jong)
+
+
+def _with_jong(ch: str, jong: int) -> str:
+    parts = _split(ch)
+    return _join(parts[0], parts[1], jong) if parts else ch
+
+
+def _stem_variants(stem: str) -> List[str]:
+    """어미를 떼어 낸 어간 후보에서 '...다' 꼴의 표제어 후보를 만듭니다."""
+    if not stem:
+        return []
+    head, last = stem[:-1], stem[-1]
+    parts = _split(last)
+    out = [stem + "다"]
+    if parts is None:
+        return out
+    cho, jung, jong = parts
+
+    # 받침으로 붙은 어미: 간다(가+ㄴ다), 갈(가+ㄹ), 갑니다(가+ㅂ니다), 갔다(가+ㅆ다)
+    if jong in (JONG_N, JONG_L, JONG_M, JONG_B, JONG_SS):
+        bare = _join(cho, jung)
+        out.append(head + bare + "다")
+        stem, last, jong = head + bare, bare, 0
+        if parts[2] == JONG_SS:
+            # 과거형의 모음 축약을 되돌린 형태도 함께 시도합니다.
+            out.extend(_contracted(head, cho, jung))
+    if jong == 0:
+        out.extend(_contracted(head, cho, jung))
+    return out
+
+
+def _contracted(head: str, cho: int, jung: int) -> List[str]:
+    """아/어 어미와 축약된 음절을 되돌립니다. 예: 봐→보다, 져→지다, 해→하다, 아름다워→아름답다, 흘러→흐르다"""
+    out = []
+    if jung == JUNG_WA:
+        out.append(head + _join(cho, JUNG_O) + "다")
+    elif jung == JUNG_YEO:
+        out.append(head + _join(cho, JUNG_I) + "다")
+    elif jung == JUNG_AE and cho == 18:  # 해 -> 하
+        out.append(head + "하다")
+    elif jung == JUNG_WO and cho == 11 and head:  # ㅂ 불규칙: 워 -> 앞 음절 + ㅂ
+        out.append(head[:-1] + _with_jong(head[-1], JONG_B) + "다")
+    elif jung == JUNG_EO and cho == 5 and head:  # 르 불규칙: 흘러 -> 흐르, 우러러 -> 우러르
+        prev = _split(head[-1])
+        if prev and prev[2] == JONG_L:
+            out.append(head[:-1] + _join(prev[0], prev[1]) + "르다")
+        else:
+            out.append(head + "르다")
+    elif jung in (JUNG_A, JUNG_EO) and cho == 11 and head:  # 가아 -> 가, 서어 -> 서 (동음 탈락형)
+        out.append(head + "다")
+    return out
+
+
+@lru_cache(maxsize=65536)
+def lemma_candidates(surface: str) -> Tuple[str, ...]:
+    """
+    표면형의 표제어 후보를 가능성 높은 순으로 반환합니다.
+    표제어 표 → 조사를 뗀 체언 → 어미를 뗀 용언 → 표면형 자체 순서이므로, 규칙이 맞으면 첫 후보는 표제어입니다.
+    (바람에 → 바람, 스치운다 → 스치다) 규칙이 하나도 맞지 않으면 첫 후보는 표면형입니다.
+    규칙은 체언도 활용형처럼 자르므로(나라 → 나다) 사전 조회에서는 이 순서대로 찾지 말고 표면형을 먼저 찾아야 합니다.
+    """
+    word = surface.strip()
+    candidates = []
+    if word in LEMMA_TABLE:
+        candidates.append(LEMMA_TABLE[word])
+
+    # 체언 + 조사
+    for particle in PARTICLES:
+        if word.endswith(particle) and len(word) - len(particle) >= 1:
+            candidates.append(word[:-len(particle)])
+            break
+
+    # 용언 + 어미
+    matched = False
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) > len(ending):
+            candidates.extend(_stem_variants(word[:-len(ending)]))
+            matched = True
+
+    # 어미를 떼고 '다'를 붙인 꼴이 표면형과 같으면(간다 → 간+다) 규칙 후보로 보지 않습니다.
+    candidates = [c for c in candidates if c != word]
+    candidates.append(word)
+    # 받침으로 끝나는 관형형·명사형 (푸른, 갈, 삶 ...)
+    if not matched:
+        candidates.extend(_stem_variants(word)[1:])
+
+    return tuple(dict.fromkeys(c for c in candidates if c))
+
+
+def primary_lemma(surface: str) -> str:
+    """사전을 조회하지 않고 고른 대표 후보(첫 후보)입니다. 빈도 집계와 중복 제거의 키로 씁니다."""
+    return lemma_candidates(surface)[0]
@@ -0,0 +1,104 @@
+﻿import sqlite3
+import asyncio
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+from metrics import DB_SECONDS, timed
+
+OpenerKey = Tuple[int, str, int]  # (poem_id, agent, level)
+
+
+class OpenerStore:
+    """
+    미리 생성해 둔 첫 질문을 (시 ID, 에이전트, 수준) 단위로 저장합니다.
+    warm_openers.py 가 채우고, /api/chat/multi 가 첫 턴에 읽습니다.
+    """
+
+    def __init__(self, db_path: str = "openers.db"):
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._memo: Dict[OpenerKey, str] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """처음 쓸 때 연결하고 테이블을 만듭니다. (만들기만 해서는 파일을 열지 않습니다) self._lock 안에서 부릅니다."""
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS openers (
+                    poem_id INTEGER NOT NULL,
+                    agent TEXT NOT NULL,
+                    level INTEGER NOT NULL,
+                    content TEXT NOT NULL,
+                    model TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (poem_id, agent, level)
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _select(self, key: OpenerKey) -> Optional[str]:
+        with self._lock, timed(DB_SECONDS, store="openers", op="get"):
+            row = self._connection().execute(
+                "SELECT content FROM openers WHERE poem_id = ? AND agent = ? AND level = ?", key
+            ).fetchone()
+        return row[0] if row else None
+
+    def _remember(self, key: OpenerKey, content: Optional[str]) -> Optional[str]:
+        if content is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._memo[key] = content
+        return content
+
+    def get(self, poem_id: int, agent: str, level: int) -> Optional[str]:
+        key = (poem_id, agent, level)
+        content = self._memo.get(key)
+        if content is not None:
+            self.hits += 1
+            return content
+        # 다른 프로세스(웜업 명령)가 서버 실행 중에 채웠을 수 있으므로 DB도 확인합니다.
+        return self._remember(key, self._select(key))
+
+    async def aget(self, poem_id: int, agent: str, level: int) -> Optional[str]:
+        """get 의 비동기 버전입니다. 메모리에 없을 때의 DB 확인은 이벤트 루프 밖(스레드)에서 실행합니다."""
+        key = (poem_id, agent, level)
+        content = self._memo.get(key)
+        if content is not None:
+            self.hits += 1
+            return content
+        return self._remember(key, await asyncio.to_thread(self._select, key))
+
+    def put(self, poem_id: int, agent: str, level: int, content: str, model: str = None):
+        with self._lock, timed(DB_SECONDS, store="openers", op="put"):
+            conn = self._connection()
+            conn.execute("""
+                INSERT INTO openers (poem_id, agent, level, content, model, created_at)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(poem_id, agent, level) DO UPDATE SET
+                    content=excluded.content,
+                    model=excluded.model,
+                    created_at=CURRENT_TIMESTAMP
+            """, (poem_id, agent, level, content, model))
+            conn.commit()
+        self._memo[(poem_id, agent, level)] = content
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._memo)}
+
+    def keys(self) -> Set[OpenerKey]:
+        with self._lock:
+            rows = self._connection().execute("SELECT poem_id, agent, level FROM openers").fetchall()
+        return {tuple(row) for row in rows}
+
+    def preload(self) -> int:
+        """저장된 첫 질문을 모두 메모리로 올립니다. 반환값은 항목 수입니다."""
+        with self._lock:
+            rows = self._connection().execute("SELECT poem_id, agent, level, content FROM openers").fetchall()
+        self._memo.update({(p, a, l): c for p, a, l, c in rows})
+        return len(rows)
@@ -0,0 +1,135 @@
+﻿"""
+시 한 편 안에서 지금 대화와 관련된 단락(TSV 의 seg_id 단위)을 고르는 색인입니다.
+- 단락마다 글자 n-gram 빈도와 토큰 수를 데이터셋을 불러올 때 한 번 계산해 둡니다.
+- 질의(학생 입력 + 최근 대화)와의 BM25 점수가 높은 단락부터 토큰 예산 안에서 고르고, 원래 순서로 돌려줍니다.
+- 짧은 시(whole_tokens 이하)나 단락이 하나뿐인 시는 언제나 전문을 씁니다.
+모두 프로세스 안에서 계산하며 네트워크를 쓰지 않습니다.
+"""
+import os
+import math
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+from schemas import Poem, PoemSegment
+from services.poem_search import char_ngrams, BM25_K1, BM25_B
+from services.tokenizer import count_tokens
+
+POEM_WHOLE_TOKENS = int(os.getenv("POEM_WHOLE_TOKENS", "600"))      # 이 이하인 시는 전문을 프롬프트 접두부에 넣습니다.
+POEM_CONTEXT_TOKENS = int(os.getenv("POEM_CONTEXT_TOKENS", "450"))  # 긴 시에서 턴마다 보낼 단락의 토큰 예산
+GAP_MARKER = "(…)"
+
+
+class PoemPassages:
+    """시 한 편의 단락 목록과 BM25 계산에 필요한 통계입니다."""
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        # PoemLoader 가 단락을 빈 줄로 이어 붙인 본문과 같은지 확인하는 데 씁니다.
+        self.content_hash = hash("\n\n".join(texts))
+        self.grams = [Counter(char_ngrams(text)) for text in texts]
+        self.lengths = [sum(grams.values()) for grams in self.grams]
+        self.avg_length = (sum(self.lengths) / len(texts) if texts else 0.0) or 1.0
+        self.df = Counter(gram for grams in self.grams for gram in grams)
+        self.tokens = [count_tokens(text) for text in texts]
+        self.total_tokens = sum(self.tokens)
+
+    def scores(self, query: str) -> List[float]:
+        n = len(self.texts)
+        scores = [0.0] * n
+        for gram in set(char_ngrams(query)):
+            df = self.df.get(gram)
+            if not df:
+                continue
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for i, grams in enumerate(self.grams):
+                tf = grams.get(gram)
+                if tf:
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[i] / self.avg_length)
+                    scores[i] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def select(self, query: str, budget: int) -> List[int]:
+        """
+        점수가 높은 단락부터 예산 안에 들어가는 것을 고르고, 남은 예산은 앞쪽 단락으로 채웁니다.
+        (질의와 겹치는 단락이 없으면 앞에서부터 고릅니다) 가장 관련 있는 단락 하나가 예산보다 크면 그 단락만 씁니다.
+        반환값은 원래 순서의 단락 인덱스입니다.
+        """
+        scores = self.scores(query)
+        ranked = sorted(range(len(self.texts)), key=lambda i: (-scores[i], i))
+        chosen, used = [], 0
+        for i in ranked:
+            if used + self.tokens[i] <= budget:
+                chosen.append(i)
+                used += self.tokens[i]
+        if not chosen and ranked:
+            chosen = [ranked[0]]
+        return sorted(chosen)
+
+    def render(self, indices: List[int]) -> str:
+        """고른 단락을 원래 순서로 잇고, 건너뛴 단락 자리에는 GAP_MARKER 를 둡니다."""
+        parts, previous = [], -1
+        for i in indices:
+            if i != previous + 1:
+                parts.append(GAP_MARKER)
+            parts.append(self.texts[i].strip())
+            previous = i
+        if previous != len(self.texts) - 1:
+            parts.append(GAP_MARKER)
+        return "\n\n".join(parts)
+
+
+class PassageIndex:
+    """
+    시 ID별 PoemPassages 입니다. build() 로 데이터셋 전체를 미리 계산합니다.
+    데이터셋에 없거나 본문이 다른 시(클라이언트가 보낸 시 등)는 빈 줄 기준으로 나눠 즉석에서 만들고 LRU 로 기억합니다.
+    """
+
+    def __init__(self, whole_tokens: int = POEM_WHOLE_TOKENS, budget: int = POEM_CONTEXT_TOKENS, adhoc_size: int = 256):
+        self.whole_tokens = whole_tokens
+        self.budget = budget
+        self.adhoc_size = adhoc_size
+        self._poems: Dict[int, PoemPassages] = {}
+        self._adhoc: "OrderedDict[int, PoemPassages]" = OrderedDict()
+
+    def build(self, segments: List[PoemSegment]) -> "PassageIndex":
+        by_poem: Dict[int, List[str]] = {}
+        # PoemLoader._merge_segments 와 같은 순서(파일 순서)로 모읍니다.
+        for seg in segments:
+            by_poem.setdefault(seg.poem_id, []).append(seg.text.strip())
+        self._poems = {poem_id: PoemPassages(texts) for poem_id, texts in by_poem.items()}
+        return self
+
+    def get(self, poem: Poem) -> PoemPassages:
+        content_hash = hash(poem.content)
+        passages = self._poems.get(poem.id)
+        if passages is not None and passages.content_hash == content_hash:
+            return passages
+        passages = self._adhoc.get(content_hash)
+        if passages is None:
+            passages = PoemPassages([text.strip() for text in poem.content.split("\n\n") if text.strip()])
+            self._adhoc[content_hash] = passages
+            while len(self._adhoc) > self.adhoc_size:
+                self._adhoc.popitem(last=False)
+        else:
+            self._adhoc.move_to_end(content_hash)
+        return passages
+
+    def is_whole(self, poem: Poem) -> bool:
+        """전문을 그대로 보낼 시인지 여부입니다. (짧거나 단락이 하나뿐인 시)"""
+        passages = self.get(poem)
+        return len(passages.texts) <= 1 or passages.total_tokens <= self.whole_tokens
+
+    def context(self, poem: Poem, query: str) -> Optional[str]:
+        """긴 시에서 query 와 관련된 단락을 예산 안에서 골라 돌려줍니다. 전문을 보낼 시는 None 입니다."""
+        if self.is_whole(poem):
+            return None
+        passages = self.get(poem)
+        return passages.render(passages.select(query, self.budget))
+
+    def stats(self) -> Dict[str, int]:
+        long_poems = sum(1 for p in self._poems.values() if len(p.texts) > 1 and p.total_tokens > self.whole_tokens)
+        return {"poems": len(self._poems), "long_poems": long_poems, "adhoc": len(self._adhoc)}
+
+
+# 모든 에이전트가 공유합니다. preload.load_dataset() 이 데이터셋으로 채웁니다.
+passage_index = PassageIndex()
@@ -0,0 +1,66 @@
+﻿import json
+import hashlib
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from schemas import Poem, PoemSummary
+from services.poem_loader import PoemLoader
+
+
+class PoemCatalog:
+    """
+    PoemLoader 가 읽은 시 목록을 ID로 색인하고, 목록 응답을 미리 직렬화해 둡니다.
+    - get(): ID로 O(1) 조회
+    - list_body / list_etag: 전체 요약 목록(JSON 바이트)과 그 ETag
+    - page(): cursor(마지막으로 받은 ID) 이후 limit 개의 요약
+    """
+
+    def __init__(self, loader: PoemLoader):
+        self.loader = loader
+        self.poems: List[Poem] = []
+        self.by_id: Dict[int, Poem] = {}
+        self.summaries: List[dict] = []
+        self._ids: List[int] = []
+        self._pages: Dict[Tuple[Optional[int], int], Tuple[bytes, str, Optional[int]]] = {}
+        self.list_body = b"[]"
+        self.list_etag = self._etag(self.list_body)
+
+    @staticmethod
+    def _encode(items: List[dict]) -> bytes:
+        return json.dumps(items, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    @staticmethod
+    def _etag(body: bytes) -> str:
+        return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+    def load(self) -> "PoemCatalog":
+        self.poems = sorted(self.loader.load(), key=lambda p: p.id)
+        self.by_id = {p.id: p for p in self.poems}
+        self._ids = [p.id for p in self.poems]
+        self.summaries = [PoemSummary(id=p.id, title=p.title, author=p.author).model_dump() for p in self.poems]
+        self.list_body = self._encode(self.summaries)
+        self.list_etag = self._etag(self.list_body)
+        self._pages.clear()
+        return self
+
+    def __len__(self) -> int:
+        return len(self.poems)
+
+    def get(self, poem_id: int) -> Optional[Poem]:
+        return self.by_id.get(poem_id)
+
+    def page(self, cursor: Optional[int], limit: int) -> Tuple[bytes, str, Optional[int]]:
+        """(JSON 바이트, ETag, 다음 cursor 또는 None)을 반환합니다. 같은 페이지는 다시 직렬화하지 않습니다."""
+        key = (cursor, limit)
+        cached = self._pages.get(key)
+        if cached is not None:
+            return cached
+
+        start = 0 if cursor is None else bisect_right(self._ids, cursor)
+        items = self.summaries[start:start + limit]
+        next_cursor = items[-1]["id"] if start + limit < len(self.summaries) and items else None
+        body = self._encode(items)
+        result = (body, self._etag(body), next_cursor)
+        if len(self._pages) < 4096:
+            self._pages[key] = result
+        return result
@@ -1,13 +1,83 @@
-﻿import pandas as pd
-from typing import List
+﻿import os
+import pickle
+import hashlib
+from typing import List, Optional
 from pathlib import Path
-from schemas import Poem
+from schemas import Poem, PoemSegment
+
+ANNOTATOR_COLUMNS = [f"annotator_0{i}" for i in range(1, 6)]
+CACHE_VERSION = 1
+
 
 class PoemLoader:
-    def __init__(self, file_path: str):
+    """
+    KPoEM TSV를 읽습니다.
+    처음 한 번은 pandas로 파싱한 뒤 결과를 바이너리 캐시(pickle)로 저장하고,
+    이후에는 TSV의 수정 시각·크기·해시가 같으면 pandas를 import 하지 않고 캐시에서 바로 불러옵니다.
+    cache_path=None 이면 캐시를 쓰지 않습니다.
+    """
+
+    def __init__(self, file_path: str, cache_path: Optional[str] = "auto"):
         self.file_path = Path(file_path)
+        if cache_path == "auto":
+            cache_path = os.getenv("POEM_CACHE_PATH") or str(self.file_path) + ".cache.pkl"
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._segments: Optional[List[PoemSegment]] = None
+        self._poems: Optional[List[Poem]] = None
+
+    # --- 캐시 ---
+    def _cache_key(self) -> tuple:
+        stat = self.file_path.stat()
+        digest = hashlib.sha256(self.file_path.read_bytes()).hexdigest()
+        return (CACHE_VERSION, stat.st_mtime_ns, stat.st_size, digest)
+
+    def _read_cache(self, key: tuple) -> bool:
+        if self.cache_path is None or not self.cache_path.exists():
+            return False
+        try:
+            with open(self.cache_path, "rb") as f:
+                cached_key, segments, poems = pickle.load(f)
+        except Exception as e:
+            print(f"시 캐시를 읽지 못해 TSV를 다시 파싱합니다: {e}")
+            return False
+        if cached_key != key:
+            return False
+        # 캐시에 쓸 때 이미 검증된 데이터이므로 재검증하지 않습니다.
+        self._segments = [PoemSegment.model_construct(**seg) for seg in segments]
+        self._poems = [Poem.model_construct(**poem) for poem in poems]
+        return True
+
+    def _write_cache(self, key: tuple):
+        if self.cache_path is None:
+            return
+        payload = (
+            key,
+            [seg.model_dump() for seg in self._segments],
+            [poem.model_dump() for poem in self._poems],
+        )
+        tmp_path = self.cache_path.with_name(self.cache_path.name + f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)  # 여러 워커가 동시에 써도 반쯤 쓴 파일이 보이지 않습니다.
+        except OSError as e:
+            print(f"시 캐시를 저장하지 못했습니다: {e}")
+
+    def _ensure_loaded(self):
+        if self._segments is not None:
+            return
+        key = self._cache_key() if self.cache_path is not None else None
+        if key is not None and self._read_cache(key):
+            return
+        self._segments = self._parse_segments()
+        self._poems = self._merge_segments(self._segments)
+        if key is not None:
+            self._write_cache(key)
+
+    # --- TSV 파싱 (캐시가 없을 때만) ---
+    def _parse_segments(self) -> List[PoemSegment]:
+        import pandas as pd  # 무거운 의존성이므로 실제로 파싱할 때만 불러옵니다.
 
-    def load(self) -> List[Poem]:
         # 1. 데이터 로드
         df = pd.read_csv(self.file_path, sep='\t', quoting=3, encoding='utf-8')
 
@@ -15,26 +85,50 @@ class PoemLoader:
         df['title'] = df['title'].fillna("제목 없음")
         df['poet'] = df['poet'].fillna("작가 미상")
         df['text'] = df['text'].fillna("")
+        for column in ['sub_title', 'poetry_book'] + ANNOTATOR_COLUMNS:
+            df[column] = df[column].fillna("")
+
+        segments = []
+        for row in df.to_dict('records'):
+            segments.append(PoemSegment(
+                seg_id=row['seg_id'],
+                poem_id=row['poem_id'],
+                text=str(row['text']),
+                title=row['title'],
+                sub_title=row['sub_title'],
+                poetry_book=row['poetry_book'],
+                poet=row['poet'],
+                # "슬픔, 서러움" -> ["슬픔", "서러움"]
+                annotations=[[label.strip() for label in str(row[c]).split(',') if label.strip()] for c in ANNOTATOR_COLUMNS],
+            ))
+        return segments
+
+    @staticmethod
+    def _merge_segments(segments: List[PoemSegment]) -> List[Poem]:
+        # 단락 병합 (poem_id별로 그룹화, ID 순서)
+        grouped = {}
+        for seg in segments:
+            grouped.setdefault(seg.poem_id, []).append(seg)
 
-        # 3. 컬럼 이름 변경 (Pydantic 스키마와 일치시킴)
-        df = df.rename(columns={
-            'poem_id': 'id',
-            'poet': 'author',
-            'text': 'content'
-        })
-
-        # 4. 단락 병합 (id별로 그룹화)
-        # 이 과정에서 중복된 컬럼 이름 문제도 자연스럽게 정리됩니다.
-        aggregated = df.groupby('id').agg({
-            'title': 'first',
-            'author': 'first',
-            'content': lambda x: '\n\n'.join(x.astype(str).str.strip())
-        }).reset_index()
-
-        # 5. to_dict('records')를 사용하여 안전하게 변환
-        records = aggregated.to_dict('records')
-        
-        poems = [Poem(**record) for record in records]
+        return [
+            Poem(
+                id=poem_id,
+                title=segs[0].title,
+                author=segs[0].poet,
+                content='\n\n'.join(seg.text.strip() for seg in segs)
+            )
+            for poem_id, segs in sorted(grouped.items())
+        ]
+
+    # --- 공개 API ---
+    def load_segments(self) -> List[PoemSegment]:
+        """TSV의 각 행(단락)을 그대로 반환합니다. 감정 레이블 등 모든 컬럼을 유지합니다."""
+        self._ensure_loaded()
+        return self._segments
+
+    def load(self) -> List[Poem]:
+        self._ensure_loaded()
+        poems = self._poems
 
         print(f"✅ 총 {len(poems)}편의 작품을 성공적으로 로드했습니다.")
-        return poems
\ No newline at end of file
+        return poems
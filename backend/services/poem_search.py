@@ -0,0 +1,207 @@
+﻿"""
+KPoEM 데이터셋용 프로세스 내 검색 색인입니다.
+- 제목/시인/본문: 한글 글자 n-gram 역색인 + 필드 가중 BM25
+  두 글자 이상인 검색어 어절은 글자 bigram 으로, 한 글자 어절(별, 꽃, 달)은 글자 unigram 색인으로 찾습니다.
+- 감정 레이블: 레이블 -> {시 ID: 그 레이블을 단 주석자 수}
+
+색인은 시작 시 한 번 만들거나, 미리 만들어 둔 파일에서 불러옵니다.
+  미리 만들기: cd backend && python -m services.poem_search data/KPoEM_poem_dataset_v4.tsv search_index.pkl
+"""
+import os
+import re
+import sys
+import math
+import pickle
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from schemas import PoemSegment
+
+_TOKEN_RE = re.compile(r"[0-9A-Za-z가-힣]+")
+
+# 필드 이름 -> 점수 가중치
+FIELDS = {
+    "title": 3.0,
+    "poet": 2.0,
+    "body": 1.0,
+}
+BM25_K1 = 1.2
+BM25_B = 0.75
+INDEX_VERSION = 2
+
+
+def char_ngrams(text: str, n: int = 2) -> List[str]:
+    """공백·문장부호로 나눈 어절마다 글자 n-gram을 만듭니다. n보다 짧은 어절은 그대로 씁니다."""
+    grams = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if len(token) <= n:
+            grams.append(token)
+        else:
+            grams.extend(token[i:i + n] for i in range(len(token) - n + 1))
+    return grams
+
+
+def char_unigrams(text: str) -> List[str]:
+    """어절 안의 글자 하나하나입니다. '샛별', '별이' 처럼 다른 글자와 붙어 나온 글자도 한 글자 검색에 걸리게 합니다."""
+    return [ch for token in _TOKEN_RE.findall(text.lower()) for ch in token]
+
+
+def query_grams(query: str) -> Tuple[set, set]:
+    """검색어를 (bigram 색인에서 찾을 gram, unigram 색인에서 찾을 글자)로 나눕니다."""
+    tokens = _TOKEN_RE.findall(query.lower())
+    return set(char_ngrams(" ".join(t for t in tokens if len(t) > 1))), {t for t in tokens if len(t) == 1}
+
+
+class PoemSearchIndex:
+    def __init__(self):
+        self.signature: Optional[tuple] = None
+        # field -> gram -> {poem_id: tf}
+        self.postings: Dict[str, Dict[str, Dict[int, int]]] = {f: {} for f in FIELDS}
+        self.lengths: Dict[str, Dict[int, int]] = {f: {} for f in FIELDS}
+        self.avg_length: Dict[str, float] = {f: 1.0 for f in FIELDS}
+        # 한 글자 검색용: field -> 글자 -> {poem_id: tf}, 길이는 글자 수
+        self.unigrams: Dict[str, Dict[str, Dict[int, int]]] = {f: {} for f in FIELDS}
+        self.unigram_lengths: Dict[str, Dict[int, int]] = {f: {} for f in FIELDS}
+        self.unigram_avg_length: Dict[str, float] = {f: 1.0 for f in FIELDS}
+        # label -> {poem_id: annotator_count}
+        self.emotions: Dict[str, Dict[int, int]] = {}
+        self.doc_count = 0
+
+    # --- 색인 구축 ---
+    def build(self, segments: List[PoemSegment], signature: Optional[tuple] = None) -> "PoemSearchIndex":
+        by_poem: Dict[int, List[PoemSegment]] = defaultdict(list)
+        for seg in segments:
+            by_poem[seg.poem_id].append(seg)
+
+        for poem_id, segs in by_poem.items():
+            texts = {
+                "title": segs[0].title,
+                "poet": segs[0].poet,
+                "body": " ".join(seg.text for seg in segs),
+            }
+            for field, text in texts.items():
+                counts = Counter(char_ngrams(text))
+                self.lengths[field][poem_id] = sum(counts.values())
+                postings = self.postings[field]
+                for gram, tf in counts.items():
+                    postings.setdefault(gram, {})[poem_id] = tf
+                counts = Counter(char_unigrams(text))
+                self.unigram_lengths[field][poem_id] = sum(counts.values())
+                unigrams = self.unigrams[field]
+                for ch, tf in counts.items():
+                    unigrams.setdefault(ch, {})[poem_id] = tf
+
+            # 단락이 여러 개여도 같은 주석자는 한 번만 셉니다.
+            annotators: Dict[str, set] = defaultdict(set)
+            for seg in segs:
+                for annotator, labels in enumerate(seg.annotations):
+                    for label in labels:
+                        annotators[label].add(annotator)
+            for label, who in annotators.items():
+                self.emotions.setdefault(label, {})[poem_id] = len(who)
+
+        self.doc_count = len(by_poem)
+        for field in FIELDS:
+            lengths = self.lengths[field]
+            self.avg_length[field] = (sum(lengths.values()) / len(lengths)) if lengths else 1.0
+            lengths = self.unigram_lengths[field]
+            self.unigram_avg_length[field] = (sum(lengths.values()) / len(lengths)) if lengths else 1.0
+        self.signature = signature
+        return self
+
+    # --- 검색 ---
+    def _idf(self, df: int) -> float:
+        return math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str = "", emotion: Optional[str] = None, min_annotators: int = 1,
+               limit: int = 20) -> List[Tuple[int, float]]:
+        """(시 ID, 점수) 목록을 점수순으로 반환합니다. 감정 필터만 주면 주석자 수가 많은 순입니다."""
+        allowed = None
+        if emotion:
+            allowed = {pid: n for pid, n in self.emotions.get(emotion, {}).items() if n >= min_annotators}
+            if not allowed:
+                return []
+
+        grams, chars = query_grams(query) if query else (set(), set())
+        if not grams and not chars:
+            if allowed is None:
+                return []
+            ranked = sorted(allowed.items(), key=lambda item: (-item[1], item[0]))
+            return [(pid, float(n)) for pid, n in ranked[:limit]]
+
+        scores: Dict[int, float] = defaultdict(float)
+        for field, weight in FIELDS.items():
+            self._score(scores, weight, grams, self.postings[field], self.lengths[field], self.avg_length[field], allowed)
+            self._score(scores, weight, chars, self.unigrams[field], self.unigram_lengths[field],
+                        self.unigram_avg_length[field], allowed)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+    def _score(self, scores: Dict[int, float], weight: float, grams: set, postings: Dict[str, Dict[int, int]],
+               lengths: Dict[int, int], avg: float, allowed: Optional[Dict[int, int]]):
+        for gram in grams:
+            docs = postings.get(gram)
+            if not docs:
+                continue
+            idf = self._idf(len(docs))
+            for pid, tf in docs.items():
+                if allowed is not None and pid not in allowed:
+                    continue
+                norm = tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths[pid] / avg))
+                scores[pid] += weight * idf * norm
+
+    def top_emotions(self, poem_id: int, k: int = 5) -> Dict[str, int]:
+        counts = [(label, docs[poem_id]) for label, docs in self.emotions.items() if poem_id in docs]
+        counts.sort(key=lambda item: (-item[1], item[0]))
+        return dict(counts[:k])
+
+    # --- 저장/불러오기 ---
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            pickle.dump((INDEX_VERSION, self.__dict__), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["PoemSearchIndex"]:
+        try:
+            with open(path, "rb") as f:
+                version, state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return None
+        if version != INDEX_VERSION:
+            return None
+        index = cls()
+        index.__dict__.update(state)
+        return index
+
+
+def dataset_signature(path: str) -> tuple:
+    stat = os.stat(path)
+    return (os.path.basename(path), stat.st_size, stat.st_mtime_ns)
+
+
+def load_or_build(loader, index_path: Optional[str] = None) -> PoemSearchIndex:
+    """index_path 의 색인이 현재 데이터셋과 일치하면 불러오고, 아니면 새로 만듭니다."""
+    signature = dataset_signature(str(loader.file_path))
+    if index_path and os.path.exists(index_path):
+        index = PoemSearchIndex.load(index_path)
+        if index is not None and index.signature == signature:
+            return index
+    index = PoemSearchIndex().build(loader.load_segments(), signature=signature)
+    if index_path:
+        index.save(index_path)
+    return index
+
+
+if __name__ == "__main__":
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if backend_dir not in sys.path:
+        sys.path.append(backend_dir)
+    from services.poem_loader import PoemLoader
+
+    if len(sys.argv) != 3:
+        print("사용법: python -m services.poem_search <데이터셋.tsv> <출력.pkl>")
+        sys.exit(1)
+    built = PoemSearchIndex().build(PoemLoader(sys.argv[1]).load_segments(), signature=dataset_signature(sys.argv[1]))
+    built.save(sys.argv[2])
+    print(f"✅ {built.doc_count}편 색인 완료: {sys.argv[2]}")
@@ -0,0 +1,156 @@
+﻿import queue
+import sqlite3
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from metrics import DB_SECONDS, timed
+
+# 프로필 한 행: (emp_state, ase_state, int_state)
+ProfileRow = Tuple[int, int, int]
+
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",      # 읽기와 쓰기가 서로를 막지 않습니다.
+    "PRAGMA synchronous=NORMAL",    # WAL에서는 NORMAL로도 손상 없이 안전합니다.
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",      # 8MB
+]
+
+
+class ProfileRepository:
+    """
+    user_profiles 테이블 접근을 담당합니다.
+    - 연결은 풀에서 재사용하고, 모든 SQLite 호출은 이벤트 루프 밖(스레드)에서 실행합니다.
+      연결은 필요할 때 pool_size 개까지 엽니다. (만들기만 해서는 파일을 열지 않습니다)
+    - 짧은 시간(batch_window) 안에 몰린 저장 요청은 하나의 트랜잭션으로 묶어 씁니다.
+      같은 사용자의 저장이 여러 번 들어오면 마지막 값만 씁니다.
+    """
+
+    def __init__(self, db_path: str = "tutor_system.db", pool_size: int = 4,
+                 batch_window: float = 0.005, max_batch: int = 256):
+        self.db_path = db_path
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.pool_size = pool_size
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._opened = 0
+        self._open_lock = threading.Lock()
+        self._pending: Dict[str, Tuple[ProfileRow, List[asyncio.Future]]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        """쉬는 연결이 없고 아직 pool_size 개를 열지 않았으면 새로 열고, 아니면 반납을 기다립니다."""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._open_lock:
+            opening = self._opened < self.pool_size
+            if opening:
+                self._opened += 1
+        if not opening:
+            return self._pool.get()
+        try:
+            return self._connect()
+        except BaseException:
+            with self._open_lock:
+                self._opened -= 1
+            raise
+
+    @contextmanager
+    def _connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    # --- 동기 구현 (스레드에서 실행) ---
+    def init_db(self):
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS user_profiles (
+                    user_name TEXT PRIMARY KEY,
+                    emp_state INTEGER DEFAULT 1,
+                    ase_state INTEGER DEFAULT 1,
+                    int_state INTEGER DEFAULT 1,
+                    last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.commit()
+
+    def _get_sync(self, user_name: str) -> Optional[ProfileRow]:
+        with self._connection() as conn, timed(DB_SECONDS, store="profile", op="get"):
+            return conn.execute(
+                "SELECT emp_state, ase_state, int_state FROM user_profiles WHERE user_name = ?", (user_name,)
+            ).fetchone()
+
+    def _save_many_sync(self, rows: List[Tuple[str, int, int, int]]):
+        with self._connection() as conn, timed(DB_SECONDS, store="profile", op="save"):
+            with conn:  # 하나의 트랜잭션
+                conn.executemany("""
+                    INSERT INTO user_profiles (user_name, emp_state, ase_state, int_state, last_updated)
+                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(user_name) DO UPDATE SET
+                        emp_state=excluded.emp_state,
+                        ase_state=excluded.ase_state,
+                        int_state=excluded.int_state,
+                        last_updated=CURRENT_TIMESTAMP
+                """, rows)
+
+    # --- 비동기 API ---
+    async def get(self, user_name: str) -> Optional[ProfileRow]:
+        # 아직 기록되지 않은 저장 요청이 있으면 그 값을 돌려줍니다. (read-your-writes)
+        pending = self._pending.get(user_name)
+        if pending is not None:
+            return pending[0]
+        return await asyncio.to_thread(self._get_sync, user_name)
+
+    async def save(self, user_name: str, emp_state: int, ase_state: int, int_state: int):
+        """저장 요청을 배치에 넣고, 그 배치가 커밋될 때까지 기다립니다."""
+        future = asyncio.get_running_loop().create_future()
+        _, waiters = self._pending.get(user_name, (None, []))
+        waiters.append(future)
+        self._pending[user_name] = ((emp_state, ase_state, int_state), waiters)
+
+        if len(self._pending) >= self.max_batch:
+            await self._flush()
+        elif self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_later())
+        await future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.batch_window)
+        await self._flush()
+
+    async def _flush(self):
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        rows = [(name, *values) for name, (values, _) in batch.items()]
+        try:
+            await asyncio.to_thread(self._save_many_sync, rows)
+        except Exception as e:
+            for _, waiters in batch.values():
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+            return
+        for _, waiters in batch.values():
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+            with self._open_lock:
+                self._opened -= 1
@@ -0,0 +1,47 @@
+﻿import time
+import asyncio
+
+
+class RateLimiter:
+    """초당 rate 회 이하로 호출이 시작되도록 간격을 둡니다. (배치 작업용)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+            self._next = max(now, self._next) + self.interval
+
+
+class TokenBucket:
+    """
+    초당 rate 만큼 채워지고 최대 capacity 까지 모이는 토큰 버킷입니다.
+    acquire 는 필요한 만큼 미리 차감(예약)한 뒤 모자란 만큼만 기다리므로 요청 순서대로 공정하게 처리됩니다.
+    rate <= 0 이면 제한하지 않습니다.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    async def acquire(self, amount: float = 1.0):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        # 버킷보다 큰 요청은 버킷 하나 분량으로 취급합니다. (영원히 기다리지 않도록)
+        self.tokens -= min(amount, self.capacity)
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
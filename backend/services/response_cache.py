@@ -0,0 +1,213 @@
+﻿import os
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+class ResponseCache:
+    """
+    LLM 응답을 위한 LRU + TTL 캐시입니다. (사전 검색 결과 등 다른 값에도 씁니다)
+    make_key 는 (모델, temperature, 전체 메시지 목록)의 해시이므로, 메시지가 한 글자라도 다르면 다른 항목이 됩니다.
+    maxsize가 0이면 캐시를 사용하지 않습니다.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    @staticmethod
+    def make_key(model: str, messages: List[dict], temperature: float) -> str:
+        raw = json.dumps(
+            {"model": model, "temperature": temperature, "messages": messages},
+            ensure_ascii=False, sort_keys=True, separators=(",", ":")
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._items[key]
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """이벤트 루프에서 쓰는 get 입니다. 메모리 캐시는 기다릴 일이 없으므로 바로 돌려줍니다."""
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any):
+        self.set(key, value)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "size": len(self._items),
+            "maxsize": self.maxsize,
+        }
+
+
+class SharedCache(ResponseCache):
+    """
+    여러 워커 프로세스가 하나의 SQLite 파일로 공유하는 ResponseCache 입니다.
+    앞단의 프로세스별 LRU 에서 못 찾으면 파일을 확인하므로, 다른 워커가 만든 응답도 재사용합니다.
+    값은 JSON 으로 직렬화할 수 있어야 합니다. 연결은 프로세스마다 처음 쓸 때 엽니다. (fork 뒤에도 안전)
+    """
+
+    PURGE_EVERY = 256
+
+    def __init__(self, path: str, namespace: str, maxsize: int = 1024, ttl: float = 3600.0):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.path = path
+        self.namespace = namespace
+        self.shared_hits = 0
+        self._writes = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._db_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            conn.commit()
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    # --- 동기 구현 (SQLite, 이벤트 루프에서는 스레드로 실행) ---
+    def _shared_get(self, key: str) -> Optional[Any]:
+        with self._db_lock:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def _shared_set(self, key: str, value: Any):
+        encoded = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        with self._db_lock:
+            conn = self._connection()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (self.namespace, key, encoded, now + self.ttl)
+                )
+                self._writes += 1
+                if self._writes % self.PURGE_EVERY == 0:
+                    conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (now,))
+                conn.commit()
+            except BaseException:
+                # 실패한 쓰기가 트랜잭션을 연 채로 남아 다른 워커를 막지 않게 합니다.
+                conn.rollback()
+                raise
+
+    def _shared_hit(self, key: str, value: Any) -> Any:
+        with self._lock:
+            # 메모리 미스로 센 것을 공유 적중으로 바로잡습니다.
+            self.misses -= 1
+            self.hits += 1
+            self.shared_hits += 1
+        ResponseCache.set(self, key, value)
+        return value
+
+    # 캐시는 응답을 빠르게 하려는 것이므로, 공유 파일 읽기·쓰기가 실패하면 로그만 남기고 캐시가 없는 것처럼 동작합니다.
+    def get(self, key: str) -> Optional[Any]:
+        value = super().get(key)
+        if value is not None or not self.enabled:
+            return value
+        try:
+            value = self._shared_get(key)
+        except Exception as e:
+            print(f"공유 캐시 읽기 실패, 무시합니다: {e!r}")
+            return None
+        return None if value is None else self._shared_hit(key, value)
+
+    def set(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        super().set(key, value)
+        try:
+            self._shared_set(key, value)
+        except Exception as e:
+            print(f"공유 캐시 쓰기 실패, 무시합니다: {e!r}")
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """get 의 비동기 버전입니다. 메모리에서 못 찾았을 때의 SQLite 읽기는 이벤트 루프 밖(스레드)에서 합니다."""
+        value = super().get(key)
+        if value is not None or not self.enabled:
+            return value
+        try:
+            value = await asyncio.to_thread(self._shared_get, key)
+        except Exception as e:
+            print(f"공유 캐시 읽기 실패, 무시합니다: {e!r}")
+            return None
+        return None if value is None else self._shared_hit(key, value)
+
+    async def aset(self, key: str, value: Any):
+        """set 의 비동기 버전입니다. SQLite 쓰기는 이벤트 루프 밖(스레드)에서 합니다."""
+        if not self.enabled:
+            return
+        ResponseCache.set(self, key, value)
+        try:
+            await asyncio.to_thread(self._shared_set, key, value)
+        except Exception as e:
+            print(f"공유 캐시 쓰기 실패, 무시합니다: {e!r}")
+
+    def stats(self) -> Dict[str, float]:
+        return {**super().stats(), "shared_hits": self.shared_hits, "backend": "sqlite"}
+
+
+def open_cache(namespace: str, maxsize: int = 1024, ttl: float = 3600.0) -> ResponseCache:
+    """
+    CACHE_BACKEND 환경 변수에 따라 캐시를 만듭니다.
+      - memory (기본값): 프로세스마다 따로 두는 ResponseCache
+      - sqlite: CACHE_DB 파일(기본값 shared_cache.db)을 워커끼리 공유하는 SharedCache
+    """
+    backend = os.getenv("CACHE_BACKEND", "memory").lower()
+    if backend == "memory":
+        return ResponseCache(maxsize=maxsize, ttl=ttl)
+    if backend == "sqlite":
+        return SharedCache(os.getenv("CACHE_DB", "shared_cache.db"), namespace, maxsize=maxsize, ttl=ttl)
+    raise ValueError(f"알 수 없는 CACHE_BACKEND 입니다: {backend}")
@@ -0,0 +1,260 @@
+﻿import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from schemas import ChatSession, Message, UserLevel
+from metrics import DB_SECONDS, timed
+
+
+class SessionStore:
+    """
+    대화 세션을 서버에 보관합니다.
+    메모리에는 최근 max_sessions 개만 LRU로 유지하고, db_path 가 주어지면 SQLite에도 기록합니다.
+    메시지는 턴마다 추가분만 기록하므로 턴당 비용이 히스토리 길이와 무관합니다.
+    shared=True 이면 여러 워커 프로세스가 같은 db_path 를 쓴다고 보고, 메모리 사본을 돌려주기 전에
+    다른 워커가 이어 쓴 메시지와 최신 질문을 SQLite에서 읽어 맞춥니다.
+    메모리 사본은 이벤트 루프에서만 고치고, SQLite 호출은 이벤트 루프 밖(스레드)에서 실행합니다.
+    기록은 트랜잭션 하나로 하고, 커밋이 끝난 뒤에만 메모리 사본에 반영합니다.
+    진행 중인 턴 표시(begin_turn/end_turn)도 shared=True 이면 SQLite에 두어 워커끼리 공유합니다.
+    """
+
+    def __init__(self, max_sessions: int = 1000, db_path: Optional[str] = None, shared: bool = False):
+        self.max_sessions = max_sessions
+        self.shared = shared and bool(db_path)
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 진행 중인 턴: 세션 ID -> 시작 시각 (shared=False 일 때만 씁니다)
+        self._turns: Dict[str, float] = {}
+        self.db_path = db_path or None
+        # SQLite 연결은 처음 쓸 때 엽니다. (만들기만 해서는 파일을 열지 않습니다)
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """처음 쓸 때 연결하고 테이블을 만듭니다. self._lock 안에서 부릅니다."""
+        if self._conn is not None:
+            return self._conn
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5)
+        if self.shared:
+            # 워커들이 동시에 쓰므로 읽기가 쓰기를 기다리지 않게 합니다.
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chat_sessions (
+                session_id TEXT PRIMARY KEY,
+                user_name TEXT,
+                poem_id INTEGER NOT NULL,
+                user_level TEXT NOT NULL,
+                latest_responses TEXT DEFAULT '{}',
+                turn_started REAL,
+                last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE IF NOT EXISTS chat_messages (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            );
+        """)
+        conn.commit()
+        # 이전 버전에서 만든 파일에는 turn_started 열이 없습니다.
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(chat_sessions)")}
+        if "turn_started" not in columns:
+            try:
+                conn.execute("ALTER TABLE chat_sessions ADD COLUMN turn_started REAL")
+                conn.commit()
+            except sqlite3.OperationalError:
+                # 다른 워커가 먼저 추가했습니다.
+                conn.rollback()
+        self._conn = conn
+        return conn
+
+    def _remember(self, session: ChatSession):
+        self._sessions[session.session_id] = session
+        self._sessions.move_to_end(session.session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    # --- 동기 구현 (스레드에서 실행, SQLite 연결만 다룹니다) ---
+    @contextmanager
+    def _transaction(self, op: str):
+        """쓰기 트랜잭션입니다. 실패하면 되돌려 다음 쓰기가 열린 트랜잭션에 막히지 않게 합니다."""
+        with self._lock, timed(DB_SECONDS, store="session", op=op):
+            # 읽고 쓰는 사이에 다른 워커가 끼어들지 못하도록 시작할 때 쓰기 잠금을 잡습니다.
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def _insert_sync(self, session: ChatSession):
+        with self._transaction("create") as conn:
+            conn.execute(
+                "INSERT INTO chat_sessions (session_id, user_name, poem_id, user_level) VALUES (?, ?, ?, ?)",
+                (session.session_id, session.user_name, session.poem_id, session.user_level.model_dump_json())
+            )
+
+    def _restore_sync(self, session_id: str) -> Optional[ChatSession]:
+        with self._lock, timed(DB_SECONDS, store="session", op="restore"):
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT user_name, poem_id, user_level, latest_responses FROM chat_sessions WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            messages = conn.execute(
+                "SELECT role, content FROM chat_messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        return ChatSession(
+            session_id=session_id,
+            user_name=row[0],
+            poem_id=row[1],
+            user_level=UserLevel.model_validate_json(row[2]),
+            history=[Message(role=r, content=c) for r, c in messages],
+            latest_responses=json.loads(row[3] or "{}"),
+        )
+
+    def _refresh_sync(self, session_id: str, start: int):
+        with self._lock, timed(DB_SECONDS, store="session", op="refresh"):
+            conn = self._connection()
+            messages = conn.execute(
+                "SELECT role, content FROM chat_messages WHERE session_id = ? AND seq >= ? ORDER BY seq",
+                (session_id, start)
+            ).fetchall()
+            row = conn.execute(
+                "SELECT latest_responses FROM chat_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return messages, row
+
+    def _append_sync(self, session_id: str, messages: List[Message]) -> int:
+        """메시지를 기록하고 첫 메시지의 순번을 반환합니다. 순번은 같은 트랜잭션 안에서 SQLite 기준으로 정합니다."""
+        with self._transaction("append") as conn:
+            start = conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM chat_messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO chat_messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                [(session_id, start + i, m.role, m.content) for i, m in enumerate(messages)]
+            )
+        return start
+
+    def _set_latest_sync(self, session_id: str, latest_responses: str):
+        with self._transaction("set_latest") as conn:
+            conn.execute(
+                "UPDATE chat_sessions SET latest_responses = ?, last_updated = CURRENT_TIMESTAMP WHERE session_id = ?",
+                (latest_responses, session_id)
+            )
+
+    def _claim_turn_sync(self, session_id: str, started: float, stale_before: float) -> bool:
+        with self._transaction("begin_turn") as conn:
+            cursor = conn.execute(
+                "UPDATE chat_sessions SET turn_started = ? "
+                "WHERE session_id = ? AND (turn_started IS NULL OR turn_started < ?)",
+                (started, session_id, stale_before)
+            )
+        return cursor.rowcount == 1
+
+    def _release_turn_sync(self, session_id: str, started: float):
+        with self._transaction("end_turn") as conn:
+            conn.execute(
+                "UPDATE chat_sessions SET turn_started = NULL WHERE session_id = ? AND turn_started = ?",
+                (session_id, started)
+            )
+
+    # --- 비동기 API ---
+    async def create(self, poem_id: int, user_name: Optional[str] = None, user_level: Optional[UserLevel] = None) -> ChatSession:
+        session = ChatSession(
+            session_id=uuid.uuid4().hex,
+            user_name=user_name,
+            poem_id=poem_id,
+            user_level=user_level or UserLevel(),
+        )
+        if self.db_path is not None:
+            await asyncio.to_thread(self._insert_sync, session)
+        self._remember(session)
+        return session
+
+    async def get(self, session_id: str) -> Optional[ChatSession]:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+            if self.shared:
+                await self._refresh(session)
+            return session
+        if self.db_path is None:
+            return None
+        # 메모리에서 밀려난 세션은 SQLite에서 복원합니다.
+        session = await asyncio.to_thread(self._restore_sync, session_id)
+        if session is None:
+            return None
+        # 기다리는 동안 같은 세션을 먼저 복원한 요청이 있으면 그 사본을 씁니다.
+        existing = self._sessions.get(session_id)
+        if existing is not None:
+            return existing
+        self._remember(session)
+        return session
+
+    async def _refresh(self, session: ChatSession):
+        """다른 워커가 기록한 메시지(현재 길이 이후)와 최신 질문을 메모리 사본에 반영합니다."""
+        start = len(session.history)
+        messages, row = await asyncio.to_thread(self._refresh_sync, session.session_id, start)
+        # 기다리는 동안 이 워커가 이어 붙인 메시지는 이미 들어 있으므로 그 뒤만 붙입니다.
+        session.history.extend(Message(role=r, content=c) for r, c in messages[len(session.history) - start:])
+        if row is not None:
+            session.latest_responses = json.loads(row[0] or "{}")
+
+    async def append(self, session: ChatSession, messages: List[Message]):
+        """
+        히스토리 끝에 메시지를 추가합니다. SQLite에는 추가분만 기록하고, 커밋이 끝난 뒤에 메모리 사본에 붙입니다.
+        기록에 실패하면 예외를 올리며 메모리 사본은 그대로 둡니다.
+        """
+        if self.db_path is None:
+            session.history.extend(messages)
+            return
+        start = await asyncio.to_thread(self._append_sync, session.session_id, messages)
+        if start == len(session.history):
+            session.history.extend(messages)
+        else:
+            # 다른 워커가 먼저 이어 쓴 메시지가 있으면 SQLite 순서대로 다시 맞춥니다.
+            await self._refresh(session)
+
+    async def set_latest(self, session: ChatSession, responses: Dict[str, str]):
+        """이번 턴에 세 튜터가 낸 질문을 기록합니다. 다음 턴에서 학생이 고른 질문을 히스토리에 넣을 때 씁니다."""
+        latest = dict(responses)
+        if self.db_path is not None:
+            await asyncio.to_thread(
+                self._set_latest_sync, session.session_id, json.dumps(latest, ensure_ascii=False)
+            )
+        session.latest_responses = latest
+
+    async def begin_turn(self, session_id: str, timeout: float) -> Optional[float]:
+        """
+        세션의 턴을 시작합니다. 이미 진행 중인 턴이 있으면 None 을 반환합니다.
+        끝나지 못하고 남은 표시(연결 끊김, 워커 종료)는 timeout 초가 지나면 무시합니다.
+        반환값(시작 시각)은 end_turn 에 그대로 넘깁니다.
+        """
+        started = time.time()
+        if self.shared:
+            claimed = await asyncio.to_thread(self._claim_turn_sync, session_id, started, started - timeout)
+            return started if claimed else None
+        previous = self._turns.get(session_id)
+        if previous is not None and started - previous < timeout:
+            return None
+        self._turns[session_id] = started
+        return started
+
+    async def end_turn(self, session_id: str, started: float):
+        """begin_turn 으로 시작한 턴을 끝냅니다. 그 사이 다른 턴이 표시를 가져갔으면 건드리지 않습니다."""
+        if self.shared:
+            await asyncio.to_thread(self._release_turn_sync, session_id, started)
+        elif self._turns.get(session_id) == started:
+            del self._turns[session_id]
@@ -0,0 +1,74 @@
+﻿import os
+import hashlib
+import tempfile
+from functools import lru_cache
+from typing import List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken 이 없으면 근사치로 셉니다.
+    tiktoken = None
+
+ENCODING_NAME = "o200k_base"  # gpt-4o 계열 토크나이저
+# tiktoken 이 이 주소의 BPE 파일을 캐시 폴더에 sha1(주소) 이름으로 저장합니다.
+ENCODING_URL = "https://openaipublic.blob.core.windows.net/encodings/o200k_base.tiktoken"
+ENCODING_SHA256 = "446a9538cb6c348e3516120d7c08b09f57c36495e2acfffe59a5bf8b0cfb1a2d"
+MESSAGE_OVERHEAD = 4          # 메시지마다 붙는 role/구분자 토큰
+
+_encoding = None
+
+
+def _cached_bpe_path() -> Optional[str]:
+    """
+    tiktoken 캐시 폴더(TIKTOKEN_CACHE_DIR, DATA_GYM_CACHE_DIR, 기본값은 임시 폴더의 data-gym-cache)에
+    온전한 BPE 파일이 있으면 그 경로를, 없으면 None 을 반환합니다.
+    파일을 함께 배포하려면 그 폴더에 sha1(ENCODING_URL) 이름으로 두고 TIKTOKEN_CACHE_DIR 로 지정합니다.
+    """
+    cache_dir = os.getenv("TIKTOKEN_CACHE_DIR", os.getenv("DATA_GYM_CACHE_DIR"))
+    if cache_dir is None:
+        cache_dir = os.path.join(tempfile.gettempdir(), "data-gym-cache")
+    if not cache_dir:  # 빈 값이면 tiktoken 이 캐시 없이 매번 내려받습니다.
+        return None
+    path = os.path.join(cache_dir, hashlib.sha1(ENCODING_URL.encode()).hexdigest())
+    if not os.path.exists(path):
+        return None
+    # 해시가 다르면 tiktoken 이 파일을 지우고 다시 내려받으므로 미리 확인합니다.
+    with open(path, "rb") as f:
+        if hashlib.sha256(f.read()).hexdigest() != ENCODING_SHA256:
+            return None
+    return path
+
+
+def _get_encoding():
+    """
+    로컬에 캐시된 BPE 파일이 있을 때만 tiktoken 을 씁니다. 없으면 내려받지 않고 근사치로 셉니다.
+    (요청 경로에서 처음 토큰을 셀 때 네트워크를 기다리거나, 오프라인 환경에서 시간 초과를 기다리지 않도록)
+    """
+    global _encoding
+    if _encoding is None:
+        _encoding = False
+        if tiktoken is not None:
+            if _cached_bpe_path() is None:
+                print(f"tiktoken {ENCODING_NAME} 파일이 로컬 캐시에 없어 근사치로 토큰을 셉니다.")
+            else:
+                try:
+                    _encoding = tiktoken.get_encoding(ENCODING_NAME)
+                except Exception as e:
+                    print(f"tiktoken 로드 실패, 근사치로 토큰을 셉니다: {e}")
+    return _encoding or None
+
+
+@lru_cache(maxsize=16384)
+def count_tokens(text: Optional[str]) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # 근사치: 한글 음절은 1토큰, 그 밖의 문자는 4글자당 1토큰으로 셉니다.
+    hangul = sum(1 for ch in text if "가" <= ch <= "힣")
+    return hangul + (len(text) - hangul) // 4 + 1
+
+
+def count_message_tokens(messages: List[dict]) -> int:
+    return sum(count_tokens(m.get("content")) + MESSAGE_OVERHEAD for m in messages)
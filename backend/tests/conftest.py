@@ -0,0 +1,21 @@
+﻿import os
+import sys
+
+import pytest
+
+# 테스트는 backend 의 모듈을 최상위 이름(services, agents, main ...)으로 불러옵니다.
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope="session")
+def main_module(tmp_path_factory):
+    """main 의 저장소는 현재 폴더의 DB 파일을 쓰므로 임시 폴더에서 불러옵니다."""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("main"))
+    try:
+        import main
+    finally:
+        os.chdir(cwd)
+    return main
@@ -0,0 +1,92 @@
+﻿"""
+튜터 호출이 실패했을 때의 처리를 확인합니다.
+  - 실패 답변은 문구 내용이 아니라 타입(ErrorReply)으로 구분하는지
+  - 스트림이 조각을 보낸 뒤 실패하면 오류 문구를 이어 보내지 않고 예외를 올리는지
+  - 그런 튜터는 "error": true 로 끝나고 세션에 남을 답변에서 빠지는지
+"""
+import json
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.bench_llm_client import _state
+from llm_scheduler import LLMScheduler
+from schemas import Message
+
+
+class BrokenStream:
+    """조각 몇 개를 보낸 뒤 연결이 끊긴 스트림입니다."""
+
+    def __init__(self, deltas):
+        self.deltas = deltas
+
+    async def __aiter__(self):
+        for delta in self.deltas:
+            yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+        raise ConnectionError("stream reset")
+
+
+def broken_client(deltas):
+    async def create(**kwargs):
+        return BrokenStream(deltas)
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def test_error_reply_is_detected_by_type():
+    from agents import EmpathyAgent
+    agent = EmpathyAgent()
+    reply = agent.error_message(RuntimeError("boom"))
+    assert agent.is_error(reply)
+    # 같은 접두어로 시작하는 평범한 답변은 실패로 보지 않습니다.
+    assert not agent.is_error(str(reply))
+    assert json.dumps({"empathy": reply}, ensure_ascii=False) == json.dumps({"empathy": str(reply)}, ensure_ascii=False)
+
+
+def test_stream_failure_after_deltas_raises(monkeypatch):
+    import agents as agents_module
+    from agents import EmpathyAgent
+
+    monkeypatch.setattr(agents_module, "scheduler", LLMScheduler(max_attempts=1, seed=0))
+    agent = EmpathyAgent()
+    agent.async_client = broken_client(["첫 ", "조각"])
+    received = []
+
+    async def consume():
+        async for delta in agent.astream_response(_state(), "스트림 실패 확인"):
+            received.append(delta)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(consume())
+    assert received == ["첫 ", "조각"]
+
+
+def test_failed_stream_is_marked_error_and_not_saved(main_module, monkeypatch):
+    async def fine(state, user_input):
+        yield "좋은 질문"
+
+    async def broken(state, user_input):
+        yield "부분 "
+        raise ConnectionError("stream reset")
+
+    for agent in (main_module.emp_agent, main_module.ase_agent):
+        monkeypatch.setattr(agent, "astream_response", fine)
+    monkeypatch.setattr(main_module.int_agent, "astream_response", broken)
+
+    state = _state()
+    state.shared_chat_history = [Message(role="user", content="이전 답변")]
+    saved = {}
+
+    async def on_complete(responses):
+        saved.update(responses)
+
+    async def collect():
+        return [json.loads(line) async for line in main_module._stream_agents(state, "답변", on_complete=on_complete)]
+
+    events = asyncio.run(collect())
+    done = {event["agent"]: event for event in events if event["type"] == "done"}
+    failed = main_module.int_agent.role.value
+    assert done[failed].get("error") is True
+    assert done[failed]["content"] == "부분 "
+    assert failed not in saved
+    assert set(saved) == {main_module.emp_agent.role.value, main_module.ase_agent.role.value}
@@ -0,0 +1,180 @@
+﻿"""
+DictionaryService 를 로컬 대역 XML 서버(benchmarks/fake_dictionary.py)에 붙여 확인합니다.
+  - 메모리 → 디스크 → 원격 순서로 찾는지
+  - 같은 단어의 동시 조회가 원격 호출 하나로 합쳐지는지
+  - 네트워크·파싱·API 오류는 캐시하지 않고, 결과 없음은 기한을 두고 캐시하는지
+  - 여러 낱말 조회가 대표 표제어 기준으로 합쳐지고, 호출 간격 제한이 원격 호출마다 걸리는지
+"""
+import time
+import asyncio
+
+import pytest
+
+from benchmarks.fake_dictionary import FakeDictionaryServer, render_error, render_xml
+from services import dictionary as dictionary_module
+from services.dictionary import DictionaryAPIError, DictionaryService, SenseParser
+from services.lemmatizer import lemma_candidates, primary_lemma
+from services.rate_limit import RateLimiter
+
+
+@pytest.fixture
+def server():
+    fake = FakeDictionaryServer(latency=0.05, items=1, senses=3, missing={"없는말"})
+    fake.start()
+    yield fake
+    fake.stop()
+
+
+def make_service(server, tmp_path) -> DictionaryService:
+    service = DictionaryService(cache_db=str(tmp_path / "dictionary_cache.db"))
+    service.base_url = server.base_url
+    return service
+
+
+def run(service: DictionaryService, coro):
+    """코루틴을 실행하고 같은 이벤트 루프에서 클라이언트를 닫습니다."""
+    async def main():
+        try:
+            return await coro
+        finally:
+            await service.aclose()
+    return asyncio.run(main())
+
+
+def test_parser_reads_senses_up_to_limit():
+    parser = SenseParser(limit=2)
+    assert parser.feed(render_xml("나무", items=2, senses=3))
+    senses = parser.close()
+    assert [s["word"] for s in senses] == ["나무", "나무"]
+    assert senses[0]["pos"] == "명사"
+
+
+def test_parser_raises_on_error_body():
+    parser = SenseParser(limit=4)
+    with pytest.raises(DictionaryAPIError) as info:
+        parser.feed(render_error("020", "등록되지 않은 인증키입니다."))
+    assert info.value.code == "020"
+
+
+def test_lookup_goes_memory_then_disk_then_remote(server, tmp_path):
+    service = make_service(server, tmp_path)
+    first = run(service, service.asearch_word("나무"))
+    assert len(first) == 3
+    assert server.request_count == 1
+
+    # 같은 프로세스에서 다시 찾으면 메모리에서 나옵니다.
+    assert run(service, service.asearch_word("나무")) == first
+    assert server.request_count == 1
+    assert service.memory.stats()["hits"] == 1
+
+    # 새 인스턴스(메모리 비어 있음)는 디스크에서 찾고 원격으로 가지 않습니다.
+    fresh = make_service(server, tmp_path)
+    assert fresh._disk_get("나무", 4) == first
+    assert run(fresh, fresh.asearch_word("나무")) == first
+    assert server.request_count == 1
+    assert fresh.remote_calls == 0
+
+
+def test_concurrent_identical_lookups_share_one_remote_call(server, tmp_path):
+    service = make_service(server, tmp_path)
+
+    async def lookups():
+        return await asyncio.gather(*(service.asearch_word("바람") for _ in range(20)))
+
+    results = run(service, lookups())
+    assert server.request_count == 1
+    assert service.remote_calls == 1
+    assert all(result == results[0] and len(result) == 3 for result in results)
+
+
+@pytest.mark.parametrize("fail", ["api_error", "http_error", "malformed"])
+def test_errors_are_not_cached(server, tmp_path, fail):
+    service = make_service(server, tmp_path)
+    server.fail = fail
+    assert run(service, service.asearch_word("나무")) == []
+    assert service.errors == 1
+    assert service._disk_get("나무", 4) is None
+    assert service.memory.get("나무\x1f4") is None
+
+    # 원인이 사라지면 다시 원격으로 물어 정상 결과를 받습니다.
+    server.fail = None
+    assert len(run(service, service.asearch_word("나무"))) == 3
+    assert server.request_count == 2
+
+
+def test_api_error_is_not_cached_by_sync_path(server, tmp_path):
+    service = make_service(server, tmp_path)
+    server.fail = "api_error"
+    assert service.search_word("나무") == []
+    assert service.errors == 1
+    assert service._disk_get("나무", 4) is None
+
+
+def test_empty_result_is_cached_until_ttl(server, tmp_path, monkeypatch):
+    service = make_service(server, tmp_path)
+    assert run(service, service.asearch_word("없는말")) == []
+    assert service.errors == 0
+    assert service._disk_get("없는말", 4) == []
+
+    # 기한이 지난 "결과 없음" 기록은 없는 것으로 봅니다.
+    monkeypatch.setattr(dictionary_module, "DICTIONARY_EMPTY_TTL", 60)
+    service._connection().execute("UPDATE dictionary_cache SET fetched_at = datetime('now', '-2 minutes')")
+    service._connection().commit()
+    assert service._disk_get("없는말", 4) is None
+    # 뜻풀이가 있는 기록은 기한과 관계없이 유지됩니다.
+    run(service, service.asearch_word("나무"))
+    service._connection().execute("UPDATE dictionary_cache SET fetched_at = datetime('now', '-2 minutes')")
+    service._connection().commit()
+    assert len(service._disk_get("나무", 4)) == 3
+
+
+# 실제 사전처럼 일부 낱말만 결과가 있습니다. 체언을 규칙으로 자른 줄기(나다, 사 ...)도 사전에 있는 말입니다.
+NOUNS = ["나라", "사과", "아이", "사랑", "가게", "고기", "편지", "그리고"]
+STEMS = ["나다", "사", "아", "가다", "고다", "편다", "그리다"]
+
+
+@pytest.fixture
+def dictionary():
+    fake = FakeDictionaryServer(latency=0.01, items=1, senses=2, known=NOUNS + STEMS + ["바람", "나무"])
+    fake.start()
+    yield fake
+    fake.stop()
+
+
+def test_lookup_keeps_nouns_that_look_inflected(dictionary, tmp_path):
+    service = make_service(dictionary, tmp_path)
+
+    async def lookups():
+        return await asyncio.gather(*(service.alookup(noun) for noun in NOUNS))
+
+    assert [lemma for lemma, _ in run(service, lookups())] == NOUNS
+    # 표면형에 뜻풀이가 있으므로 규칙 후보는 묻지 않습니다.
+    assert sorted(dictionary.queries) == sorted(NOUNS)
+
+
+def test_lookup_falls_back_to_lemma(dictionary, tmp_path):
+    service = make_service(dictionary, tmp_path)
+    assert primary_lemma("바람에") == "바람"
+    assert lemma_candidates("간다")[0] == "가다"
+    lemma, senses = run(service, service.alookup("바람에"))
+    assert lemma == "바람" and len(senses) == 2
+    assert dictionary.queries == ["바람에", "바람"]
+
+
+def test_lookup_many_dedupes_on_lemma(dictionary, tmp_path):
+    service = make_service(dictionary, tmp_path)
+    results = run(service, service.alookup_many(["바람에", "바람", "바람을", "나라", "나무", "나라"]))
+    assert [r["lemma"] for r in results] == ["바람", "바람", "바람", "나라", "나무", "나라"]
+    # 표면형마다 한 번, 표제어 후보 "바람" 은 표면형 조회와 합쳐져 다시 묻지 않습니다.
+    assert sorted(dictionary.queries) == ["나라", "나무", "바람", "바람에", "바람을"]
+
+
+def test_limiter_applies_to_each_remote_fetch(dictionary, tmp_path):
+    # "바람에" 는 표면형에 결과가 없어 표제어 후보 "바람" 까지 원격으로 찾습니다.
+    service = DictionaryService(cache_db=str(tmp_path / "dictionary_cache.db"), limiter=RateLimiter(5))
+    service.base_url = dictionary.base_url
+    started = time.monotonic()
+    lemma, senses = run(service, service.alookup("바람에"))
+    assert lemma == "바람" and len(senses) == 2
+    assert dictionary.queries == ["바람에", "바람"]
+    assert time.monotonic() - started >= 0.2
@@ -0,0 +1,177 @@
+﻿"""
+LLMScheduler 를 가짜 OpenAI 서버(benchmarks/fake_openai.py)에 붙여 확인합니다.
+  - 429 는 Retry-After 이상 기다린 뒤 재시도하고, 400 은 재시도하지 않는지
+  - 제한 시간을 넘기면 TimeoutError 를 올리고, 제한 시간 뒤에는 재시도를 시작하지 않는지
+  - 헤지 요청을 보내면 먼저 온 응답을 쓰는지
+  - 한 튜터가 늦어도 _gather_replies 가 나머지 답변과 timed_out 을 돌려주는지
+  - 튜터의 제한 시간이 롤링 요약 호출까지 포함하는지
+"""
+import time
+import asyncio
+
+import pytest
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from llm import load_sdk
+from llm_scheduler import LLMScheduler
+
+
+@pytest.fixture
+def start_server():
+    servers = []
+
+    def start(**options) -> FakeOpenAIServer:
+        fake = FakeOpenAIServer(**options)
+        fake.start()
+        servers.append(fake)
+        return fake
+
+    yield start
+    for fake in servers:
+        fake.stop()
+
+
+def complete(server: FakeOpenAIServer, scheduler: LLMScheduler, deadline: float = 5.0):
+    """스케줄러로 한 번 호출합니다. 클라이언트는 SDK 재시도를 끄고 이 이벤트 루프에서 만들고 닫습니다."""
+    async def main():
+        client = load_sdk().AsyncOpenAI(base_url=server.base_url, api_key="test", max_retries=0)
+        try:
+            return await scheduler.complete(
+                lambda: client.chat.completions.create(
+                    model="gpt-4o", messages=[{"role": "user", "content": "안녕하세요"}]
+                ),
+                deadline=deadline,
+            )
+        finally:
+            await client.close()
+    return asyncio.run(main())
+
+
+def test_retries_429_after_retry_after(start_server):
+    server = start_server(latency=0.01, fail_first=1, error_status=429, retry_after=0.3)
+    scheduler = LLMScheduler(max_attempts=3, backoff_base=0.01, seed=0)
+    response = complete(server, scheduler)
+    assert response.choices[0].message.content.startswith("토큰0")
+    assert server.request_count == 2
+    assert server.request_times[1] - server.request_times[0] >= 0.3
+    assert scheduler.counts["retries"] == 1
+
+
+def test_does_not_retry_400(start_server):
+    server = start_server(latency=0.01, fail_first=5, error_status=400)
+    scheduler = LLMScheduler(max_attempts=4, backoff_base=0.01, seed=0)
+    with pytest.raises(load_sdk().BadRequestError):
+        complete(server, scheduler)
+    assert server.request_count == 1
+    assert scheduler.counts["retries"] == 0
+    assert scheduler.counts["failures"] == 1
+
+
+def test_deadline_raises_timeout(start_server):
+    server = start_server(latency=2.0)
+    scheduler = LLMScheduler(max_attempts=4, backoff_base=0.01, seed=0)
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        complete(server, scheduler, deadline=0.3)
+    assert time.monotonic() - started < 1.0
+    assert scheduler.counts["timeouts"] == 1
+    assert server.request_count == 1
+
+
+def test_no_retry_starts_past_deadline(start_server):
+    # 두 번째 시도는 0.4초에 시작하고, 세 번째 시도(0.8초)는 제한 시간(0.6초)을 넘기므로 보내지 않습니다.
+    server = start_server(latency=0.01, fail_first=10, error_status=429, retry_after=0.4)
+    scheduler = LLMScheduler(max_attempts=10, backoff_base=0.01, seed=0)
+    started = time.monotonic()
+    with pytest.raises(load_sdk().RateLimitError):
+        complete(server, scheduler, deadline=0.6)
+    assert time.monotonic() - started < 0.6
+    time.sleep(0.3)
+    assert server.request_count == 2
+    assert all(at < started + 0.6 for at in server.request_times)
+
+
+def test_hedge_takes_first_reply(start_server):
+    server = start_server(latency=0.05, slow_first=1, slow_latency=3.0)
+    scheduler = LLMScheduler(max_attempts=1, hedge_after=0.2, seed=0)
+    started = time.monotonic()
+    response = complete(server, scheduler)
+    assert time.monotonic() - started < 1.0
+    assert response.choices[0].message.content.startswith("토큰0")
+    assert server.request_count == 2
+    assert scheduler.counts["hedges"] == 1
+    assert scheduler.counts["hedge_wins"] == 1
+
+
+def test_no_hedge_when_first_reply_is_fast(start_server):
+    server = start_server(latency=0.01)
+    scheduler = LLMScheduler(max_attempts=1, hedge_after=0.5, seed=0)
+    complete(server, scheduler)
+    assert server.request_count == 1
+    assert scheduler.counts["hedges"] == 0
+
+
+def test_gather_replies_returns_others_when_one_tutor_is_slow(start_server, main_module, monkeypatch):
+    import agents as agents_module
+    from benchmarks.bench_llm_client import _state
+
+    server = start_server(latency=0.5)
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(agents_module, "scheduler", LLMScheduler(max_attempts=1, seed=0))
+    slow = main_module.int_agent
+    monkeypatch.setattr(slow, "deadline", 0.2)
+
+    async def gather():
+        try:
+            return await main_module._gather_replies(_state(), f"늦은 튜터 확인 {time.time()}")
+        finally:
+            await main_module.llm.aclose()
+
+    responses, timed_out = asyncio.run(gather())
+    assert timed_out == [slow.role.value]
+    assert responses[slow.role.value] == slow.timeout_message
+    for agent in (main_module.emp_agent, main_module.ase_agent):
+        assert responses[agent.role.value].startswith("토큰0")
+
+
+@pytest.mark.parametrize("summary_seconds, latency", [(3.0, 0.01), (0.3, 0.4)])
+def test_deadline_covers_history_summary(start_server, main_module, monkeypatch, summary_seconds, latency):
+    # 요약이 제한 시간을 넘기는 경우와, 요약 뒤 남은 시간 안에 LLM 답변이 오지 않는 경우입니다.
+    import agents as agents_module
+    from benchmarks.bench_llm_client import _state
+    from schemas import Message
+
+    server = start_server(latency=latency)
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(agents_module, "scheduler", LLMScheduler(max_attempts=1, seed=0))
+
+    async def slow_summary(previous, messages):
+        await asyncio.sleep(summary_seconds)
+        return "요약"
+
+    monkeypatch.setattr(agents_module.history_window, "summarize", slow_summary)
+    slow = main_module.int_agent
+    monkeypatch.setattr(slow, "deadline", 0.5)
+    # 이 튜터만 예산이 작아 요약이 필요합니다.
+    monkeypatch.setattr(slow, "history_token_budget", 20)
+    state = _state()
+    state.shared_chat_history = [
+        Message(role="user" if i % 2 == 0 else "assistant", content=f"이전 대화 {i} {time.time()} " * 5)
+        for i in range(6)
+    ]
+
+    async def gather():
+        try:
+            return await main_module._gather_replies(state, f"요약 제한 시간 확인 {time.time()}")
+        finally:
+            await main_module.llm.aclose()
+
+    started = time.monotonic()
+    responses, timed_out = asyncio.run(gather())
+    assert time.monotonic() - started < 1.5
+    assert timed_out == [slow.role.value]
+    assert responses[slow.role.value] == slow.timeout_message
+    for agent in (main_module.emp_agent, main_module.ase_agent):
+        assert responses[agent.role.value].startswith("토큰0")
@@ -0,0 +1,39 @@
+﻿"""
+시 검색 색인의 재현율을 확인합니다. 특히 한 글자 검색어(별, 꽃, 달 ...)가 다른 글자와 붙어 나온 경우도 찾는지 봅니다.
+"""
+import os
+
+import pytest
+
+from schemas import PoemSegment
+from services.poem_loader import PoemLoader
+from services.poem_search import PoemSearchIndex
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                       "data", "KPoEM_poem_dataset_v4.tsv")
+
+
+def segment(poem_id: int, text: str, title: str = "무제") -> PoemSegment:
+    return PoemSegment(seg_id=poem_id, poem_id=poem_id, text=text, title=title, poet="시인")
+
+
+def test_single_syllable_matches_inside_words():
+    index = PoemSearchIndex().build([
+        segment(1, "별 하나에 추억과"),
+        segment(2, "오늘 밤에도 별이 바람에 스치운다"),
+        segment(3, "새벽 하늘의 샛별"),
+        segment(4, "죽는 날까지 하늘을 우러러"),
+    ])
+    assert {pid for pid, _ in index.search("별")} == {1, 2, 3}
+    # 두 글자 이상은 bigram 으로 찾으므로 결과가 그대로입니다.
+    assert {pid for pid, _ in index.search("하늘")} == {3, 4}
+
+
+@pytest.mark.skipif(not os.path.exists(DATASET), reason="데이터셋이 없습니다.")
+@pytest.mark.parametrize("query", ["별", "꽃", "달", "밤", "눈"])
+def test_single_syllable_recall_on_dataset(query):
+    segments = PoemLoader(DATASET).load_segments()
+    index = PoemSearchIndex().build(segments)
+    expected = {seg.poem_id for seg in segments if query in seg.text or query in seg.title}
+    found = {pid for pid, _ in index.search(query, limit=len(segments))}
+    assert expected and expected <= found
@@ -0,0 +1,63 @@
+﻿"""
+워커끼리 공유하는 SharedCache 를 확인합니다.
+  - 한 워커가 aset 한 값을 다른 워커가 aget 으로 읽는지 (공유 적중으로 세는지)
+  - 공유 파일을 쓸 수 없어도 캐시 오류가 LLM 답변을 실패로 바꾸지 않는지
+"""
+import asyncio
+
+import llm
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.bench_llm_client import _state
+from llm_scheduler import LLMScheduler
+from services.response_cache import SharedCache
+
+
+def test_value_set_by_one_worker_is_read_by_another(tmp_path):
+    path = str(tmp_path / "shared_cache.db")
+    first, second = SharedCache(path, "llm"), SharedCache(path, "llm")
+
+    async def main():
+        await first.aset("k", "답변")
+        return await second.aget("k"), await second.aget("없음")
+
+    assert asyncio.run(main()) == ("답변", None)
+    assert second.stats()["shared_hits"] == 1
+    assert second.stats()["misses"] == 1
+
+
+def test_cache_errors_are_ignored(tmp_path, capsys):
+    # 디렉터리는 SQLite 파일로 열 수 없으므로 모든 공유 읽기·쓰기가 실패합니다.
+    broken = SharedCache(str(tmp_path), "llm")
+
+    async def main():
+        await broken.aset("k", "답변")
+        return await broken.aget("k"), await broken.aget("다른 키")
+
+    # 메모리 캐시는 그대로 동작합니다.
+    assert asyncio.run(main()) == ("답변", None)
+    assert "공유 캐시" in capsys.readouterr().out
+
+
+def test_reply_survives_cache_write_failure(tmp_path, monkeypatch):
+    import agents as agents_module
+    from agents import EmpathyAgent
+
+    server = FakeOpenAIServer(latency=0.01)
+    monkeypatch.setenv("OPENAI_BASE_URL", server.start())
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(agents_module, "response_cache", SharedCache(str(tmp_path), "llm"))
+    monkeypatch.setattr(agents_module, "scheduler", LLMScheduler(max_attempts=1, seed=0))
+    agent = EmpathyAgent()
+
+    async def main():
+        try:
+            return await agent.aget_response(_state(), "캐시 쓰기 실패 확인")
+        finally:
+            await llm.aclose()
+
+    try:
+        reply = asyncio.run(main())
+    finally:
+        server.stop()
+    assert reply.startswith("토큰0")
+    assert not agent.is_error(reply)
@@ -0,0 +1,96 @@
+﻿"""
+같은 SQLite 파일을 쓰는 두 SessionStore(shared=True)로 여러 워커를 흉내 내 확인합니다.
+  - 한 워커의 메모리 사본이 뒤처져 있어도 메시지 순번이 겹치지 않고, 두 워커의 히스토리가 같아지는지
+  - 기록이 실패하면 메모리 사본에 남지 않고, 트랜잭션이 되돌려져 다른 워커의 기록을 막지 않는지
+  - 진행 중인 턴 표시가 워커끼리 공유되는지
+"""
+import sqlite3
+import asyncio
+
+import pytest
+
+from schemas import Message
+from services.session_store import SessionStore
+
+
+def message(content: str) -> Message:
+    return Message(role="user", content=content)
+
+
+def contents(session):
+    return [m.content for m in session.history]
+
+
+@pytest.fixture
+def stores(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    return SessionStore(db_path=path, shared=True), SessionStore(db_path=path, shared=True)
+
+
+def test_stale_worker_appends_after_other_worker(stores):
+    first, second = stores
+
+    async def main():
+        session = await first.create(1)
+        stale = await second.get(session.session_id)
+        await first.append(session, [message("a"), message("b")])
+        # second 의 메모리 사본은 a, b 를 모르는 채로 이어 씁니다.
+        await second.append(stale, [message("c")])
+        await first.append(session, [message("d")])
+        return await first.get(session.session_id), await second.get(session.session_id)
+
+    first_view, second_view = asyncio.run(main())
+    assert contents(first_view) == ["a", "b", "c", "d"]
+    assert contents(second_view) == ["a", "b", "c", "d"]
+
+
+def test_failed_append_is_rolled_back(stores):
+    first, second = stores
+    first._connection().execute("""
+        CREATE TRIGGER reject BEFORE INSERT ON chat_messages WHEN NEW.content = 'boom'
+        BEGIN SELECT RAISE(ABORT, 'boom'); END
+    """)
+    first._connection().commit()
+
+    async def main():
+        session = await first.create(1)
+        with pytest.raises(sqlite3.IntegrityError):
+            await first.append(session, [message("ok"), message("boom")])
+        assert contents(session) == []
+        # 실패한 트랜잭션이 열린 채 남아 있으면 다른 워커의 기록이 "database is locked" 로 실패합니다.
+        other = await second.get(session.session_id)
+        await second.append(other, [message("a")])
+        return await first.get(session.session_id)
+
+    assert contents(asyncio.run(main())) == ["a"]
+
+
+def test_turn_marker_is_shared_between_workers(stores):
+    first, second = stores
+
+    async def main():
+        session = await first.create(1)
+        sid = session.session_id
+        started = await first.begin_turn(sid, timeout=60)
+        assert started is not None
+        assert await second.begin_turn(sid, timeout=60) is None
+        await first.end_turn(sid, started)
+        again = await second.begin_turn(sid, timeout=60)
+        assert again is not None
+        # 정리되지 못한 표시는 timeout 이 지나면 무시합니다.
+        assert await first.begin_turn(sid, timeout=0) is not None
+
+    asyncio.run(main())
+
+
+def test_turn_marker_in_memory_store():
+    store = SessionStore()
+
+    async def main():
+        session = await store.create(1)
+        started = await store.begin_turn(session.session_id, timeout=60)
+        assert await store.begin_turn(session.session_id, timeout=60) is None
+        await store.end_turn(session.session_id, started)
+        assert await store.begin_turn(session.session_id, timeout=60) is not None
+
+    asyncio.run(main())
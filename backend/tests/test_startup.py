@@ -0,0 +1,15 @@
+﻿"""
+main 을 불러오기만 해서는 SQLite 파일을 열거나 만들지 않는지 확인합니다.
+(serve.py 는 fork 뒤 워커에서 main 을 불러오고, 연결은 각 워커가 처음 쓸 때 엽니다)
+"""
+import os
+import sys
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_main_opens_no_database(tmp_path):
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR, "SESSION_DB": "sessions.db"}
+    subprocess.run([sys.executable, "-c", "import main"], cwd=tmp_path, env=env, check=True)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,32 @@
+﻿"""
+토큰 수 계산이 네트워크를 쓰지 않는지 확인합니다. BPE 파일이 로컬 캐시에 없거나 손상됐으면 내려받지 않고 근사치로 셉니다.
+"""
+import hashlib
+
+import pytest
+
+from services import tokenizer
+
+
+@pytest.fixture
+def no_download(monkeypatch):
+    def get_encoding(name):
+        raise AssertionError("내려받기를 시도했습니다.")
+
+    monkeypatch.setattr(tokenizer, "_encoding", None)
+    if tokenizer.tiktoken is not None:
+        monkeypatch.setattr(tokenizer.tiktoken, "get_encoding", get_encoding)
+
+
+def test_missing_cache_uses_estimate(tmp_path, monkeypatch, no_download):
+    monkeypatch.setenv("TIKTOKEN_CACHE_DIR", str(tmp_path))
+    assert tokenizer._get_encoding() is None
+    # 한글 음절 5개 + 그 밖의 문자 6개(4글자당 1토큰) + 1
+    assert tokenizer.count_tokens.__wrapped__("안녕하세요 hello") == 7
+
+
+def test_corrupt_cache_file_is_not_used(tmp_path, monkeypatch, no_download):
+    monkeypatch.setenv("TIKTOKEN_CACHE_DIR", str(tmp_path))
+    (tmp_path / hashlib.sha1(tokenizer.ENCODING_URL.encode()).hexdigest()).write_bytes(b"broken")
+    assert tokenizer._cached_bpe_path() is None
+    assert tokenizer._get_encoding() is None
@@ -0,0 +1,90 @@
+﻿"""
+모든 (시 × 에이전트 × 수준) 조합의 첫 질문을 미리 생성해 OpenerStore에 저장합니다.
+이미 저장된 조합은 건너뛰므로, 중간에 멈춰도 같은 명령으로 이어서 실행할 수 있습니다.
+
+실행 예: cd backend && python warm_openers.py --concurrency 8 --rate 5
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+from dotenv import load_dotenv
+
+# 서버(main.py)와 같은 .env 를 읽습니다. 환경 변수를 읽는 모듈들보다 먼저 불러야 합니다.
+load_dotenv(dotenv_path=os.path.join(current_dir, ".env"))
+
+from services.poem_loader import PoemLoader
+from services.opener_store import OpenerStore
+from services.rate_limit import RateLimiter
+from agents import EmpathyAgent, AestheticAgent, InterpretiveAgent, OPENING_INPUT
+
+LEVELS = range(1, 7)
+
+
+async def warm(args):
+    poems = PoemLoader(args.data).load()
+    if args.poems:
+        wanted = set(args.poems)
+        poems = [p for p in poems if p.id in wanted]
+
+    agents = [EmpathyAgent(), AestheticAgent(), InterpretiveAgent()]
+    if args.agents:
+        agents = [a for a in agents if a.role.value in args.agents]
+
+    store = OpenerStore(args.db)
+    done = store.keys()
+    jobs = [
+        (poem, agent, level)
+        for poem in poems
+        for agent in agents
+        for level in LEVELS
+        if (poem.id, agent.role.value, level) not in done
+    ]
+    print(f"총 {len(poems) * len(agents) * len(LEVELS)}개 조합 중 {len(jobs)}개를 생성합니다. (이미 저장됨: {len(done)})")
+
+    limiter = RateLimiter(args.rate)
+    gate = asyncio.Semaphore(args.concurrency)
+    failures = 0
+    completed = 0
+    started = time.monotonic()
+
+    async def run(poem, agent, level):
+        nonlocal failures, completed
+        async with gate:
+            await limiter.wait()
+            messages = agent.build_messages(agent.opening_state(poem, level), OPENING_INPUT)
+            try:
+                content = await agent._acomplete(messages)
+            except Exception as e:
+                failures += 1
+                print(f"❌ poem={poem.id} agent={agent.role.value} level={level}: {e}")
+                return
+            store.put(poem.id, agent.role.value, level, content, model=agent.model)
+            completed += 1
+            if completed % 50 == 0:
+                elapsed = time.monotonic() - started
+                print(f"  {completed}/{len(jobs)} 완료 ({completed / elapsed:.1f}개/초)")
+
+    await asyncio.gather(*(run(*job) for job in jobs))
+    print(f"✅ 생성 {completed}개, 실패 {failures}개. 실패한 조합은 다시 실행하면 이어서 생성됩니다.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="첫 질문 사전 생성 (resume 지원)")
+    parser.add_argument("--data", default="data/KPoEM_poem_dataset_v4.tsv")
+    parser.add_argument("--db", default="openers.db")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시에 진행할 LLM 호출 수")
+    parser.add_argument("--rate", type=float, default=5.0, help="초당 시작할 수 있는 최대 호출 수")
+    parser.add_argument("--poems", type=int, nargs="*", help="특정 시 ID만 생성")
+    parser.add_argument("--agents", nargs="*", choices=["empathy", "aesthetic", "interpretive"])
+    asyncio.run(warm(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
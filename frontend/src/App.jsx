@@ -67,9 +67,15 @@ function App() {
     }
   };
 
-  // 시 선택
-  const handlePoemSelect = (poem) => {
-    setSelectedPoem(poem);
+  // 시 선택: 목록에는 요약만 있으므로 본문은 상세 API로 가져옵니다.
+  const handlePoemSelect = async (poem) => {
+    try {
+      const response = await client.get(`/api/poems/${poem.id}`);
+      setSelectedPoem(response.data);
+    } catch (error) {
+      console.error("시 본문 로딩 실패", error);
+      return;
+    }
     setSharedChatHistory([]); 
     setLatestResponses({ empathy: "", aesthetic: "", interpretive: "" });
     setSearchTerm("");